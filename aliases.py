@@ -0,0 +1,70 @@
+import asyncio
+import time
+
+from state import StateStore
+
+
+def alias_variants(alias):
+    """Variasi alias yang masih memenuhi format [a-z0-9_]"""
+    year = time.strftime('%y')
+    return (
+        f"{alias}2", f"{alias}_{year}", f"my_{alias}", f"{alias}_link",
+        f"get_{alias}", f"the_{alias}", f"{alias}_id", f"{alias}123",
+    )
+
+
+class AliasProber:
+    """Cek ketersediaan alias di beberapa provider secara paralel.
+
+    Alias yang diketahui sudah dipakai disimpan di cache TTL supaya request
+    berikutnya tidak perlu bertanya ke provider lagi.
+    """
+
+    def __init__(self, shortener, taken_ttl=86400, max_entries=50000, concurrency=8, timeout=3):
+        self.shortener = shortener
+        self.timeout = timeout
+        self.taken = StateStore('alias_taken', max_entries, taken_ttl)
+        self._semaphore = asyncio.Semaphore(concurrency)
+
+    def mark_taken(self, provider, alias):
+        self.taken[(provider, alias)] = True
+
+    async def is_available(self, provider, alias, user_id=None):
+        """True = bebas, False = sudah dipakai, None = tidak bisa dicek"""
+        if (provider, alias) in self.taken:
+            return False
+        async with self._semaphore:
+            try:
+                taken = await asyncio.wait_for(self.shortener.alias_taken(provider, alias, user_id), self.timeout)
+            except asyncio.TimeoutError:
+                return None
+        if taken:
+            self.mark_taken(provider, alias)
+        return None if taken is None else not taken
+
+    async def availability(self, alias, providers, user_id=None):
+        """Return {provider: True/False/None} untuk satu alias"""
+        results = await asyncio.gather(*(self.is_available(provider, alias, user_id) for provider in providers))
+        return dict(zip(providers, results))
+
+    async def suggest(self, alias, providers, limit=6, user_id=None, round_size=2):
+        """Return [(provider, variant)] yang pasti bebas, urut sesuai variasi.
+
+        Variasi dicek bertahap, `round_size` per provider setiap putaran, dan
+        berhenti begitu sudah ada `limit` yang bebas. Provider yang sedang antri
+        rate limit dilewati supaya cek alias tidak menghabiskan kuota shorten.
+        """
+        variants = alias_variants(alias)
+        found = []
+        for start in range(0, len(variants), round_size):
+            ready = [provider for provider in providers if not self.shortener.scheduler.expected_wait(provider)]
+            if not ready:
+                break
+            candidates = [(provider, variant) for variant in variants[start:start + round_size] for provider in ready]
+            results = await asyncio.gather(
+                *(self.is_available(provider, variant, user_id) for provider, variant in candidates)
+            )
+            found.extend(candidate for candidate, available in zip(candidates, results) if available)
+            if len(found) >= limit:
+                break
+        return found[:limit]
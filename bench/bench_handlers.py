@@ -0,0 +1,156 @@
+"""Micro-benchmark handler bot terhadap fake provider lokal.
+
+Jalankan dari root repo:
+
+    python -m bench.bench_handlers --iterations 500 --concurrency 50
+
+Setiap path handler dipanggil dengan Update sintetis; request provider
+dikirim ke FakeProviderServer sehingga tidak butuh akses internet.
+"""
+import argparse
+import asyncio
+import os
+import statistics
+import time
+
+# Cache, stats dan state hanya di memory supaya benchmark tidak menulis file
+os.environ.setdefault('TELEGRAM_BOT_TOKEN', '0:bench')
+os.environ['CACHE_PATH'] = ''
+os.environ['STATS_PATH'] = ''
+os.environ['PAYLOADS_PATH'] = ''
+os.environ.pop('STATE_PATH', None)
+# Tanpa rate limit provider kecuali diminta lewat env
+os.environ.setdefault('RATE_LIMITS', '')
+# Job dijalankan langsung di handler supaya latency yang diukur mencakup shortening
+os.environ['JOB_WORKERS'] = '0'
+
+import bot  # noqa: E402
+from providers import PROVIDERS  # noqa: E402
+
+from bench.fake_providers import FakeProviderServer, ProviderProfile  # noqa: E402
+from bench.fakes import FakeMessage, FakeUser, callback_update, context, message_update  # noqa: E402
+
+PROVIDER_KEYS = tuple(PROVIDERS)
+
+
+def percentile(sorted_values, q):
+    if not sorted_values:
+        return 0.0
+    index = min(len(sorted_values) - 1, int(q / 100 * len(sorted_values)))
+    return sorted_values[index]
+
+
+class Paths:
+    """Satu method per path handler; `i` dipakai untuk URL dan user unik"""
+
+    def __init__(self, batch_size):
+        self.batch_size = batch_size
+
+    @staticmethod
+    def url(i):
+        return f"https://example.com/page/{i}?ref=bench"
+
+    async def handle_url(self, i):
+        await bot.handle_url(message_update(i, self.url(i)), context())
+
+    async def handle_callback(self, i):
+        provider = PROVIDER_KEYS[i % len(PROVIDER_KEYS)]
+        await bot.handle_callback(callback_update(i, bot.payloads.pack('', provider, self.url(i))), context())
+
+    async def handle_callback_auto(self, i):
+        await bot.handle_callback(callback_update(i, bot.payloads.pack('', 'auto', self.url(i))), context())
+
+    async def handle_batch_urls(self, i):
+        bot.batch_waiting[i] = True
+        text = "\n".join(self.url(i * self.batch_size + n) for n in range(self.batch_size))
+        await bot.handle_batch_urls(message_update(i, text), context())
+
+    async def handle_batch_callback(self, i):
+        urls = "\n".join(self.url(i * self.batch_size + n) for n in range(self.batch_size))
+        provider = PROVIDER_KEYS[i % len(PROVIDER_KEYS)]
+        await bot.handle_callback(callback_update(i, bot.payloads.pack('batch_', provider, urls)), context())
+
+    async def custom_command(self, i):
+        update = message_update(i, f"/custom {self.url(i)} alias_{i}")
+        await bot.custom_command(update, context([self.url(i), f"alias_{i}"]))
+
+    async def handle_custom_callback(self, i):
+        update = message_update(i, '')
+        await bot.custom_command(update, context([self.url(i), f"alias_{i}"]))
+        # Tombol provider pertama dari keyboard yang dibuat custom_command
+        data = update.message.sent[0].reply_markup.inline_keyboard[0][0].callback_data
+        message = FakeMessage(FakeUser(i))
+        await bot.handle_callback(callback_update(i, data, message), context())
+
+
+async def run_path(name, call, iterations, concurrency):
+    semaphore = asyncio.Semaphore(concurrency)
+    latencies = []
+
+    async def one(i):
+        async with semaphore:
+            start = time.perf_counter()
+            await call(i)
+            latencies.append(time.perf_counter() - start)
+
+    start = time.perf_counter()
+    await asyncio.gather(*(one(i) for i in range(iterations)))
+    elapsed = time.perf_counter() - start
+
+    latencies.sort()
+    return {
+        'path': name,
+        'throughput': iterations / elapsed,
+        'mean': statistics.fmean(latencies),
+        'p50': percentile(latencies, 50),
+        'p95': percentile(latencies, 95),
+        'p99': percentile(latencies, 99),
+    }
+
+
+def print_report(results):
+    print(f"{'path':<24}{'ops/s':>10}{'mean ms':>10}{'p50 ms':>10}{'p95 ms':>10}{'p99 ms':>10}")
+    for r in results:
+        print(
+            f"{r['path']:<24}{r['throughput']:>10.1f}{r['mean'] * 1000:>10.2f}"
+            f"{r['p50'] * 1000:>10.2f}{r['p95'] * 1000:>10.2f}{r['p99'] * 1000:>10.2f}"
+        )
+
+
+async def main(args):
+    profile = ProviderProfile(latency=args.latency, jitter=args.jitter, error_rate=args.error_rate)
+    server = await FakeProviderServer(profiles={provider.host: profile for provider in PROVIDERS.values()}).start()
+    bot.shortener.base_urls = server.base_urls()
+    bot.BATCH_EDIT_INTERVAL = float('inf')
+
+    paths = Paths(args.batch_size)
+    names = args.paths or [name for name in vars(Paths) if not name.startswith('_') and name != 'url']
+
+    results = []
+    try:
+        for name in names:
+            # Cache dikosongkan supaya setiap path benar-benar memanggil provider
+            bot.result_cache._memory.clear()
+            results.append(await run_path(name, getattr(paths, name), args.iterations, args.concurrency))
+    finally:
+        await bot.shortener.close()
+        await server.stop()
+
+    print_report(results)
+    print(f"\nfake provider requests: {server.requests}")
+
+
+def parse_args():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument('--iterations', type=int, default=200)
+    parser.add_argument('--concurrency', type=int, default=20)
+    parser.add_argument('--batch-size', type=int, default=20)
+    parser.add_argument('--latency', type=float, default=0.02, help='latency rata-rata fake provider (detik)')
+    parser.add_argument('--jitter', type=float, default=0.01)
+    parser.add_argument('--error-rate', type=float, default=0.0)
+    parser.add_argument('--paths', nargs='*', help='path yang dijalankan (default: semua)')
+    return parser.parse_args()
+
+
+if __name__ == '__main__':
+    asyncio.run(main(parse_args()))
@@ -0,0 +1,129 @@
+"""Fake provider shortener lokal untuk benchmark tanpa akses internet.
+
+Satu server HTTP/1.1 keep-alive melayani semua provider, dibedakan dari
+segmen path pertama: /clck.ru/--?url=..., /is.gd/create.php?..., dst.
+Pakai `base_urls()` sebagai argumen `base_urls` URLShortener.
+"""
+import asyncio
+import itertools
+import json
+import random
+from urllib.parse import parse_qs, urlsplit
+
+from providers import PROVIDERS
+
+# Halaman HTML osdb.link dibuat besar supaya parsing HTML ikut terukur
+OSDB_FILLER = "<div class=ad>" + "lorem ipsum dolor sit amet " * 400 + "</div>\n"
+
+
+class ProviderProfile:
+    """Perilaku satu fake provider"""
+
+    def __init__(self, latency=0.02, jitter=0.01, error_rate=0.0):
+        self.latency = latency
+        self.jitter = jitter
+        self.error_rate = error_rate
+
+
+class FakeProviderServer:
+    def __init__(self, host='127.0.0.1', port=0, profiles=None, taken_aliases=()):
+        self.host = host
+        self.port = port
+        self.profiles = profiles or {}
+        self.default_profile = ProviderProfile()
+        self.taken_aliases = set(taken_aliases)
+        self.requests = 0
+        self._counter = itertools.count(1)
+        self._server = None
+
+    def base_urls(self):
+        return {provider.host: f"http://{self.host}:{self.port}/{provider.host}" for provider in PROVIDERS.values()}
+
+    async def start(self):
+        self._server = await asyncio.start_server(self._handle_client, self.host, self.port)
+        self.port = self._server.sockets[0].getsockname()[1]
+        return self
+
+    async def stop(self):
+        self._server.close()
+        await self._server.wait_closed()
+
+    def _short_id(self):
+        return format(next(self._counter), 'x')
+
+    def _respond(self, host, method, path, query, form):
+        """Return (status, content_type, body) meniru respon provider asli"""
+        code = self._short_id()
+        if host == 'clck.ru':
+            return 200, 'text/plain', f"https://clck.ru/{code}"
+        if host == 'da.gd':
+            return 200, 'text/plain', f"https://da.gd/{code}\n"
+        if host == 'osdb.link' and method == 'POST':
+            body = (
+                "<html><body>" + OSDB_FILLER +
+                f"<label id=surl><a href=\"http://osdb.link/{code}\">http://osdb.link/{code}</a></label>"
+                + OSDB_FILLER + "</body></html>"
+            )
+            return 200, 'text/html', body
+        if host in ('is.gd', 'v.gd') and path == '/create.php':
+            alias = query.get('shorturl', [None])[0]
+            if query.get('format', ['simple'])[0] == 'json':
+                if alias and alias in self.taken_aliases:
+                    data = {'errorcode': 2, 'errormessage': 'The shortened URL you picked already exists.'}
+                else:
+                    if alias:
+                        self.taken_aliases.add(alias)
+                    data = {'shorturl': f"https://{host}/{alias or code}"}
+                return 200, 'application/json', json.dumps(data)
+            return 200, 'text/plain', f"https://{host}/{code}"
+        if host in ('is.gd', 'v.gd'):
+            # Lookup short link: redirect jika alias sudah dipakai
+            if path.strip('/') in self.taken_aliases:
+                return 301, 'text/html', ''
+            return 404, 'text/html', 'not found'
+        if host == 'tinyurl.com':
+            return 200, 'text/plain', f"tinyurl.com/{code}"
+        return 404, 'text/plain', 'not found'
+
+    async def _handle_client(self, reader, writer):
+        try:
+            while True:
+                request_line = await reader.readline()
+                if not request_line:
+                    break
+                method, target, _ = request_line.decode().split(' ', 2)
+                headers = {}
+                while True:
+                    line = await reader.readline()
+                    if not line.strip():
+                        break
+                    name, _, value = line.decode().partition(':')
+                    headers[name.strip().lower()] = value.strip()
+                body = b''
+                if 'content-length' in headers:
+                    body = await reader.readexactly(int(headers['content-length']))
+
+                self.requests += 1
+                parts = urlsplit(target)
+                host, _, path = parts.path.lstrip('/').partition('/')
+                profile = self.profiles.get(host, self.default_profile)
+                await asyncio.sleep(max(0.0, random.gauss(profile.latency, profile.jitter)))
+
+                if random.random() < profile.error_rate:
+                    status, content_type, text = 503, 'text/plain', 'service unavailable'
+                else:
+                    status, content_type, text = self._respond(
+                        host, method, '/' + path, parse_qs(parts.query),
+                        parse_qs(body.decode()) if body else {}
+                    )
+
+                payload = text.encode()
+                writer.write(
+                    f"HTTP/1.1 {status} X\r\nContent-Type: {content_type}\r\n"
+                    f"Content-Length: {len(payload)}\r\n\r\n".encode() + payload
+                )
+                await writer.drain()
+        except (ConnectionError, asyncio.IncompleteReadError, ValueError):
+            pass
+        finally:
+            writer.close()
@@ -0,0 +1,161 @@
+"""Fake Telegram Bot API lokal untuk load test tanpa akses internet.
+
+Melayani POST /bot<token>/<method> seperti api.telegram.org. Update dari
+`push()` diantrikan untuk getUpdates (long polling); setiap pesan/edit dari
+bot diteruskan ke `listener(method, chat_id, message)`.
+Pakai `base_url()` sebagai argumen `base_url` bot.build_application().
+"""
+import asyncio
+import itertools
+import json
+import time
+from collections import Counter, deque
+from email.parser import BytesParser
+from urllib.parse import parse_qs
+
+BOT_USER = {'id': 1, 'is_bot': True, 'first_name': 'Load Test Bot', 'username': 'load_test_bot'}
+
+# Method yang cukup dijawab True
+TRUE_METHODS = frozenset({
+    'deleteWebhook', 'setWebhook', 'answerCallbackQuery', 'answerInlineQuery', 'setMyCommands', 'close', 'logOut',
+})
+
+
+def _parse_form(content_type, body):
+    """Parameter request PTB: urlencoded, atau multipart jika ada file"""
+    if content_type.startswith('multipart/form-data'):
+        message = BytesParser().parsebytes(f"Content-Type: {content_type}\r\n\r\n".encode() + body)
+        return {
+            part.get_param('name', header='content-disposition'): part.get_payload(decode=True).decode(errors='replace')
+            for part in message.get_payload()
+            if not part.get_filename()
+        }
+    return {name: values[0] for name, values in parse_qs(body.decode()).items()}
+
+
+class FakeTelegramServer:
+    def __init__(self, host='127.0.0.1', port=0, listener=None):
+        self.host = host
+        self.port = port
+        self.listener = listener
+        self.calls = Counter()
+        self._updates = deque()
+        self._update_ids = itertools.count(1)
+        self._message_ids = itertools.count(1)
+        self._arrived = asyncio.Event()
+        self._server = None
+
+    def base_url(self):
+        return f"http://{self.host}:{self.port}/bot"
+
+    async def start(self):
+        self._server = await asyncio.start_server(self._handle_client, self.host, self.port)
+        self.port = self._server.sockets[0].getsockname()[1]
+        return self
+
+    async def stop(self):
+        self._server.close()
+        await self._server.wait_closed()
+
+    def next_message_id(self):
+        return next(self._message_ids)
+
+    def make_update(self, **fields):
+        return dict(fields, update_id=next(self._update_ids))
+
+    def push(self, update):
+        """Antrikan update untuk getUpdates"""
+        self._updates.append(update)
+        self._arrived.set()
+
+    def pending(self):
+        return len(self._updates)
+
+    async def _get_updates(self, params):
+        offset = int(params.get('offset') or 0)
+        limit = int(params.get('limit') or 100)
+        timeout = float(params.get('timeout') or 0)
+        while self._updates and self._updates[0]['update_id'] < offset:
+            self._updates.popleft()
+        if not self._updates and timeout:
+            # Long polling: tunggu update baru atau timeout
+            self._arrived.clear()
+            try:
+                await asyncio.wait_for(self._arrived.wait(), timeout)
+            except asyncio.TimeoutError:
+                pass
+        return list(itertools.islice(self._updates, limit))
+
+    def _message(self, method, params):
+        chat_id = int(params['chat_id'])
+        if method == 'editMessageText':
+            message_id = int(params['message_id'])
+        else:
+            message_id = self.next_message_id()
+        message = {
+            'message_id': message_id,
+            'date': int(time.time()),
+            'chat': {'id': chat_id, 'type': 'private' if chat_id > 0 else 'group'},
+            'from': BOT_USER,
+            'text': params.get('text', ''),
+        }
+        if params.get('reply_markup'):
+            message['reply_markup'] = json.loads(params['reply_markup'])
+        if method == 'sendDocument':
+            message['document'] = {'file_id': f"doc{message_id}", 'file_unique_id': f"doc{message_id}"}
+        if self.listener is not None:
+            self.listener(method, chat_id, message)
+        return message
+
+    async def _call(self, method, params):
+        """Return (status, body) untuk satu panggilan Bot API"""
+        self.calls[method] += 1
+        if method == 'getMe':
+            result = BOT_USER
+        elif method == 'getUpdates':
+            result = await self._get_updates(params)
+        elif method in ('sendMessage', 'editMessageText', 'sendDocument'):
+            result = self._message(method, params)
+        elif method in TRUE_METHODS:
+            if method == 'answerInlineQuery' and self.listener is not None:
+                self.listener(method, None, params)
+            result = True
+        else:
+            return 404, {'ok': False, 'error_code': 404, 'description': 'Not Found: method not found'}
+        return 200, {'ok': True, 'result': result}
+
+    async def _handle_client(self, reader, writer):
+        try:
+            while True:
+                request_line = await reader.readline()
+                if not request_line:
+                    break
+                _, target, _ = request_line.decode().split(' ', 2)
+                headers = {}
+                while True:
+                    line = await reader.readline()
+                    if not line.strip():
+                        break
+                    name, _, value = line.decode().partition(':')
+                    headers[name.strip().lower()] = value.strip()
+                body = b''
+                if 'content-length' in headers:
+                    body = await reader.readexactly(int(headers['content-length']))
+
+                method = target.split('?')[0].rsplit('/', 1)[-1]
+                params = _parse_form(headers.get('content-type', ''), body) if body else {}
+                status, data = await self._call(method, params)
+
+                payload = json.dumps(data).encode()
+                writer.write(
+                    f"HTTP/1.1 {status} X\r\nContent-Type: application/json\r\n"
+                    f"Content-Length: {len(payload)}\r\n\r\n".encode() + payload
+                )
+                await writer.drain()
+        except (ConnectionError, asyncio.IncompleteReadError, ValueError):
+            pass
+        except asyncio.CancelledError:
+            # getUpdates yang masih menunggu saat test selesai
+            pass
+        finally:
+            writer.close()
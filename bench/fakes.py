@@ -0,0 +1,86 @@
+"""Objek Update/Message/CallbackQuery sintetis untuk memanggil handler langsung"""
+import itertools
+import weakref
+from types import SimpleNamespace
+
+_message_ids = itertools.count(1)
+# message_id -> FakeMessage, untuk edit lewat FakeBot
+_messages = weakref.WeakValueDictionary()
+
+
+class FakeUser(SimpleNamespace):
+    def __init__(self, user_id):
+        super().__init__(id=user_id, first_name=f"user{user_id}", is_bot=False)
+
+
+class FakeMessage:
+    """Message yang mencatat semua reply/edit tanpa panggilan ke Telegram"""
+
+    def __init__(self, user, text='', chat_id=None):
+        self.message_id = next(_message_ids)
+        self.from_user = user
+        self.chat_id = chat_id if chat_id is not None else user.id
+        self.chat = SimpleNamespace(id=self.chat_id)
+        self.text = text
+        self.reply_markup = None
+        self.sent = []
+        _messages[self.message_id] = self
+
+    async def reply_text(self, text, reply_markup=None, **kwargs):
+        reply = FakeMessage(self.from_user, text, self.chat_id)
+        reply.reply_markup = reply_markup
+        self.sent.append(reply)
+        return reply
+
+    async def edit_text(self, text, reply_markup=None, **kwargs):
+        self.text = text
+        self.reply_markup = reply_markup
+        return self
+
+
+class FakeCallbackQuery:
+    def __init__(self, user, data, message):
+        self.id = str(next(_message_ids))
+        self.from_user = user
+        self.data = data
+        self.message = message
+        self.edits = []
+
+    async def answer(self, *args, **kwargs):
+        return True
+
+    async def edit_message_text(self, text, reply_markup=None, **kwargs):
+        self.edits.append(text)
+        return await self.message.edit_text(text, reply_markup=reply_markup)
+
+
+class FakeBot:
+    """Bot yang meneruskan edit/kirim pesan ke FakeMessage"""
+
+    async def edit_message_text(self, text, chat_id=None, message_id=None, reply_markup=None, **kwargs):
+        message = _messages.get(message_id)
+        if message is not None:
+            await message.edit_text(text, reply_markup=reply_markup)
+        return message
+
+    async def send_message(self, chat_id, text, **kwargs):
+        return FakeMessage(FakeUser(chat_id), text, chat_id)
+
+
+def message_update(user_id, text):
+    user = FakeUser(user_id)
+    message = FakeMessage(user, text)
+    return SimpleNamespace(update_id=message.message_id, message=message, effective_user=user,
+                           effective_chat=message.chat, callback_query=None)
+
+
+def callback_update(user_id, data, message=None):
+    user = FakeUser(user_id)
+    message = message or FakeMessage(user)
+    query = FakeCallbackQuery(user, data, message)
+    return SimpleNamespace(update_id=message.message_id, message=None, effective_user=user,
+                           effective_chat=message.chat, callback_query=query)
+
+
+def context(args=None):
+    return SimpleNamespace(args=list(args or []), bot=FakeBot(), bot_data={}, user_data={}, chat_data={})
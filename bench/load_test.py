@@ -0,0 +1,369 @@
+"""Load test end-to-end: Application asli dari bot.build_application() melawan
+fake Telegram Bot API dan fake provider lokal.
+
+Jalankan dari root repo:
+
+    python -m bench.load_test --users 1000 --duration 120 --latency 0.2
+
+Setiap user virtual bergiliran mengirim update, menunggu balasan akhir bot,
+lalu jeda berpikir. Campuran flow (--mix): URL + tombol provider, /batch,
+/custom + tombol, dan inline query. Latency end-to-end dihitung dari update
+dikirim sampai pesan/edit akhir bot di chat itu (pesan ⏳ tidak dihitung).
+
+Update dikirim lewat getUpdates (--delivery polling) atau langsung ke
+update_queue seperti webhook (--delivery push). Generator beban berjalan di
+proses yang sama dengan bot, jadi throughput ikut menanggung biaya generator.
+"""
+import argparse
+import asyncio
+import itertools
+import os
+import random
+import statistics
+import time
+import tracemalloc
+from collections import defaultdict
+
+try:
+    import resource
+except ImportError:  # Windows
+    resource = None
+
+from providers import PROVIDERS
+
+from bench.fake_providers import FakeProviderServer, ProviderProfile
+from bench.fake_telegram import FakeTelegramServer
+
+FLOWS = ('url', 'batch', 'custom', 'inline')
+# URL populer yang dipakai banyak user (kena cache / single-flight)
+HOT_URLS = 50
+
+
+def percentile(sorted_values, q):
+    if not sorted_values:
+        return 0.0
+    index = min(len(sorted_values) - 1, int(q / 100 * len(sorted_values)))
+    return sorted_values[index]
+
+
+def parse_mix(spec):
+    """'url=70,inline=15' -> {'url': 70.0, 'inline': 15.0}"""
+    mix = {}
+    for item in spec.split(','):
+        flow, _, weight = item.partition('=')
+        if flow.strip() not in FLOWS:
+            raise ValueError(f"flow tidak dikenal: {flow}")
+        mix[flow.strip()] = float(weight or 1)
+    return mix
+
+
+def rss_bytes():
+    """RSS proses saat ini; fallback ke puncak RSS jika /proc tidak ada"""
+    try:
+        with open('/proc/self/statm') as statm:
+            return int(statm.read().split()[1]) * os.sysconf('SC_PAGE_SIZE')
+    except (OSError, ValueError, AttributeError):
+        if resource is None:
+            return None
+        return resource.getrusage(resource.RUSAGE_SELF).ru_maxrss * 1024
+
+
+def format_mb(value):
+    return "-" if value is None else f"{value / (1024 * 1024):.1f}"
+
+
+class Recorder:
+    """Latency per jenis aksi, total dan per jendela laporan"""
+
+    def __init__(self):
+        self.latencies = defaultdict(list)
+        self.window = []
+        self.delivered = 0
+        self.window_delivered = 0
+        self.timeouts = 0
+
+    def sent(self):
+        self.delivered += 1
+        self.window_delivered += 1
+
+    def record(self, kind, latency):
+        self.latencies[kind].append(latency)
+        self.window.append(latency)
+
+    def take_window(self):
+        window, delivered = sorted(self.window), self.window_delivered
+        self.window, self.window_delivered = [], 0
+        return window, delivered
+
+
+class LoadDriver:
+    """User virtual yang berbicara dengan bot lewat FakeTelegramServer"""
+
+    def __init__(self, telegram, recorder, args):
+        self.telegram = telegram
+        self.recorder = recorder
+        self.args = args
+        self.mix = parse_mix(args.mix)
+        self.deliver = self._push
+        self._waiters = {}
+        self._inline_waiters = {}
+        self._urls = itertools.count(1)
+        self._aliases = itertools.count(1)
+        telegram.listener = self.on_bot_message
+
+    async def _push(self, update):
+        self.telegram.push(update)
+
+    def on_bot_message(self, method, chat_id, message):
+        if method == 'answerInlineQuery':
+            future = self._inline_waiters.pop(message.get('inline_query_id'), None)
+        elif message['text'].startswith('⏳'):
+            return
+        else:
+            future = self._waiters.pop(chat_id, None)
+        if future is not None and not future.done():
+            future.set_result(message)
+
+    def url(self):
+        if random.random() < self.args.hot_ratio:
+            return f"https://popular{random.randrange(HOT_URLS)}.example.com/"
+        return f"https://example.com/load/{next(self._urls)}?utm_source=load"
+
+    @staticmethod
+    def _user(user_id):
+        return {'id': user_id, 'is_bot': False, 'first_name': f"user{user_id}"}
+
+    def message(self, user_id, text):
+        message = {
+            'message_id': self.telegram.next_message_id(), 'date': int(time.time()),
+            'chat': {'id': user_id, 'type': 'private'}, 'from': self._user(user_id), 'text': text,
+        }
+        if text.startswith('/'):
+            message['entities'] = [{'type': 'bot_command', 'offset': 0, 'length': len(text.split()[0])}]
+        return self.telegram.make_update(message=message)
+
+    def callback(self, user_id, message, data):
+        return self.telegram.make_update(callback_query={
+            'id': str(self.telegram.next_message_id()), 'from': self._user(user_id),
+            'chat_instance': str(user_id), 'message': message, 'data': data,
+        })
+
+    @staticmethod
+    def buttons(message):
+        markup = (message or {}).get('reply_markup') or {}
+        return [
+            button['callback_data']
+            for row in markup.get('inline_keyboard', [])
+            for button in row
+            if button.get('callback_data') and button['callback_data'] != 'custom_more_info'
+        ]
+
+    async def act(self, kind, update, chat_id=None, inline_id=None):
+        """Kirim update dan tunggu balasan akhir bot; None jika timeout"""
+        future = asyncio.get_running_loop().create_future()
+        waiters, key = (self._inline_waiters, inline_id) if inline_id else (self._waiters, chat_id)
+        waiters[key] = future
+        start = time.perf_counter()
+        await self.deliver(update)
+        self.recorder.sent()
+        try:
+            reply = await asyncio.wait_for(future, self.args.action_timeout)
+        except asyncio.TimeoutError:
+            waiters.pop(key, None)
+            self.recorder.timeouts += 1
+            return None
+        self.recorder.record(kind, time.perf_counter() - start)
+        return reply
+
+    async def press(self, kind, user_id, reply, pick=random.choice):
+        buttons = self.buttons(reply)
+        if buttons:
+            await self.act(kind, self.callback(user_id, reply, pick(buttons)), user_id)
+
+    async def flow_url(self, user_id):
+        reply = await self.act('url', self.message(user_id, self.url()), user_id)
+        await self.press('url_button', user_id, reply)
+
+    async def flow_batch(self, user_id):
+        if await self.act('batch_command', self.message(user_id, '/batch'), user_id) is None:
+            return
+        text = "\n".join(self.url() for _ in range(self.args.batch_size))
+        reply = await self.act('batch_urls', self.message(user_id, text), user_id)
+        await self.press('batch_button', user_id, reply)
+
+    async def flow_custom(self, user_id):
+        alias = f"load_{next(self._aliases)}"
+        reply = await self.act('custom', self.message(user_id, f"/custom {self.url()} {alias}"), user_id)
+        await self.press('custom_button', user_id, reply, pick=lambda buttons: buttons[0])
+
+    async def flow_inline(self, user_id):
+        query_id = str(self.telegram.next_message_id())
+        update = self.telegram.make_update(inline_query={
+            'id': query_id, 'from': self._user(user_id), 'query': self.url(), 'offset': '',
+        })
+        await self.act('inline', update, inline_id=query_id)
+
+    async def user(self, user_id, stop_at):
+        await asyncio.sleep(random.uniform(0, self.args.ramp))
+        flows = [getattr(self, f"flow_{flow}") for flow in self.mix]
+        weights = list(self.mix.values())
+        while time.monotonic() < stop_at:
+            flow = random.choices(flows, weights)[0]
+            await flow(user_id)
+            if self.args.think_time > 0:
+                await asyncio.sleep(random.expovariate(1 / self.args.think_time))
+
+
+async def report(recorder, telegram, args, started, samples):
+    """Cetak update/detik, latency dan memory setiap interval"""
+    print(f"{'t':>6}{'upd/s':>9}{'done/s':>9}{'p50 ms':>9}{'p95 ms':>9}{'p99 ms':>9}"
+          f"{'timeout':>9}{'antri':>7}{'rss MB':>9}{'py MB':>8}")
+    last = time.monotonic()
+    while True:
+        await asyncio.sleep(args.report_interval)
+        now = time.monotonic()
+        window, delivered = recorder.take_window()
+        traced = tracemalloc.get_traced_memory()[0] if tracemalloc.is_tracing() else None
+        sample = (now - started, delivered / (now - last), len(window) / (now - last), rss_bytes(), traced)
+        samples.append(sample)
+        last = now
+        print(
+            f"{sample[0]:>6.0f}{sample[1]:>9.1f}{sample[2]:>9.1f}"
+            f"{percentile(window, 50) * 1000:>9.0f}{percentile(window, 95) * 1000:>9.0f}"
+            f"{percentile(window, 99) * 1000:>9.0f}{recorder.timeouts:>9}{telegram.pending():>7}"
+            f"{format_mb(sample[3]):>9}{format_mb(sample[4]):>8}"
+        )
+
+
+def print_summary(recorder, telegram, provider_server, args, samples, snapshot):
+    print(f"\n{'aksi':<16}{'jumlah':>8}{'mean ms':>10}{'p50 ms':>10}{'p95 ms':>10}{'p99 ms':>10}{'max ms':>10}")
+    for kind, latencies in sorted(recorder.latencies.items()):
+        latencies.sort()
+        print(
+            f"{kind:<16}{len(latencies):>8}{statistics.fmean(latencies) * 1000:>10.1f}"
+            f"{percentile(latencies, 50) * 1000:>10.1f}{percentile(latencies, 95) * 1000:>10.1f}"
+            f"{percentile(latencies, 99) * 1000:>10.1f}{latencies[-1] * 1000:>10.1f}"
+        )
+
+    # Throughput stabil: jendela setelah semua user mulai dan sebelum durasi habis
+    steady = [sample for sample in samples if args.ramp < sample[0] <= args.duration] or samples
+    if steady:
+        print(f"\nupdate/detik stabil: {statistics.fmean(s[1] for s in steady):.1f} dikirim, "
+              f"{statistics.fmean(s[2] for s in steady):.1f} selesai")
+    print(f"total update: {recorder.delivered}, timeout: {recorder.timeouts}")
+    print(f"panggilan Bot API: {dict(telegram.calls)}")
+    print(f"request fake provider: {provider_server.requests}")
+
+    if len(steady) >= 2:
+        first, last = steady[0], steady[-1]
+        minutes = (last[0] - first[0]) / 60
+        for label, index in (('RSS', 3), ('Python', 4)):
+            if first[index] is not None and last[index] is not None:
+                growth = last[index] - first[index]
+                print(f"pertumbuhan memory {label}: {format_mb(first[index])} -> {format_mb(last[index])} MB "
+                      f"({growth / (1024 * 1024) / minutes:+.2f} MB/menit)")
+
+    if snapshot is not None:
+        # Alokasi yang paling bertambah selama test, tanpa alokasi generator bench/
+        ignore = [tracemalloc.Filter(False, tracemalloc.__file__), tracemalloc.Filter(False, '*/bench/*')]
+        current = tracemalloc.take_snapshot().filter_traces(ignore)
+        print("\nalokasi terbesar yang bertambah:")
+        for stat in current.compare_to(snapshot.filter_traces(ignore), 'lineno')[:args.top_allocations]:
+            print(f"  {stat}")
+
+
+async def main(args):
+    # Konfigurasi bot dibaca saat import
+    import bot
+    from telegram import Update
+
+    profile = ProviderProfile(latency=args.latency, jitter=args.jitter, error_rate=args.error_rate)
+    provider_server = await FakeProviderServer(
+        profiles={provider.host: profile for provider in PROVIDERS.values()}
+    ).start()
+    bot.shortener.base_urls = provider_server.base_urls()
+    telegram = await FakeTelegramServer().start()
+
+    recorder = Recorder()
+    driver = LoadDriver(telegram, recorder, args)
+    app = bot.build_application(base_url=telegram.base_url())
+    if args.delivery == 'push':
+        # Seperti webhook: update langsung masuk update_queue tanpa getUpdates
+        async def push(update):
+            await app.update_queue.put(Update.de_json(update, app.bot))
+        driver.deliver = push
+
+    samples = []
+    snapshot = None
+    async with app:
+        await bot.on_startup(app)
+        await app.start()
+        if args.delivery == 'polling':
+            await app.updater.start_polling(poll_interval=0, timeout=5)
+        try:
+            if args.tracemalloc:
+                tracemalloc.start()
+                snapshot = tracemalloc.take_snapshot()
+            started = time.monotonic()
+            reporter = asyncio.create_task(report(recorder, telegram, args, started, samples))
+            stop_at = started + args.duration
+            results = await asyncio.gather(
+                *(driver.user(user_id, stop_at) for user_id in range(1, args.users + 1)), return_exceptions=True
+            )
+            reporter.cancel()
+            errors = [result for result in results if isinstance(result, Exception)]
+            if errors:
+                print(f"{len(errors)} user virtual error, contoh: {errors[0]!r}")
+            print_summary(recorder, telegram, provider_server, args, samples, snapshot)
+        finally:
+            tracemalloc.stop()
+            if app.updater.running:
+                await app.updater.stop()
+            await app.stop()
+            await bot.on_shutdown(app)
+    await telegram.stop()
+    await provider_server.stop()
+
+
+def configure(args):
+    """Env bot untuk load test: semua state di memory, tanpa rate limit provider"""
+    os.environ.setdefault('TELEGRAM_BOT_TOKEN', '0:load')
+    os.environ['CACHE_PATH'] = ''
+    os.environ['STATS_PATH'] = ''
+    os.environ['PAYLOADS_PATH'] = ''
+    os.environ['JOBS_PATH'] = ':memory:'
+    os.environ.pop('STATE_PATH', None)
+    os.environ.pop('LOCAL_SHORTENER_BASE_URL', None)
+    os.environ.setdefault('RATE_LIMITS', '')
+    if args.telegram_rate is not None:
+        os.environ['TELEGRAM_GLOBAL_RATE'] = str(args.telegram_rate)
+    if args.chat_rate is not None:
+        os.environ['TELEGRAM_CHAT_RATE'] = str(args.chat_rate)
+
+
+def parse_args():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument('--users', type=int, default=200)
+    parser.add_argument('--duration', type=float, default=60, help='lama test (detik)')
+    parser.add_argument('--ramp', type=float, default=10, help='user mulai tersebar selama sekian detik')
+    parser.add_argument('--think-time', type=float, default=2, help='rata-rata jeda antar aksi user (detik)')
+    parser.add_argument('--mix', default='url=70,inline=15,custom=10,batch=5')
+    parser.add_argument('--batch-size', type=int, default=10)
+    parser.add_argument('--hot-ratio', type=float, default=0.2, help='porsi URL populer yang dipakai banyak user')
+    parser.add_argument('--delivery', choices=('polling', 'push'), default='polling')
+    parser.add_argument('--action-timeout', type=float, default=60)
+    parser.add_argument('--latency', type=float, default=0.2, help='latency rata-rata fake provider (detik)')
+    parser.add_argument('--jitter', type=float, default=0.1)
+    parser.add_argument('--error-rate', type=float, default=0.0)
+    parser.add_argument('--telegram-rate', type=float, help='TELEGRAM_GLOBAL_RATE (default: konfigurasi bot)')
+    parser.add_argument('--chat-rate', type=float, help='TELEGRAM_CHAT_RATE (default: konfigurasi bot)')
+    parser.add_argument('--report-interval', type=float, default=5)
+    parser.add_argument('--tracemalloc', action='store_true', help='ukur memory Python (lebih lambat)')
+    parser.add_argument('--top-allocations', type=int, default=10)
+    return parser.parse_args()
+
+
+if __name__ == '__main__':
+    arguments = parse_args()
+    configure(arguments)
+    asyncio.run(main(arguments))
@@ -1,111 +1,255 @@
 import os
-import requests
-from telegram import Update, InlineKeyboardButton, InlineKeyboardMarkup
-from telegram.ext import Application, CommandHandler, MessageHandler, filters, ContextTypes, CallbackQueryHandler
+from telegram import Update, InlineKeyboardButton, InlineKeyboardMarkup, InlineQueryResultArticle, InputTextMessageContent
+from telegram.ext import Application, CommandHandler, MessageHandler, filters, ContextTypes, CallbackQueryHandler, InlineQueryHandler
 from dotenv import load_dotenv
 import re
 import time
+import hashlib
+import asyncio
+import tempfile
+from shortener import URLShortener, AUTO_PROVIDER
+from providers import PROVIDERS, ALIAS_PROVIDERS, register
+from local_shortener import LinkStore, LocalProvider, RedirectServer
+import canonical
+from canonical import canonicalize
+from cache import ResultCache
+from health import HealthTracker
+from scheduler import ProviderScheduler, parse_limits
+from timeouts import AdaptiveTimeouts, RetryBudget
+from aliases import AliasProber
+from jobs import JobQueue, WorkerPool
+from speculation import Speculator
+from state import StateStore
+from payloads import PayloadStore
+import bulk
+from stats import BotStats
+import metrics
+import outbound
 
 # Load token dari bot.env
 load_dotenv('bot.env')
 
 TOKEN = os.getenv('TELEGRAM_BOT_TOKEN')
 
-class URLShortener:
-    def shorten_url(self, long_url, provider, custom_alias=None):
-        """Shorten URL dengan provider tertentu dan custom alias"""
-        try:
-            if provider == 'click_ru':
-                response = requests.get(f"https://clck.ru/--?url={long_url}", timeout=10)
-                if response.status_code == 200 and response.text.strip():
-                    return response.text.strip()
-                return None
-            
-            elif provider == 'da_gd':
-                response = requests.get(f"https://da.gd/s?url={long_url}", timeout=10)
-                return response.text.strip() if response.status_code == 200 else None
-            
-            elif provider == 'osdb_link':
-                response = requests.post("https://osdb.link/", 
-                                       data={"url": long_url},
-                                       headers={'Content-Type': 'application/x-www-form-urlencoded'},
-                                       timeout=10)
-                
-                if response.status_code == 200:
-                    html_content = response.text
-                    label_match = re.search(r'<label id=surl>.*?(http://osdb\.link/\w+)', html_content)
-                    if label_match:
-                        return label_match.group(1)
-                    url_match = re.search(r'http://osdb\.link/[\w]+', html_content)
-                    if url_match:
-                        return url_match.group(0)
-                return None
-            
-            elif provider == 'is_gd':
-                if custom_alias:
-                    # Gunakan format JSON untuk custom alias
-                    url = f"https://is.gd/create.php?format=json&url={long_url}&shorturl={custom_alias}"
-                    response = requests.get(url, timeout=10)
-                    
-                    if response.status_code == 200:
-                        data = response.json()
-                        if 'shorturl' in data:
-                            return data['shorturl']
-                        elif 'errorcode' in data:
-                            return f"ERROR:{data['errorcode']}:{data['errormessage']}"
-                    return None
-                else:
-                    response = requests.get(f"https://is.gd/create.php?format=simple&url={long_url}", timeout=10)
-                    return response.text.strip() if response.status_code == 200 else None
-            
-            elif provider == 'v_gd':
-                if custom_alias:
-                    # Gunakan format JSON untuk custom alias
-                    url = f"https://v.gd/create.php?format=json&url={long_url}&shorturl={custom_alias}"
-                    response = requests.get(url, timeout=10)
-                    
-                    if response.status_code == 200:
-                        data = response.json()
-                        if 'shorturl' in data:
-                            return data['shorturl']
-                        elif 'errorcode' in data:
-                            return f"ERROR:{data['errorcode']}:{data['errormessage']}"
-                    return None
-                else:
-                    response = requests.get(f"https://v.gd/create.php?format=simple&url={long_url}", timeout=10)
-                    return response.text.strip() if response.status_code == 200 else None
-            
-            elif provider == 'tinyurl':
-                response = requests.get(f"https://tinyurl.com/api-create.php?url={long_url}", timeout=10)
-                if response.status_code == 200 and response.text.strip():
-                    short_url = response.text.strip()
-                    return short_url if short_url.startswith('http') else f"https://{short_url}"
-                return None
-            
-        except Exception as e:
-            print(f"Error dengan {provider}: {e}")
-            return None
-        
-        return None
+# Sharding (lihat sharding.py): jumlah proses worker dan nomor worker ini.
+# File per proses (job, statistik) diberi akhiran nomor shard.
+SHARDS = int(os.getenv('SHARDS', '1'))
+SHARD_INDEX = int(os.getenv('SHARD_INDEX', '0'))
+
+def shard_path(path, index=SHARD_INDEX):
+    """Path file khusus satu shard: stats.json -> stats.2.json"""
+    if SHARDS <= 1 or not path:
+        return path
+    base, ext = os.path.splitext(path)
+    return f"{base}.{index}{ext}"
+
+# Mode server: polling (default, untuk lokal) atau webhook
+BOT_MODE = os.getenv('BOT_MODE', 'polling').lower()
+WEBHOOK_URL = os.getenv('WEBHOOK_URL')  # URL publik, contoh: https://bot.example.com
+WEBHOOK_LISTEN = os.getenv('WEBHOOK_LISTEN', '0.0.0.0')
+WEBHOOK_PORT = int(os.getenv('WEBHOOK_PORT', '8443'))
+WEBHOOK_PATH = os.getenv('WEBHOOK_PATH', 'telegram').strip('/')
+WEBHOOK_SECRET = os.getenv('WEBHOOK_SECRET')
+WEBHOOK_MAX_CONNECTIONS = int(os.getenv('WEBHOOK_MAX_CONNECTIONS', '40'))
+
+# Jumlah update yang diproses paralel (1 = berurutan)
+CONCURRENT_UPDATES = int(os.getenv('CONCURRENT_UPDATES', '16'))
+
+# Batas batch dan paralelisme per provider
+MAX_BATCH_URLS = int(os.getenv('MAX_BATCH_URLS', '200'))
+BATCH_CONCURRENCY = int(os.getenv('BATCH_CONCURRENCY', '8'))
+BATCH_EDIT_INTERVAL = float(os.getenv('BATCH_EDIT_INTERVAL', '2'))
+
+# Import dokumen .txt/.csv: batas jumlah URL, ukuran file (Bot API maks 20 MB),
+# request paralel, dan jeda update progress
+MAX_BULK_URLS = int(os.getenv('MAX_BULK_URLS', '10000'))
+MAX_BULK_FILE_SIZE = int(os.getenv('MAX_BULK_FILE_SIZE', str(20 * 1024 * 1024)))
+BULK_CONCURRENCY = int(os.getenv('BULK_CONCURRENCY', '16'))
+BULK_PROGRESS_INTERVAL = float(os.getenv('BULK_PROGRESS_INTERVAL', '5'))
+
+# Inline mode (@bot <url>): provider yang dipakai (kosong = semua), jeda sebelum
+# request ke provider (query yang disusul ketikan berikutnya dibuang), batas waktu
+# menunggu provider, dan cache_time hasil lengkap/sebagian di sisi Telegram
+INLINE_PROVIDERS = [p.strip() for p in os.getenv('INLINE_PROVIDERS', '').split(',') if p.strip()]
+INLINE_DEBOUNCE = float(os.getenv('INLINE_DEBOUNCE', '0.4'))
+INLINE_DEADLINE = float(os.getenv('INLINE_DEADLINE', '3'))
+INLINE_CACHE_TIME = int(os.getenv('INLINE_CACHE_TIME', '300'))
+INLINE_PARTIAL_CACHE_TIME = int(os.getenv('INLINE_PARTIAL_CACHE_TIME', '5'))
+
+# Limit pesan keluar ke Telegram: global (dibagi rata antar shard), per chat
+# pribadi, per grup; jeda sebelum pesan ⏳ dikirim (dilewati jika hasil lebih cepat)
+TELEGRAM_GLOBAL_RATE = float(os.getenv('TELEGRAM_GLOBAL_RATE', '30'))
+TELEGRAM_CHAT_RATE = float(os.getenv('TELEGRAM_CHAT_RATE', '1'))
+TELEGRAM_GROUP_RATE = float(os.getenv('TELEGRAM_GROUP_RATE', str(20 / 60)))
+TELEGRAM_CHAT_BURST = int(os.getenv('TELEGRAM_CHAT_BURST', '3'))
+TELEGRAM_MAX_RETRIES = int(os.getenv('TELEGRAM_MAX_RETRIES', '3'))
+INTERIM_DELAY = float(os.getenv('INTERIM_DELAY', '0.5'))
+
+# Batas panjang pesan Telegram
+MESSAGE_LIMIT = 4096
+
+# Cache hasil shortening (LRU + SQLite): ukuran LRU, maksimal entry di disk
+# (0 = 10x CACHE_SIZE) dan umur entry
+CACHE_PATH = os.getenv('CACHE_PATH', 'cache.db')
+CACHE_SIZE = int(os.getenv('CACHE_SIZE', '10000'))
+CACHE_DISK_SIZE = int(os.getenv('CACHE_DISK_SIZE', '0'))
+CACHE_TTL = int(os.getenv('CACHE_TTL', str(7 * 86400)))
+
+# Circuit breaker: buka setelah N kegagalan berturut-turut, coba lagi setelah reset
+CIRCUIT_FAILURES = int(os.getenv('CIRCUIT_FAILURES', '5'))
+CIRCUIT_RESET = float(os.getenv('CIRCUIT_RESET', '60'))
+
+# Hedging untuk Auto: maksimal request paralel (1 = tanpa hedging) dan jeda
+# sebelum request cadangan (kosong = pakai persentil latency provider)
+HEDGE_MAX = int(os.getenv('HEDGE_MAX', '2'))
+HEDGE_DELAY = float(os.getenv('HEDGE_DELAY')) if os.getenv('HEDGE_DELAY') else None
+HEDGE_PERCENTILE = int(os.getenv('HEDGE_PERCENTILE', '90'))
+
+# Timeout request provider dari persentil latency x pengali, dibatasi floor dan
+# ceiling (read dan connect); ceiling dipakai selama data latency belum cukup
+PROVIDER_TIMEOUT_MIN = float(os.getenv('PROVIDER_TIMEOUT_MIN', '2'))
+PROVIDER_TIMEOUT_MAX = float(os.getenv('PROVIDER_TIMEOUT_MAX', '10'))
+PROVIDER_CONNECT_TIMEOUT_MIN = float(os.getenv('PROVIDER_CONNECT_TIMEOUT_MIN', '1'))
+PROVIDER_CONNECT_TIMEOUT_MAX = float(os.getenv('PROVIDER_CONNECT_TIMEOUT_MAX', '5'))
+TIMEOUT_PERCENTILE = int(os.getenv('TIMEOUT_PERCENTILE', '99'))
+TIMEOUT_MULTIPLIER = float(os.getenv('TIMEOUT_MULTIPLIER', '2'))
+
+# Retry error sementara provider: maksimal per request, budget global (retry per
+# request + retry minimum per detik, maksimal tersimpan) dan jeda backoff awal.
+# Total waktu satu request termasuk retry dibatasi PROVIDER_TIMEOUT_MAX.
+PROVIDER_MAX_RETRIES = int(os.getenv('PROVIDER_MAX_RETRIES', '2'))
+RETRY_BUDGET_RATIO = float(os.getenv('RETRY_BUDGET_RATIO', '0.1'))
+RETRY_BUDGET_MIN_RATE = float(os.getenv('RETRY_BUDGET_MIN_RATE', '1'))
+RETRY_BUDGET_BURST = int(os.getenv('RETRY_BUDGET_BURST', '10'))
+RETRY_BACKOFF = float(os.getenv('RETRY_BACKOFF', '0.2'))
+
+# Parameter tracking yang dibuang dari URL (koma, akhiran * = prefix)
+TRACKING_PARAMS = os.getenv('TRACKING_PARAMS')
+if TRACKING_PARAMS is not None:
+    canonical.configure(TRACKING_PARAMS.split(','))
+
+# Rate limit per provider: provider=request_per_menit:burst,
+# total untuk semua shard (dibagi rata antar shard)
+RATE_LIMITS = os.getenv('RATE_LIMITS', 'is_gd=60:5,v_gd=60:5,click_ru=120:10')
+
+# Shortener bawaan: aktif jika base URL publik redirect server diisi
+LOCAL_SHORTENER_BASE_URL = os.getenv('LOCAL_SHORTENER_BASE_URL')  # contoh: https://s.example.com
+LOCAL_SHORTENER_HOST = os.getenv('LOCAL_SHORTENER_HOST', '0.0.0.0')
+LOCAL_SHORTENER_PORT = int(os.getenv('LOCAL_SHORTENER_PORT', '8080'))
+LOCAL_SHORTENER_DB = os.getenv('LOCAL_SHORTENER_DB', 'links.db')
+# Batas waktu client redirect server mengirim request (detik)
+LOCAL_SHORTENER_TIMEOUT = float(os.getenv('LOCAL_SHORTENER_TIMEOUT', '10'))
+
+local_links = LinkStore(LOCAL_SHORTENER_DB, SHARD_INDEX, SHARDS) if LOCAL_SHORTENER_BASE_URL else None
+if local_links is not None:
+    register(LocalProvider(local_links, LOCAL_SHORTENER_BASE_URL))
 
 # Initialize shortener
-shortener = URLShortener()
-
-# Dictionary untuk simpan URL sementara
-user_urls = {}
-user_custom_data = {}  # Untuk simpan data custom alias
-user_batch_urls = {}   # Untuk simpan batch URLs
-
-# Statistics
-bot_stats = {
-    'start_time': time.time(),
-    'urls_shortened': 0,
-    'users_served': set()
-}
+result_cache = ResultCache(CACHE_PATH, max_entries=CACHE_SIZE, ttl=CACHE_TTL, max_disk_entries=CACHE_DISK_SIZE)
+provider_health = HealthTracker(failure_threshold=CIRCUIT_FAILURES, reset_timeout=CIRCUIT_RESET)
+provider_scheduler = ProviderScheduler({
+    provider: (per_minute / SHARDS, max(1, burst / SHARDS))
+    for provider, (per_minute, burst) in parse_limits(RATE_LIMITS).items()
+})
+provider_timeouts = AdaptiveTimeouts(
+    provider_health, floor=PROVIDER_TIMEOUT_MIN, ceiling=PROVIDER_TIMEOUT_MAX,
+    connect_floor=PROVIDER_CONNECT_TIMEOUT_MIN, connect_ceiling=PROVIDER_CONNECT_TIMEOUT_MAX,
+    percentile=TIMEOUT_PERCENTILE, multiplier=TIMEOUT_MULTIPLIER
+)
+retry_budget = RetryBudget(RETRY_BUDGET_RATIO, RETRY_BUDGET_MIN_RATE, RETRY_BUDGET_BURST, RETRY_BACKOFF)
+shortener = URLShortener(timeout=PROVIDER_TIMEOUT_MAX, provider_concurrency=BATCH_CONCURRENCY, cache=result_cache,
+                         health=provider_health, hedge_percentile=HEDGE_PERCENTILE, scheduler=provider_scheduler,
+                         timeouts=provider_timeouts, retry_budget=retry_budget, max_retries=PROVIDER_MAX_RETRIES)
+
+# Cek ketersediaan alias /custom: umur cache alias yang sudah dipakai dan timeout cek
+ALIAS_TAKEN_TTL = int(os.getenv('ALIAS_TAKEN_TTL', '86400'))
+ALIAS_PROBE_TIMEOUT = float(os.getenv('ALIAS_PROBE_TIMEOUT', '3'))
+alias_prober = AliasProber(shortener, taken_ttl=ALIAS_TAKEN_TTL, timeout=ALIAS_PROBE_TIMEOUT)
+
+# Nama provider untuk display, dibuat dari registry
+PROVIDER_NAMES = {key: provider.name for key, provider in PROVIDERS.items()}
+PROVIDER_NAMES[AUTO_PROVIDER] = '⚡ Auto'
+
+# State per user, terbatas jumlah dan umurnya (STATE_PATH = simpan ke SQLite)
+# (default SQLite jika sharding supaya state dibagi lewat file yang sama)
+STATE_PATH = os.getenv('STATE_PATH', 'state.db' if SHARDS > 1 else '') or None
+STATE_MAX_USERS = int(os.getenv('STATE_MAX_USERS', '10000'))
+STATE_TTL = int(os.getenv('STATE_TTL', '3600'))
+
+# User yang sedang diminta mengirim URL untuk /batch
+batch_waiting = StateStore('batch', STATE_MAX_USERS, STATE_TTL, STATE_PATH)
+# Inline query terbaru per user, untuk debounce
+inline_latest = StateStore('inline', STATE_MAX_USERS, 60)
+
+# Data tombol inline (URL, daftar URL, alias) ikut di callback_data dan
+# ditandatangani HMAC; yang tidak muat 64 byte disimpan di PAYLOADS_PATH
+# (dipakai bersama semua shard) selama PAYLOAD_TTL
+CALLBACK_SECRET = os.getenv('CALLBACK_SECRET') or hashlib.sha256(f"callback:{TOKEN}".encode()).hexdigest()
+PAYLOADS_PATH = os.getenv('PAYLOADS_PATH', 'payloads.db')
+PAYLOAD_TTL = int(os.getenv('PAYLOAD_TTL', str(30 * 86400)))
+payloads = PayloadStore(CALLBACK_SECRET, PAYLOADS_PATH, PAYLOAD_TTL)
+
+# Antrian job shortening persisten (JOB_WORKERS=0 = proses langsung di handler)
+JOBS_PATH = shard_path(os.getenv('JOBS_PATH', 'jobs.db'))
+JOB_WORKERS = int(os.getenv('JOB_WORKERS', '8'))
+JOB_QUEUE_LIMIT = int(os.getenv('JOB_QUEUE_LIMIT', '1000'))
+# Maksimal job bulk dan batch berjalan bersamaan, sisa worker tetap melayani tombol biasa
+BULK_JOB_WORKERS = int(os.getenv('BULK_JOB_WORKERS', str(max(1, JOB_WORKERS // 4))))
+BATCH_JOB_WORKERS = int(os.getenv('BATCH_JOB_WORKERS', str(max(1, JOB_WORKERS // 2))))
+
+job_queue = JobQueue(JOBS_PATH, max_pending=JOB_QUEUE_LIMIT) if JOB_WORKERS > 0 else None
+
+# Shorten spekulatif di handle_url: maksimal task berjalan (0 = nonaktif)
+SPECULATE_MAX = int(os.getenv('SPECULATE_MAX', '32'))
+speculator = Speculator(SPECULATE_MAX, STATE_MAX_USERS, path=STATE_PATH)
+
+# Statistics, disimpan berkala ke disk
+STATS_PATH = shard_path(os.getenv('STATS_PATH', 'stats.json'))
+# File statistik shard lain, digabung di /stats
+STATS_SHARD_PATHS = [shard_path(os.getenv('STATS_PATH', 'stats.json'), i) for i in range(SHARDS) if i != SHARD_INDEX]
+STATS_FLUSH_INTERVAL = int(os.getenv('STATS_FLUSH_INTERVAL', '60'))
+
+bot_stats = BotStats(STATS_PATH)
+
+outbound_limiter = outbound.OutboundLimiter(
+    global_rate=TELEGRAM_GLOBAL_RATE / SHARDS, chat_rate=TELEGRAM_CHAT_RATE, group_rate=TELEGRAM_GROUP_RATE,
+    chat_burst=TELEGRAM_CHAT_BURST, interim_delay=INTERIM_DELAY, max_retries=TELEGRAM_MAX_RETRIES
+)
+# Task fire-and-forget (misal edit ⏳), disimpan supaya tidak di-garbage collect
+background_tasks = set()
+shortener.listeners.append(bot_stats.record_provider)
+
+# Endpoint metrics Prometheus (kosongkan METRICS_PORT untuk menonaktifkan)
+METRICS_HOST = os.getenv('METRICS_HOST', '127.0.0.1')
+METRICS_PORT = int(os.getenv('METRICS_PORT') or 0)
+if METRICS_PORT and SHARDS > 1:
+    METRICS_PORT += SHARD_INDEX  # Satu port per shard
+
+shortener.listeners.append(metrics.observe_provider)
+metrics.cache_lookups.set_function('hit', function=lambda: result_cache.hits)
+metrics.cache_lookups.set_function('miss', function=lambda: result_cache.misses)
+metrics.coalesced_requests.set_function(function=lambda: shortener.coalesced)
+for outcome in ('started', 'hits', 'misses'):
+    metrics.speculative_requests.set_function(outcome, function=lambda outcome=outcome: getattr(speculator, outcome))
+for outcome in ('sent', 'merged', 'skipped', 'retried'):
+    metrics.telegram_outbound.set_function(outcome, function=lambda outcome=outcome: getattr(outbound_limiter, outcome))
+metrics.state_size.set_function(batch_waiting.name, function=batch_waiting.__len__)
+if job_queue is not None:
+    metrics.job_queue_depth.set_function(function=job_queue.__len__)
+metrics.retry_budget_denied.set_function(function=lambda: retry_budget.denied)
+for provider in PROVIDERS:
+    metrics.provider_retries.set_function(provider, function=lambda provider=provider: shortener.retries[provider])
+    metrics.provider_timeouts.set_function(provider, function=lambda provider=provider: shortener.timed_out[provider])
+    for index, phase in enumerate(('connect', 'read')):
+        metrics.provider_timeout_seconds.set_function(
+            provider, phase, function=lambda provider=provider, index=index: provider_timeouts.current.get(provider, (0, 0))[index]
+        )
+for provider in provider_scheduler.providers():
+    metrics.queue_depth.set_function(provider, function=lambda provider=provider: provider_scheduler.queue_depth(provider))
 
 async def start(update: Update, context: ContextTypes.DEFAULT_TYPE):
     user_id = update.message.from_user.id
-    bot_stats['users_served'].add(user_id)
+    bot_stats.record_user(user_id)
     
     await update.message.reply_text(
         "🤖 URL Shortener Bot\n\n"
@@ -115,12 +259,13 @@ async def start(update: Update, context: ContextTypes.DEFAULT_TYPE):
         "• http://website.com\n\n"
         "🎯 Fitur:\n"
         "• /custom - Custom alias\n"
-        "• /batch - Shorten 5 URL sekaligus\n\n"
+        f"• /batch - Shorten hingga {MAX_BATCH_URLS} URL sekaligus\n"
+        f"• Kirim file .txt/.csv - Import hingga {MAX_BULK_URLS} URL\n\n"
         "📋 Gunakan /help untuk melihat semua command"
     )
 
 async def help_command(update: Update, context: ContextTypes.DEFAULT_TYPE):
-    help_text = """
+    help_text = f"""
 📚 Daftar Command Bot
 
 🔹 /start - Memulai bot dan menampilkan pesan selamat datang
@@ -130,7 +275,7 @@ async def help_command(update: Update, context: ContextTypes.DEFAULT_TYPE):
 🔹 /about - Tentang bot ini dan developer
 🔹 /ping - Cek status dan respon time bot
 🔹 /custom - Buat shortlink dengan custom alias
-🔹 /batch - Shorten 5 URL sekaligus
+🔹 /batch - Shorten hingga {MAX_BATCH_URLS} URL sekaligus
 
 💡 Cara Penggunaan:
 1. Kirim URL langsung ke bot
@@ -149,65 +294,107 @@ async def help_command(update: Update, context: ContextTypes.DEFAULT_TYPE):
 • /custom https://github.com rirozo_github
 
 📦 Batch URLs:
-• /batch lalu kirim 5 URL (dipisah newline)
+• /batch lalu kirim hingga {MAX_BATCH_URLS} URL (dipisah newline)
+
+⚡ Inline Mode:
+• Ketik @username_bot <url> di chat mana saja, pilih hasil dari provider
+
+📄 Import File:
+• Kirim file .txt/.csv (hingga {MAX_BULK_URLS} URL), hasil dikirim balik sebagai CSV
 """
     await update.message.reply_text(help_text)
 
+def global_stats():
+    """Statistik proses ini, digabung dengan file statistik shard lain jika sharding"""
+    if not STATS_SHARD_PATHS:
+        return bot_stats
+    stats = BotStats()
+    stats.merge(bot_stats)
+    for path in STATS_SHARD_PATHS:
+        if os.path.exists(path):
+            stats.merge(BotStats(path))
+    return stats
+
 async def stats_command(update: Update, context: ContextTypes.DEFAULT_TYPE):
-    uptime_seconds = time.time() - bot_stats['start_time']
+    stats = global_stats()
+    uptime_seconds = time.time() - stats.start_time
     uptime_str = format_uptime(uptime_seconds)
     
+    # Provider diurutkan dari yang paling banyak dipakai
+    provider_lines = []
+    for provider, provider_stats in sorted(stats.providers.items(), key=lambda item: item[1].requests, reverse=True):
+        p50, p95, p99 = (format_latency(provider_stats.latency.percentile(q)) for q in (50, 95, 99))
+        provider_lines.append(
+            f"• {PROVIDER_NAMES.get(provider, provider)}: {provider_stats.requests} req, "
+            f"{provider_stats.success_rate():.0%} sukses\n"
+            f"  ⏱ p50 {p50} / p95 {p95} / p99 {p99}{timeout_note(provider)}"
+        )
+    provider_text = "\n".join(provider_lines) or "• Belum ada data"
+    
+    queue_text = ", ".join(
+        f"{PROVIDER_NAMES.get(provider, provider)} {provider_scheduler.queue_depth(provider)} "
+        f"(~{provider_scheduler.expected_wait(provider):.0f}s)"
+        for provider in provider_scheduler.providers()
+        if provider_scheduler.queue_depth(provider)
+    ) or "kosong"
+    # Angka di bawah ini milik proses ini saja, bukan gabungan semua shard
+    shard_header = f"\n⚙️ Shard {SHARD_INDEX + 1}/{SHARDS} (hanya shard ini):\n" if SHARDS > 1 else ""
+    
     stats_text = f"""
 📊 Statistik Bot
 
-👥 Total Pengguna: {len(bot_stats['users_served'])}
-🔗 URL Dipendekkan: {bot_stats['urls_shortened']}
+👥 Total Pengguna: ~{stats.users_served()}
+🔗 URL Dipendekkan: {stats.urls_shortened}
 ⏰ Uptime: {uptime_str}
-🔄 Provider Tersedia: 6
+🔄 Provider Tersedia: {len(PROVIDERS)}
 🎯 Fitur Custom: Tersedia
-📦 Fitur Batch: Tersedia (5 URLs)
+📦 Fitur Batch: Tersedia ({MAX_BATCH_URLS} URLs)
+{shard_header}🚦 Antrian: {queue_text}
+💾 Cache: {result_cache.hits} hit / {result_cache.misses} miss ({result_cache.hit_rate():.0%})
+🔀 Request Digabung: {shortener.coalesced}
+🔁 Retry Provider: {sum(shortener.retries.values())} ({retry_budget.denied} ditolak budget), ⌛ {sum(shortener.timed_out.values())} timeout
+🔮 Spekulatif: {speculator.hits}/{speculator.started} tepat ({speculator.hit_rate():.0%})
+📨 Telegram: {outbound_limiter.sent} terkirim, {outbound_limiter.merged} edit digabung, {outbound_limiter.skipped} ⏳ dilewati
+🧵 Job Antri: {len(job_queue) if job_queue is not None else 0}
 
 📈 Provider Paling Populer:
-• clck.ru - Cepat & Andal
-• tinyurl.com - Legacy & Terpercaya
-• is.gd - Simple & Clean (Support Custom Alias)
+{provider_text}
 """
     await update.message.reply_text(stats_text)
 
 async def providers_command(update: Update, context: ContextTypes.DEFAULT_TYPE):
-    providers_text = """
+    alias_lines = "\n".join(f"🔹 ({PROVIDERS[key].name}) - {PROVIDERS[key].description}" for key in ALIAS_PROVIDERS)
+    all_lines = "\n".join(f"🔹 ({provider.name}) - {provider.description}" for provider in PROVIDERS.values())
+    alias_names = " atau ".join(PROVIDERS[key].name for key in ALIAS_PROVIDERS)
+    
+    providers_text = f"""
 🛠 Daftar Provider URL Shortener
 
 ✅ Support Custom Alias:
-🔹 (is.gd) - Minimalis, tanpa iklan dan analytics
-🔹 (v.gd) - Versi custom dari is.gd
+{alias_lines}
 
 🔹 Semua Provider:
-🔹 (clck.ru) - Provider Rusia, cepat dan andal
-🔹 (da.gd) - Simple dan clean, tanpa tracking
-🔹 (osdb.link) - Open Source database link shortener  
-🔹 (is.gd) - Minimalis, tanpa iklan & analytics
-🔹 (v.gd) - Versi custom dari is.gd
-🔹 (tinyurl.com) - Legacy, terpercaya sejak 2002
-
-⭐ Custom Alias: Gunakan is.gd atau v.gd
+{all_lines}
+
+⚡ Auto: Pilih provider tercepat yang sedang sehat
+⭐ Custom Alias: Gunakan {alias_names}
 🎯 Format Alias: huruf, angka, underscore (_)
 📦 Batch: Support semua provider
 """
     await update.message.reply_text(providers_text)
 
 async def about_command(update: Update, context: ContextTypes.DEFAULT_TYPE):
-    about_text = """
+    about_text = f"""
 🤖 Tentang URL Shortener Bot
 
 📝 Deskripsi:
 Bot Telegram untuk memendekkan URL dengan berbagai provider gratis. 
-Mendukung 6 provider terbaik dengan hasil instan.
+Mendukung {len(PROVIDERS)} provider terbaik dengan hasil instan.
 
 ⚡ Fitur:
-• 6 Provider URL Shortener
+• {len(PROVIDERS)} Provider URL Shortener
 • Custom Alias Support
-• Batch URL Shortening (5 URLs)
+• Batch URL Shortening ({MAX_BATCH_URLS} URLs)
 • Pilihan Provider untuk Custom Link
 • Proses Cepat & Real-time
 • Interface User-friendly  
@@ -231,7 +418,7 @@ async def batch_command(update: Update, context: ContextTypes.DEFAULT_TYPE):
     """Handle batch URL shortening command"""
     await update.message.reply_text(
         "📦 Batch URL Shortening\n\n"
-        "Kirim 5 URL yang ingin dipendekkan (maksimal 5 URL):\n"
+        f"Kirim URL yang ingin dipendekkan (maksimal {MAX_BATCH_URLS} URL):\n"
         "• Pisahkan dengan newline/enter\n"
         "• Boleh dengan atau tanpa http/https\n\n"
         "📝 Contoh:\n"
@@ -245,26 +432,25 @@ async def batch_command(update: Update, context: ContextTypes.DEFAULT_TYPE):
     
     # Set state untuk menunggu batch URLs
     user_id = update.message.from_user.id
-    user_batch_urls[user_id] = {'waiting_for_batch': True}
+    batch_waiting[user_id] = True
 
 async def handle_batch_urls(update: Update, context: ContextTypes.DEFAULT_TYPE):
     """Handle batch URLs input dari user"""
     user_id = update.message.from_user.id
     
-    # Cek apakah user dalam mode batch
-    if user_id not in user_batch_urls or not user_batch_urls[user_id].get('waiting_for_batch'):
+    # Cek apakah user dalam mode batch; URL hanya ditunggu sekali
+    if not batch_waiting.pop(user_id):
         return
     
     text = update.message.text.strip()
     urls = [url.strip() for url in text.split('\n') if url.strip()]
     
     # Validasi jumlah URL
-    if len(urls) > 5:
+    if len(urls) > MAX_BATCH_URLS:
         await update.message.reply_text(
-            "❌ Terlalu banyak URL. Maksimal 5 URL.\n"
-            "Silakan gunakan /batch lagi dan kirim maksimal 5 URL."
+            f"❌ Terlalu banyak URL. Maksimal {MAX_BATCH_URLS} URL.\n"
+            f"Silakan gunakan /batch lagi dan kirim maksimal {MAX_BATCH_URLS} URL."
         )
-        del user_batch_urls[user_id]
         return
     
     if len(urls) < 1:
@@ -272,7 +458,6 @@ async def handle_batch_urls(update: Update, context: ContextTypes.DEFAULT_TYPE):
             "❌ Tidak ada URL yang valid.\n"
             "Silakan gunakan /batch lagi dan kirim URL yang valid."
         )
-        del user_batch_urls[user_id]
         return
     
     # Validasi dan proses URLs
@@ -280,53 +465,30 @@ async def handle_batch_urls(update: Update, context: ContextTypes.DEFAULT_TYPE):
     invalid_urls = []
     
     for url in urls:
-        # Validasi URL dasar
-        if not any(proto in url for proto in ['http://', 'https://', '.', ':']):
+        # Validasi dan normalisasi URL (auto tambah https, buang tracking param)
+        canonical_url = canonicalize(url)
+        if not canonical_url:
             invalid_urls.append(url)
             continue
         
-        # Auto tambah https jika perlu
-        if not url.startswith(('http://', 'https://')):
-            url = 'https://' + url
-        
-        valid_urls.append(url)
+        valid_urls.append(canonical_url)
     
     if invalid_urls:
         await update.message.reply_text(
             f"❌ {len(invalid_urls)} URL tidak valid:\n" +
-            "\n".join(f"• {url}" for url in invalid_urls) +
+            format_url_list(invalid_urls) +
             "\n\nHanya URL valid yang akan diproses."
         )
     
     if not valid_urls:
         await update.message.reply_text("❌ Tidak ada URL yang valid untuk diproses.")
-        del user_batch_urls[user_id]
         return
     
-    # Simpan batch URLs dan tampilkan pilihan provider
-    user_batch_urls[user_id] = {
-        'urls': valid_urls[:5],  # Maksimal 5 URL
-        'waiting_for_batch': False
-    }
-    
-    # Buat keyboard pilihan provider untuk batch
-    keyboard = [
-        [
-            InlineKeyboardButton("🔗 clck.ru", callback_data="batch_click_ru"),
-            InlineKeyboardButton("🔗 da.gd", callback_data="batch_da_gd")
-        ],
-        [
-            InlineKeyboardButton("🔗 osdb.link", callback_data="batch_osdb_link"),
-            InlineKeyboardButton("🔗 is.gd", callback_data="batch_is_gd")
-        ],
-        [
-            InlineKeyboardButton("🔗 v.gd", callback_data="batch_v_gd"),
-            InlineKeyboardButton("🔗 tinyurl.com", callback_data="batch_tinyurl")
-        ]
-    ]
+    # Buat keyboard pilihan provider untuk batch, daftar URL ikut di tombol
+    keyboard = provider_keyboard('batch_', "\n".join(valid_urls[:MAX_BATCH_URLS]))
     reply_markup = InlineKeyboardMarkup(keyboard)
     
-    url_list = "\n".join([f"• {url}" for url in valid_urls[:5]])
+    url_list = format_url_list(valid_urls)
     
     await update.message.reply_text(
         f"📦 Batch URLs ({len(valid_urls)} URL):\n{url_list}\n\n"
@@ -338,45 +500,53 @@ async def handle_batch_callback(update: Update, context: ContextTypes.DEFAULT_TY
     """Handle callback untuk batch URL shortening"""
     query = update.callback_query
     user_id = query.from_user.id
-    callback_data = query.data
     
-    # Dapatkan batch data user
-    batch_data = user_batch_urls.get(user_id)
+    # Daftar URL dari tombol, ikut disimpan di job
+    provider, value = payloads.unpack(query.data, 'batch_')
     
-    if not batch_data or 'urls' not in batch_data:
+    if not value or provider not in PROVIDER_NAMES:
         await query.edit_message_text("❌ Data batch tidak ditemukan. Gunakan /batch lagi.")
         return
     
-    urls = batch_data['urls']
-    provider = callback_data.replace('batch_', '')  # Hapus prefix 'batch_'
+    urls = value.split('\n')
+    provider_name = PROVIDER_NAMES.get(provider, provider)
     
-    # Provider names untuk display
-    provider_names = {
-        'click_ru': 'clck.ru',
-        'da_gd': 'da.gd',
-        'osdb_link': 'osdb.link',
-        'is_gd': 'is.gd',
-        'v_gd': 'v.gd',
-        'tinyurl': 'tinyurl.com'
-    }
-    
-    provider_name = provider_names.get(provider, provider)
-    
-    await query.edit_message_text(f"⏳ Memendekkan {len(urls)} URL dengan {provider_name}...")
-    
-    # Process semua URLs
-    results = []
+    progress_text = f"⏳ Memendekkan {len(urls)} URL dengan {provider_name}...{queue_note(provider, user_id)}"
+    edit_interim(context.bot, query, progress_text)
+    await submit_job(context.bot, 'batch', job_payload(query, urls=list(urls), provider=provider))
+
+async def run_batch_job(bot, job):
+    """Job batch: shorten semua URL, update progress, kirim hasil sesuai urutan input"""
+    urls = job['urls']
+    provider = job['provider']
+    provider_name = PROVIDER_NAMES.get(provider, provider)
+    
+    # Process semua URLs secara paralel, hasil disimpan sesuai urutan input
+    # (setelah restart, URL yang sudah selesai langsung diambil dari cache)
+    results = [None] * len(urls)
+    done_count = 0
     successful_count = 0
+    last_edit = time.monotonic()
     
-    for i, url in enumerate(urls, 1):
-        short_url = shortener.shorten_url(url, provider)
+    async for index, short_url in shortener.shorten_many(urls, provider, user_id=job['user_id']):
+        done_count += 1
         
         if short_url and short_url.startswith(('http://', 'https://')):
-            results.append(f"{i}. ✅ {short_url}")
+            results[index] = f"{index + 1}. ✅ {short_url}"
             successful_count += 1
-            bot_stats['urls_shortened'] += 1
+            bot_stats.urls_shortened += 1
         else:
-            results.append(f"{i}. ❌ Gagal: {url}")
+            results[index] = f"{index + 1}. ❌ Gagal: {urls[index]}"
+        
+        # Update progress, dibatasi supaya tidak flood edit_message_text
+        now = time.monotonic()
+        if done_count < len(urls) and now - last_edit >= BATCH_EDIT_INTERVAL:
+            progress_text = (
+                f"⏳ Memendekkan {len(urls)} URL dengan {provider_name}...\n\n"
+                f"📊 Progress: {done_count}/{len(urls)} selesai ({successful_count} berhasil)"
+            )
+            await edit_job_message(bot, job, progress_text)
+            last_edit = now
     
     # Format hasil
     result_text = f"📦 Hasil Batch Shortening ({provider_name})\n\n"
@@ -386,11 +556,130 @@ async def handle_batch_callback(update: Update, context: ContextTypes.DEFAULT_TY
     if successful_count < len(urls):
         result_text += "\n💡 Beberapa URL gagal, coba provider lain."
     
-    await query.edit_message_text(result_text)
+    # Hasil besar dipecah ke beberapa pesan karena batas panjang pesan Telegram
+    chunks = split_message(result_text)
+    await edit_job_message(bot, job, chunks[0])
+    for chunk in chunks[1:]:
+        await bot.send_message(job['chat_id'], chunk)
+
+async def handle_inline_query(update: Update, context: ContextTypes.DEFAULT_TYPE):
+    """Inline mode: shorten dengan beberapa provider sekaligus, kirim yang selesai sebelum deadline"""
+    inline_query = update.inline_query
+    url = canonicalize(inline_query.query)
+    if not url:
+        await inline_query.answer([], cache_time=INLINE_CACHE_TIME)
+        return
+    
+    user_id = inline_query.from_user.id
+    bot_stats.record_user(user_id)
+    
+    # Telegram mengirim query untuk hampir setiap ketikan ("github.c", "github.co", ...):
+    # tunggu sebentar dan abaikan query yang sudah disusul query baru dari user yang sama
+    inline_latest[user_id] = inline_query.id
+    await asyncio.sleep(INLINE_DEBOUNCE)
+    if inline_latest.get(user_id) != inline_query.id:
+        return
+    
+    providers = [key for key in INLINE_PROVIDERS if key in PROVIDERS] or list(PROVIDERS)
+    results = shortener.cached(url, providers)
+    complete = len(results) == len(providers)
+    if not results:
+        # Belum pernah di-shorten: cukup provider lokal plus satu provider luar
+        # tercepat yang tidak antri, supaya tidak membuat link di semua provider
+        local = [key for key in providers if PROVIDERS[key].is_local]
+        providers = local + shortener.idle_providers(providers)[:1]
+        results, complete = await shortener.shorten_multi(url, providers, INLINE_DEADLINE, user_id)
+    if results:
+        bot_stats.urls_shortened += 1
+    
+    articles = [
+        InlineQueryResultArticle(
+            id=provider,
+            title=f"🔗 {PROVIDER_NAMES.get(provider, provider)}",
+            description=short_url,
+            input_message_content=InputTextMessageContent(short_url)
+        )
+        for provider, short_url in results.items()
+    ]
+    # Hasil sebagian di-cache sebentar saja supaya provider yang terlambat
+    # dicoba lagi di query berikutnya
+    await inline_query.answer(articles, cache_time=INLINE_CACHE_TIME if complete else INLINE_PARTIAL_CACHE_TIME)
+
+async def handle_document(update: Update, context: ContextTypes.DEFAULT_TYPE):
+    """Handle upload dokumen .txt/.csv berisi daftar URL"""
+    document = update.message.document
+    file_name = document.file_name or 'urls.txt'
+    
+    if not file_name.lower().endswith(bulk.BULK_EXTENSIONS):
+        await update.message.reply_text("❌ Format file tidak didukung. Kirim file .txt atau .csv (satu URL per baris).")
+        return
+    
+    if document.file_size and document.file_size > MAX_BULK_FILE_SIZE:
+        await update.message.reply_text(f"❌ File terlalu besar. Maksimal {MAX_BULK_FILE_SIZE // (1024 * 1024)} MB.")
+        return
+    
+    keyboard = provider_keyboard('bulk_', f"{document.file_id}\n{file_name}")
+    await update.message.reply_text(
+        f"📄 File: {file_name}\n"
+        f"📦 Maksimal {MAX_BULK_URLS} URL akan diproses.\n\n"
+        "Pilih provider untuk semua URL:",
+        reply_markup=InlineKeyboardMarkup(keyboard)
+    )
+
+async def handle_bulk_callback(update: Update, context: ContextTypes.DEFAULT_TYPE):
+    """Masukkan import dokumen ke antrian job"""
+    query = update.callback_query
+    provider, value = payloads.unpack(query.data, 'bulk_')
+    
+    if not value or provider not in PROVIDER_NAMES:
+        await query.edit_message_text("❌ File tidak ditemukan. Kirim file lagi.")
+        return
+    
+    file_id, _, file_name = value.partition('\n')
+    edit_interim(context.bot, query, f"⏳ Mengunduh {file_name}...")
+    await submit_job(context.bot, 'bulk', job_payload(query, file_id=file_id, file_name=file_name, provider=provider))
+
+async def run_bulk_job(bot, job):
+    """Job import: shorten semua URL di dokumen dan kirim hasilnya sebagai CSV"""
+    file_name = job['file_name']
+    provider = job['provider']
+    provider_name = PROVIDER_NAMES.get(provider, provider)
+    
+    async def report_progress(result):
+        await edit_job_message(
+            bot, job,
+            f"⏳ Memendekkan URL dari {file_name} dengan {provider_name}...\n\n"
+            f"📊 Progress: {result.ok + result.failed + result.invalid}/{result.total} selesai "
+            f"({result.ok} berhasil)"
+        )
     
-    # Hapus data batch setelah selesai
-    if user_id in user_batch_urls:
-        del user_batch_urls[user_id]
+    with tempfile.TemporaryDirectory() as workdir:
+        source = os.path.join(workdir, os.path.basename(file_name))
+        output = os.path.join(workdir, 'hasil.csv')
+        telegram_file = await bot.get_file(job['file_id'])
+        await telegram_file.download_to_drive(source)
+        
+        await edit_job_message(bot, job, f"⏳ Memendekkan URL dari {file_name} dengan {provider_name}...")
+        result = await bulk.shorten_file(
+            shortener, source, output, provider, job['user_id'],
+            concurrency=BULK_CONCURRENCY, max_urls=MAX_BULK_URLS,
+            progress=report_progress, progress_interval=BULK_PROGRESS_INTERVAL
+        )
+        bot_stats.urls_shortened += result.ok
+        
+        summary = (
+            f"📦 Hasil Import {file_name} ({provider_name})\n\n"
+            f"✅ Berhasil: {result.ok}\n"
+            f"❌ Gagal: {result.failed}\n"
+            f"⚠️ Tidak valid: {result.invalid}"
+        )
+        if result.truncated:
+            summary += f"\n✂️ Hanya {MAX_BULK_URLS} URL pertama yang diproses."
+        await edit_job_message(bot, job, summary)
+        
+        result_name = f"{os.path.splitext(file_name)[0]}_short.csv"
+        with open(output, 'rb') as result_file:
+            await bot.send_document(job['chat_id'], result_file, filename=result_name)
 
 async def custom_command(update: Update, context: ContextTypes.DEFAULT_TYPE):
     """Handle custom alias command: /custom <url> <alias>"""
@@ -412,9 +701,11 @@ async def custom_command(update: Update, context: ContextTypes.DEFAULT_TYPE):
     url = context.args[0]
     custom_alias = context.args[1].lower()  # Auto lowercase
     
-    # Validasi URL
-    if not any(proto in url for proto in ['http://', 'https://', '.', ':']):
-        url = 'https://' + url
+    # Validasi dan normalisasi URL
+    url = canonicalize(url)
+    if not url:
+        await update.message.reply_text("❌ Format URL tidak valid. Pastikan URL mengandung domain (contoh: google.com)")
+        return
     
     # Validasi custom alias
     if len(custom_alias) < 3:
@@ -433,129 +724,178 @@ async def custom_command(update: Update, context: ContextTypes.DEFAULT_TYPE):
         )
         return
     
-    # Simpan data user untuk custom alias
-    user_id = update.message.from_user.id
-    user_custom_data[user_id] = {
-        'url': url,
-        'alias': custom_alias
-    }
-    
-    # Buat keyboard pilihan provider untuk custom alias
-    keyboard = [
-        [
-            InlineKeyboardButton("🔗 is.gd", callback_data="custom_is_gd"),
-            InlineKeyboardButton("🔗 v.gd", callback_data="custom_v_gd")
-        ],
-        [
-            InlineKeyboardButton("📋 Lihat Provider Lain", callback_data="custom_more_info")
-        ]
-    ]
-    reply_markup = InlineKeyboardMarkup(keyboard)
+    message = await update.message.reply_text(f"⏳ Mengecek ketersediaan alias '{custom_alias}'...")
     
-    await update.message.reply_text(
-        f"🎯 Custom Alias: `{custom_alias}`\n"
-        f"🔗 URL: `{url}`\n\n"
-        "Pilih provider untuk custom alias:\n"
-        "• is.gd - Recommended\n"
-        "• v.gd - Alternative",
-        reply_markup=reply_markup,
-        parse_mode='Markdown'
+    # Cek alias di semua provider sekaligus, tombol hanya untuk yang belum dipakai
+    availability = await alias_prober.availability(custom_alias, ALIAS_PROVIDERS, update.effective_user.id)
+    available = [provider for provider, free in availability.items() if free is not False]
+    status_lines = "\n".join(
+        f"{'✅' if free else '❔' if free is None else '❌'} {PROVIDER_NAMES[provider]}: "
+        f"{'tersedia' if free else 'tidak bisa dicek' if free is None else 'sudah dipakai'}"
+        for provider, free in availability.items()
     )
+    
+    if available:
+        keyboard = provider_keyboard('custom_', f"{custom_alias} {url}", available, auto=False)
+        keyboard.append([InlineKeyboardButton("📋 Lihat Provider Lain", callback_data="custom_more_info")])
+        await message.edit_text(
+            f"🎯 Custom Alias: `{custom_alias}`\n"
+            f"🔗 URL: `{url}`\n\n"
+            f"{status_lines}\n\n"
+            "Pilih provider untuk custom alias:",
+            reply_markup=InlineKeyboardMarkup(keyboard),
+            parse_mode='Markdown'
+        )
+        return
+    
+    text, reply_markup = await alias_suggestions(custom_alias, url, status_lines, update.effective_user.id)
+    await message.edit_text(text, reply_markup=reply_markup)
+
+async def alias_suggestions(custom_alias, url, status_lines, user_id=None):
+    """Pesan dan tombol variasi alias yang sudah dicek masih bebas"""
+    suggestions = await alias_prober.suggest(custom_alias, ALIAS_PROVIDERS, user_id=user_id)
+    text = f"❌ Alias '{custom_alias}' sudah dipakai.\n\n{status_lines}\n\n"
+    if not suggestions:
+        return text + "💡 Gunakan /custom lagi dengan alias lain.", None
+    buttons = [
+        [InlineKeyboardButton(f"🔗 {variant} ({PROVIDER_NAMES[provider]})", callback_data=payloads.pack('custom_', provider, f"{variant} {url}"))]
+        for provider, variant in suggestions
+    ]
+    return text + "💡 Alias yang masih tersedia:", InlineKeyboardMarkup(buttons)
 
 async def handle_custom_callback(update: Update, context: ContextTypes.DEFAULT_TYPE):
     """Handle callback untuk custom alias provider selection"""
     query = update.callback_query
     user_id = query.from_user.id
-    callback_data = query.data
-    
-    # Dapatkan data custom user
-    custom_data = user_custom_data.get(user_id)
-    
-    if not custom_data:
-        await query.edit_message_text("❌ Data custom alias tidak ditemukan. Gunakan /custom lagi.")
-        return
-    
-    url = custom_data['url']
-    custom_alias = custom_data['alias']
     
-    # Map callback ke provider
-    provider_map = {
-        'custom_is_gd': 'is_gd',
-        'custom_v_gd': 'v_gd'
-    }
-    
-    if callback_data == 'custom_more_info':
-        # Tampilkan info provider
+    if query.data == 'custom_more_info':
+        # Tampilkan info provider dari registry
+        alias_info = "\n\n".join(
+            f"✅ {PROVIDERS[key].name}\n"
+            f"• Format: {getattr(PROVIDERS[key], 'base_url', f'https://{PROVIDERS[key].host}')}/alias_anda\n"
+            f"• {PROVIDERS[key].description}"
+            for key in ALIAS_PROVIDERS
+        )
         await query.edit_message_text(
             "ℹ️ Provider Support Custom Alias:\n\n"
-            "✅ is.gd - Recommended\n"
-            "• Format: https://is.gd/alias_anda\n"
-            "• Minimalis & cepat\n"
-            "• Tanpa iklan & analytics\n\n"
-            "✅ v.gd - Alternative\n"
-            "• Format: https://v.gd/alias_anda\n"
-            "• Sama seperti is.gd\n"
-            "• Backup option\n\n"
+            f"{alias_info}\n\n"
             "❌ Provider lain tidak support custom alias\n"
             "Gunakan /custom lagi untuk memilih provider."
         )
         return
     
-    provider = provider_map.get(callback_data)
+    # Alias (asli atau saran) dan URL dari tombol
+    provider, value = payloads.unpack(query.data, 'custom_')
     
-    if not provider:
+    if not value:
+        await query.edit_message_text("❌ Data custom alias tidak ditemukan. Gunakan /custom lagi.")
+        return
+    if provider not in ALIAS_PROVIDERS:
         await query.edit_message_text("❌ Provider tidak valid.")
         return
+    custom_alias, _, url = value.partition(' ')
     
-    # Provider names untuk display
-    provider_names = {
-        'is_gd': 'is.gd',
-        'v_gd': 'v.gd'
-    }
-    
-    await query.edit_message_text(f"⏳ Membuat custom link dengan {provider_names[provider]}...")
+    edit_interim(
+        context.bot, query,
+        f"⏳ Membuat custom link dengan {PROVIDER_NAMES[provider]}...{queue_note(provider, user_id)}"
+    )
+    await submit_job(context.bot, 'custom', job_payload(query, url=url, alias=custom_alias, provider=provider))
+
+async def run_custom_job(bot, job):
+    """Job custom alias: shorten lalu kirim hasil atau saran alias"""
+    url, custom_alias, provider = job['url'], job['alias'], job['provider']
+    user_id = job['user_id']
     
     # Shorten dengan custom alias
-    short_url = shortener.shorten_url(url, provider, custom_alias)
+    short_url = await shortener.shorten_url(url, provider, custom_alias, user_id)
     
     # Update statistics
     if short_url and short_url.startswith('http'):
-        bot_stats['urls_shortened'] += 1
+        bot_stats.urls_shortened += 1
     
     if short_url and short_url.startswith('http'):
         # Success
-        await query.edit_message_text(
+        await edit_job_message(
+            bot, job,
             f"✅ Custom Alias Berhasil!\n\n"
             f"🔗 {short_url}\n"
             f"📝 Alias: {custom_alias}\n"
-            f"🛠 Provider: {provider_names[provider]}\n\n"
+            f"🛠 Provider: {PROVIDER_NAMES[provider]}\n\n"
             f"💡 Tips: Copy link di atas untuk share!"
         )
     elif short_url and short_url.startswith('ERROR:2:'):
-        # Alias already exists
-        await query.edit_message_text(
-            f"❌ Alias '{custom_alias}' sudah dipakai di {provider_names[provider]}.\n\n"
-            f"💡 Coba:\n"
-            f"• Pilih provider lain\n"
-            f"• Ganti alias: {custom_alias}2, my_{custom_alias}\n"
-            f"• Gunakan /custom lagi"
+        # Alias sudah dipakai: ingat, lalu tawarkan variasi yang masih bebas
+        alias_prober.mark_taken(provider, custom_alias)
+        text, reply_markup = await alias_suggestions(
+            custom_alias, url, f"❌ {PROVIDER_NAMES[provider]}: sudah dipakai", user_id
         )
+        await edit_job_message(bot, job, text, reply_markup=reply_markup)
     elif short_url and short_url.startswith('ERROR:'):
         # Other error
         error_msg = short_url.split(':', 2)[2]
-        await query.edit_message_text(
-            f"❌ Error dengan {provider_names[provider]}:\n{error_msg}\n\n"
+        await edit_job_message(
+            bot, job,
+            f"❌ Error dengan {PROVIDER_NAMES[provider]}:\n{error_msg}\n\n"
             f"💡 Coba provider lain atau ganti alias."
         )
     else:
-        await query.edit_message_text(
-            f"❌ {provider_names[provider]} gagal membuat custom alias.\n"
+        await edit_job_message(
+            bot, job,
+            f"❌ {PROVIDER_NAMES[provider]} gagal membuat custom alias.\n"
             f"Silakan coba provider lain atau gunakan provider biasa."
         )
-    
-    # Hapus data custom setelah selesai
-    if user_id in user_custom_data:
-        del user_custom_data[user_id]
+
+def format_url_list(urls, limit=10):
+    """Format daftar URL, dipotong jika terlalu panjang"""
+    url_list = "\n".join(f"• {url}" for url in urls[:limit])
+    if len(urls) > limit:
+        url_list += f"\n• ... dan {len(urls) - limit} URL lainnya"
+    return url_list
+
+def split_message(text, limit=MESSAGE_LIMIT):
+    """Pecah teks panjang per baris supaya muat di pesan Telegram"""
+    chunks = []
+    current = ""
+    for line in text.split("\n"):
+        line = line[:limit]
+        if current and len(current) + len(line) + 1 > limit:
+            chunks.append(current)
+            current = line
+        else:
+            current = f"{current}\n{line}" if current else line
+    chunks.append(current)
+    return chunks
+
+def provider_keyboard(prefix, value, providers=None, auto=True, columns=2):
+    """Keyboard pilihan provider dari registry, `value` ikut di callback_data tiap tombol"""
+    buttons = [
+        InlineKeyboardButton(f"🔗 {PROVIDERS[key].name}", callback_data=payloads.pack(prefix, key, value))
+        for key in (providers or PROVIDERS)
+    ]
+    keyboard = [buttons[i:i + columns] for i in range(0, len(buttons), columns)]
+    if auto:
+        keyboard.append([InlineKeyboardButton("⚡ Auto (tercepat)", callback_data=payloads.pack(prefix, AUTO_PROVIDER, value))])
+    return keyboard
+
+def queue_note(provider, user_id):
+    """Info posisi antrian rate limit untuk pesan ⏳, kosong jika tidak antri"""
+    position, wait = shortener.scheduler.position(provider, user_id)
+    if not position:
+        return ""
+    return f"\n🚦 Antrian ke-{position}, perkiraan {wait:.0f} detik"
+
+def timeout_note(provider):
+    """Timeout adaptif provider yang sedang dipakai proses ini, untuk /stats"""
+    if provider not in provider_timeouts.current:
+        return ""
+    connect, read = provider_timeouts.current[provider]
+    return f" / ⌛ {connect:.1f}s+{read:.1f}s"
+
+def format_latency(seconds):
+    """Format latency detik ke milidetik"""
+    if seconds is None:
+        return "-"
+    return f"{seconds * 1000:.0f}ms"
 
 def format_uptime(seconds):
     """Format uptime seconds to human readable string"""
@@ -574,41 +914,28 @@ def format_uptime(seconds):
 async def handle_url(update: Update, context: ContextTypes.DEFAULT_TYPE):
     """Handle single URL input"""
     user_id = update.message.from_user.id
+    bot_stats.record_user(user_id)
     
     # Cek jika user dalam mode batch
-    if user_id in user_batch_urls and user_batch_urls[user_id].get('waiting_for_batch'):
+    if user_id in batch_waiting:
         await handle_batch_urls(update, context)
         return
     
     url = update.message.text.strip()
     
-    # Validasi URL
-    if not any(proto in url for proto in ['http://', 'https://', '.', ':']):
+    # Validasi dan normalisasi URL (auto tambah https, buang tracking param)
+    url = canonicalize(url)
+    if not url:
         await update.message.reply_text("❌ Format URL tidak valid. Pastikan URL mengandung domain (contoh: google.com)")
         return
     
-    # Auto tambah https jika perlu
-    if not url.startswith(('http://', 'https://')):
-        url = 'https://' + url
-    
-    # Simpan URL user
-    user_urls[user_id] = url
+    # Mulai shorten dengan provider tebakan selagi user memilih
+    provider = speculator.predict(user_id)
+    if provider in PROVIDER_NAMES and (provider == AUTO_PROVIDER or not provider_scheduler.expected_wait(provider)):
+        speculator.start(user_id, url, provider, lambda: shorten_choice(url, provider, user_id))
     
     # Buat keyboard pilihan provider dengan layout 2 kolom
-    keyboard = [
-        [
-            InlineKeyboardButton("🔗 clck.ru", callback_data="click_ru"),
-            InlineKeyboardButton("🔗 da.gd", callback_data="da_gd")
-        ],
-        [
-            InlineKeyboardButton("🔗 osdb.link", callback_data="osdb_link"),
-            InlineKeyboardButton("🔗 is.gd", callback_data="is_gd")
-        ],
-        [
-            InlineKeyboardButton("🔗 v.gd", callback_data="v_gd"),
-            InlineKeyboardButton("🔗 tinyurl.com", callback_data="tinyurl")
-        ]
-    ]
+    keyboard = provider_keyboard('', url)
     reply_markup = InlineKeyboardMarkup(keyboard)
     
     await update.message.reply_text(
@@ -629,45 +956,63 @@ async def handle_callback(update: Update, context: ContextTypes.DEFAULT_TYPE):
         await handle_batch_callback(update, context)
         return
     
+    # Handle import dokumen
+    if callback_data.startswith('bulk_'):
+        await handle_bulk_callback(update, context)
+        return
+    
     # Handle custom alias callbacks
     if callback_data.startswith('custom_'):
         await handle_custom_callback(update, context)
         return
     
-    # Handle normal URL shortening callbacks
-    provider = callback_data
+    # Handle normal URL shortening callbacks, URL dari tombol
+    provider, url = payloads.unpack(callback_data)
     
-    # Dapatkan URL user
-    url = user_urls.get(user_id)
-    
-    if not url:
+    if not url or provider not in PROVIDER_NAMES:
         await query.edit_message_text("❌ URL tidak ditemukan. Kirim URL lagi.")
         return
     
-    # Provider names untuk display
-    provider_names = {
-        'click_ru': 'clck.ru',
-        'da_gd': 'da.gd',
-        'osdb_link': 'osdb.link',
-        'is_gd': 'is.gd',
-        'v_gd': 'v.gd',
-        'tinyurl': 'tinyurl.com'
-    }
-    
-    await query.edit_message_text(f"⏳ Memendekkan dengan {provider_names[provider]}...")
+    speculator.record_choice(user_id, provider)
+    edit_interim(context.bot, query, f"⏳ Memendekkan dengan {PROVIDER_NAMES[provider]}...{queue_note(provider, user_id)}")
+    await submit_job(context.bot, 'single', job_payload(query, url=url, provider=provider))
+
+async def shorten_choice(url, provider, user_id):
+    """Shorten sesuai pilihan user, return (provider yang dipakai, short_url).
+
+    Auto memilih provider tercepat yang sehat dengan failover (atau race
+    beberapa provider jika hedging aktif).
+    """
+    if provider == AUTO_PROVIDER:
+        if HEDGE_MAX > 1:
+            return await shortener.shorten_hedged(url, HEDGE_MAX, HEDGE_DELAY, user_id)
+        return await shortener.shorten_auto(url, user_id=user_id)
+    return provider, await shortener.shorten_url(url, provider, user_id=user_id)
+
+async def run_single_job(bot, job):
+    """Job shorten satu URL dengan provider pilihan (atau Auto)"""
+    url, provider, user_id = job['url'], job['provider'], job['user_id']
+    
+    # Pakai hasil spekulatif dari handle_url jika tebakan provider benar
+    speculative = speculator.take(user_id, url, provider)
+    if speculative is not None:
+        provider_used, short_url = await speculative
+    else:
+        provider_used, short_url = await shorten_choice(url, provider, user_id)
     
-    # Shorten URL
-    short_url = shortener.shorten_url(url, provider)
+    provider_label = PROVIDER_NAMES[provider]
+    if provider == AUTO_PROVIDER and provider_used:
+        provider_label = f"{PROVIDER_NAMES[provider]} → {PROVIDER_NAMES[provider_used]}"
     
     # Update statistics
     if short_url:
-        bot_stats['urls_shortened'] += 1
+        bot_stats.urls_shortened += 1
     
     if short_url:
         # Validasi hasil
         if short_url.startswith(('http://', 'https://')):
             message = f"""
-✅ {provider_names[provider]}
+✅ {provider_label}
 
 🔗 {short_url}
         """
@@ -676,41 +1021,186 @@ async def handle_callback(update: Update, context: ContextTypes.DEFAULT_TYPE):
             if '.' in short_url:
                 short_url = f"https://{short_url}"
             message = f"""
-✅ {provider_names[provider]}
+✅ {provider_label}
 
 🔗 {short_url}
         """
-        await query.edit_message_text(message)
+        await edit_job_message(bot, job, message)
+    elif provider == AUTO_PROVIDER:
+        await edit_job_message(
+            bot, job,
+            "❌ Semua provider gagal atau sedang down.\n"
+            "Silakan coba lagi beberapa saat lagi."
+        )
     else:
-        await query.edit_message_text(
-            f"❌ {provider_names[provider]} gagal atau sedang down.\n"
-            "Silakan coba provider lain."
+        await edit_job_message(
+            bot, job,
+            f"❌ {PROVIDER_NAMES[provider]} gagal atau sedang down.\n"
+            "Silakan coba provider lain atau ⚡ Auto."
+        )
+
+def edit_interim(bot, query, text):
+    """Edit pesan sementara (⏳) tanpa menunggu; limiter melewatinya jika hasil
+    akhir sudah dikirim dalam INTERIM_DELAY detik"""
+    task = asyncio.ensure_future(bot.edit_message_text(
+        text, chat_id=query.message.chat_id, message_id=query.message.message_id,
+        rate_limit_args=outbound.interim()
+    ))
+    background_tasks.add(task)
+    task.add_done_callback(finish_background_task)
+
+def finish_background_task(task):
+    background_tasks.discard(task)
+    if not task.cancelled() and task.exception():
+        print(f"Error task background: {task.exception()}")
+
+def job_payload(query, **data):
+    """Data job beserta pesan yang nanti diisi hasilnya"""
+    return dict(data, user_id=query.from_user.id, chat_id=query.message.chat_id, message_id=query.message.message_id)
+
+async def edit_job_message(bot, job, text, reply_markup=None):
+    await bot.edit_message_text(text, chat_id=job['chat_id'], message_id=job['message_id'], reply_markup=reply_markup)
+
+async def notify_job_failed(bot, payload):
+    """Ganti pesan ⏳ job yang gagal dengan pesan error supaya tidak menggantung"""
+    await edit_job_message(bot, payload, "❌ Terjadi kesalahan saat memproses permintaan.\nSilakan coba lagi.")
+
+async def submit_job(bot, kind, payload):
+    """Masukkan job ke antrian worker; tanpa worker pool job langsung dijalankan"""
+    if job_queue is None:
+        try:
+            await JOB_HANDLERS[kind](bot, payload)
+        except Exception as e:
+            print(f"Error job ({kind}): {e}")
+            await notify_job_failed(bot, payload)
+        return
+    if job_queue.enqueue(kind, payload) is None:
+        # Backpressure: antrian penuh, tolak job baru
+        await edit_job_message(bot, payload, "🚦 Bot sedang sibuk, antrian penuh.\nSilakan coba lagi beberapa saat lagi.")
+
+JOB_HANDLERS = {
+    'single': run_single_job,
+    'batch': run_batch_job,
+    'bulk': run_bulk_job,
+    'custom': run_custom_job,
+}
+
+async def flush_stats():
+    """Simpan statistik ke disk secara berkala"""
+    while True:
+        await asyncio.sleep(STATS_FLUSH_INTERVAL)
+        bot_stats.save()
+
+async def on_startup(app: Application):
+    """Jalankan task background saat bot mulai"""
+    app.bot_data['stats_task'] = asyncio.create_task(flush_stats())
+    if METRICS_PORT:
+        app.bot_data['metrics_server'] = await metrics.start_server(METRICS_HOST, METRICS_PORT)
+        print(f"📈 Metrics tersedia di http://{METRICS_HOST}:{METRICS_PORT}/metrics")
+    if job_queue is not None:
+        resumed = job_queue.resume()
+        if resumed:
+            print(f"🔄 Melanjutkan {resumed} job yang terputus")
+        app.bot_data['job_pool'] = WorkerPool(
+            job_queue, JOB_HANDLERS, JOB_WORKERS,
+            limits={'bulk': BULK_JOB_WORKERS, 'batch': BATCH_JOB_WORKERS}, on_failure=notify_job_failed
         )
+        app.bot_data['job_pool'].start(app.bot)
+    if local_links is not None and SHARD_INDEX == 0:
+        # Redirect server cukup satu; link dari shard lain dibaca dari SQLite
+        app.bot_data['redirect_server'] = await RedirectServer(local_links, LOCAL_SHORTENER_TIMEOUT).start(LOCAL_SHORTENER_HOST, LOCAL_SHORTENER_PORT)
+        print(f"🔁 Redirect server lokal di {LOCAL_SHORTENER_HOST}:{LOCAL_SHORTENER_PORT} ({LOCAL_SHORTENER_BASE_URL})")
+
+async def on_shutdown(app: Application):
+    """Simpan statistik dan tutup connection pool provider saat bot berhenti"""
+    stats_task = app.bot_data.pop('stats_task', None)
+    if stats_task:
+        stats_task.cancel()
+    metrics_server = app.bot_data.pop('metrics_server', None)
+    if metrics_server:
+        metrics_server.close()
+    redirect_server = app.bot_data.pop('redirect_server', None)
+    if redirect_server:
+        redirect_server.close()
+    job_pool = app.bot_data.pop('job_pool', None)
+    if job_pool:
+        await job_pool.stop()
+        job_queue.close()
+    bot_stats.save()
+    await shortener.close()
+    result_cache.close()
+    batch_waiting.close()
+    payloads.close()
+    speculator.close()
+    if local_links is not None:
+        local_links.close()
+
+def callback_type(update: Update):
+    """Label metrics untuk jenis callback"""
+    callback_data = update.callback_query.data or ''
+    for prefix in ('batch_', 'bulk_', 'custom_'):
+        if callback_data.startswith(prefix):
+            return f"callback_{prefix.rstrip('_')}"
+    return 'callback_single'
+
+def build_application(base_url=None):
+    """Buat Application dengan semua handler (dipakai main(), worker sharding dan
+    load test). `base_url` = Bot API lain, misal fake server lokal."""
+    builder = (
+        Application.builder()
+        .token(TOKEN)
+        .request(metrics.InstrumentedRequest(connection_pool_size=256))
+        .concurrent_updates(CONCURRENT_UPDATES if CONCURRENT_UPDATES > 1 else False)
+        .rate_limiter(outbound_limiter)
+        .post_init(on_startup)
+        .post_shutdown(on_shutdown)
+    )
+    if base_url:
+        builder = builder.base_url(base_url)
+    app = builder.build()
+    
+    # Add command handlers (semua handler dibungkus metrics)
+    app.add_handler(CommandHandler("start", metrics.instrument("start", start)))
+    app.add_handler(CommandHandler("help", metrics.instrument("help", help_command)))
+    app.add_handler(CommandHandler("stats", metrics.instrument("stats", stats_command)))
+    app.add_handler(CommandHandler("providers", metrics.instrument("providers", providers_command)))
+    app.add_handler(CommandHandler("about", metrics.instrument("about", about_command)))
+    app.add_handler(CommandHandler("ping", metrics.instrument("ping", ping_command)))
+    app.add_handler(CommandHandler("custom", metrics.instrument("custom", custom_command)))
+    app.add_handler(CommandHandler("batch", metrics.instrument("batch", batch_command)))  # ✅ Batch command
+    
+    # Add message handler
+    app.add_handler(MessageHandler(filters.TEXT & ~filters.COMMAND, metrics.instrument("message", handle_url)))
+    app.add_handler(MessageHandler(filters.Document.ALL, metrics.instrument("document", handle_document)))
+    app.add_handler(CallbackQueryHandler(metrics.instrument(callback_type, handle_callback)))
+    app.add_handler(InlineQueryHandler(metrics.instrument("inline", handle_inline_query)))
+    return app
 
 def main():
     if not TOKEN:
         print("❌ Token tidak ditemukan! Pastikan file bot.env ada")
         return
     
-    app = Application.builder().token(TOKEN).build()
-    
-    # Add command handlers
-    app.add_handler(CommandHandler("start", start))
-    app.add_handler(CommandHandler("help", help_command))
-    app.add_handler(CommandHandler("stats", stats_command))
-    app.add_handler(CommandHandler("providers", providers_command))
-    app.add_handler(CommandHandler("about", about_command))
-    app.add_handler(CommandHandler("ping", ping_command))
-    app.add_handler(CommandHandler("custom", custom_command))
-    app.add_handler(CommandHandler("batch", batch_command))  # ✅ Batch command
-    
-    # Add message handler
-    app.add_handler(MessageHandler(filters.TEXT & ~filters.COMMAND, handle_url))
-    app.add_handler(CallbackQueryHandler(handle_callback))
+    app = build_application()
     
     print("🤖 Bot berjalan...")
     print("📚 Command yang tersedia: /start, /help, /stats, /providers, /about, /ping, /custom, /batch")
-    app.run_polling()
+    
+    if BOT_MODE == 'webhook':
+        if not WEBHOOK_URL:
+            print("❌ WEBHOOK_URL wajib diisi untuk BOT_MODE=webhook")
+            return
+        print(f"🌐 Webhook mendengarkan di {WEBHOOK_LISTEN}:{WEBHOOK_PORT}/{WEBHOOK_PATH}")
+        app.run_webhook(
+            listen=WEBHOOK_LISTEN,
+            port=WEBHOOK_PORT,
+            url_path=WEBHOOK_PATH,
+            secret_token=WEBHOOK_SECRET,
+            webhook_url=f"{WEBHOOK_URL.rstrip('/')}/{WEBHOOK_PATH}",
+            max_connections=WEBHOOK_MAX_CONNECTIONS
+        )
+    else:
+        app.run_polling()
 
 if __name__ == '__main__':
     main()
\ No newline at end of file
@@ -0,0 +1,120 @@
+import asyncio
+import csv
+import time
+from collections import deque
+
+from canonical import canonicalize
+from shortener import AUTO_PROVIDER
+
+# Ekstensi dokumen yang bisa diimport
+BULK_EXTENSIONS = ('.txt', '.csv')
+
+CSV_HEADER = ('original', 'short_link', 'provider', 'status')
+
+
+class BulkResult:
+    """Rekap hasil import: jumlah URL per status"""
+    __slots__ = ('total', 'ok', 'failed', 'invalid', 'truncated')
+
+    def __init__(self):
+        self.total = 0
+        self.ok = 0
+        self.failed = 0
+        self.invalid = 0
+        # True jika file dipotong karena melebihi batas jumlah URL
+        self.truncated = False
+
+
+def iter_urls(path):
+    """Yield URL mentah dari file .txt (satu per baris) atau .csv, tanpa load seluruh file.
+
+    Untuk CSV dipakai kolom bernama 'url' jika ada header, selain itu kolom pertama.
+    """
+    with open(path, newline='', encoding='utf-8-sig', errors='replace') as file:
+        if not path.lower().endswith('.csv'):
+            for line in file:
+                line = line.strip()
+                if line:
+                    yield line
+            return
+
+        rows = csv.reader(file)
+        column = 0
+        for row_number, row in enumerate(rows):
+            if row_number == 0:
+                header = [cell.strip().lower() for cell in row]
+                if 'url' in header:
+                    column = header.index('url')
+                    continue
+            if column < len(row) and row[column].strip():
+                yield row[column].strip()
+
+
+async def _shorten_one(shortener, url, provider, user_id):
+    if provider == AUTO_PROVIDER:
+        return await shortener.shorten_auto(url, user_id=user_id)
+    return provider, await shortener.shorten_url(url, provider, user_id=user_id)
+
+
+async def shorten_file(shortener, source, output, provider, user_id=None, concurrency=8,
+                       max_urls=None, progress=None, progress_interval=5):
+    """Shorten semua URL di `source`, tulis hasil ke CSV `output` secara bertahap.
+
+    Maksimal `concurrency` request berjalan bersamaan; baris ditulis sesuai
+    urutan input. `progress(result)` (async) dipanggil tiap `progress_interval` detik.
+    """
+    result = BulkResult()
+    semaphore = asyncio.Semaphore(concurrency)
+    # Window task yang sedang berjalan; dibatasi supaya memory tetap konstan
+    pending = deque()
+    window = concurrency * 4
+    last_progress = time.monotonic()
+
+    async def run(url):
+        async with semaphore:
+            return await _shorten_one(shortener, url, provider, user_id)
+
+    with open(output, 'w', newline='', encoding='utf-8') as file:
+        writer = csv.writer(file)
+        writer.writerow(CSV_HEADER)
+
+        async def write_next():
+            nonlocal last_progress
+            original, task = pending.popleft()
+            if task is None:
+                result.invalid += 1
+                writer.writerow((original, '', '', 'invalid'))
+            else:
+                provider_used, short_url = await task
+                if short_url and short_url.startswith(('http://', 'https://')):
+                    result.ok += 1
+                    writer.writerow((original, short_url, provider_used, 'ok'))
+                else:
+                    result.failed += 1
+                    status = f"error: {short_url.split(':', 2)[2]}" if short_url and short_url.startswith('ERROR:') else 'failed'
+                    writer.writerow((original, '', provider_used or '', status))
+
+            now = time.monotonic()
+            if progress is not None and now - last_progress >= progress_interval:
+                last_progress = now
+                await progress(result)
+
+        try:
+            for raw_url in iter_urls(source):
+                if max_urls is not None and result.total >= max_urls:
+                    result.truncated = True
+                    break
+                result.total += 1
+                url = canonicalize(raw_url)
+                task = asyncio.ensure_future(run(url)) if url else None
+                pending.append((raw_url, task))
+                if len(pending) >= window:
+                    await write_next()
+            while pending:
+                await write_next()
+        finally:
+            for _, task in pending:
+                if task is not None:
+                    task.cancel()
+
+    return result
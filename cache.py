@@ -0,0 +1,130 @@
+import sqlite3
+import time
+from collections import OrderedDict
+
+
+class ResultCache:
+    """Cache hasil shortening: LRU in-memory dengan TTL, disimpan juga ke SQLite.
+
+    Di disk disimpan maksimal `max_disk_entries` entry (default 10x LRU), entry
+    kadaluarsa dan yang paling lama dibersihkan setiap 1000 kali simpan.
+    """
+
+    def __init__(self, path='cache.db', max_entries=10000, ttl=7 * 86400, max_disk_entries=None):
+        self.max_entries = max_entries
+        self.max_disk_entries = max_disk_entries or max_entries * 10
+        self.ttl = ttl
+        self._writes = 0
+        self.hits = 0
+        self.misses = 0
+        # key -> (short_url, expires_at), urutan = urutan LRU
+        self._memory = OrderedDict()
+        self._db = None
+
+        if path:
+            self._db = sqlite3.connect(path, isolation_level=None, check_same_thread=False)
+            self._db.execute("PRAGMA journal_mode=WAL")
+            self._db.execute("PRAGMA synchronous=NORMAL")
+            self._db.execute(
+                "CREATE TABLE IF NOT EXISTS results ("
+                "url TEXT NOT NULL, provider TEXT NOT NULL, alias TEXT NOT NULL, "
+                "short_url TEXT NOT NULL, expires_at REAL NOT NULL, "
+                "PRIMARY KEY (url, provider, alias))"
+            )
+            self._warm()
+
+    @staticmethod
+    def _key(url, provider, alias):
+        # Hasil custom alias disimpan terpisah dari hasil biasa
+        return (url, provider, alias or '')
+
+    def _warm(self):
+        """Hapus entry kadaluarsa lalu isi LRU dengan entry terbaru dari disk"""
+        self.purge()
+        rows = self._db.execute(
+            "SELECT url, provider, alias, short_url, expires_at FROM results "
+            "ORDER BY expires_at DESC LIMIT ?", (self.max_entries,)
+        ).fetchall()
+        for url, provider, alias, short_url, expires_at in reversed(rows):
+            self._memory[(url, provider, alias)] = (short_url, expires_at)
+
+    def _remember(self, key, short_url, expires_at):
+        self._memory[key] = (short_url, expires_at)
+        self._memory.move_to_end(key)
+        while len(self._memory) > self.max_entries:
+            self._memory.popitem(last=False)
+
+    def get(self, url, provider, alias=None):
+        """Ambil short URL dari cache, None jika tidak ada atau kadaluarsa"""
+        short_url = self.peek(url, provider, alias)
+        if short_url is None:
+            self.misses += 1
+        else:
+            self.hits += 1
+        return short_url
+
+    def peek(self, url, provider, alias=None):
+        """Seperti get tapi tanpa mengubah statistik hit/miss"""
+        key = self._key(url, provider, alias)
+        now = time.time()
+
+        entry = self._memory.get(key)
+        if entry is None and self._db is not None:
+            row = self._db.execute(
+                "SELECT short_url, expires_at FROM results WHERE url = ? AND provider = ? AND alias = ?",
+                key
+            ).fetchone()
+            if row:
+                entry = row
+                self._remember(key, *row)
+
+        if entry is None or entry[1] <= now:
+            if entry is not None:
+                self._memory.pop(key, None)
+            return None
+
+        self._memory.move_to_end(key)
+        return entry[0]
+
+    def set(self, url, provider, short_url, alias=None):
+        """Simpan hasil sukses; hasil ERROR: dan kosong tidak pernah di-cache"""
+        if not short_url or not short_url.startswith(('http://', 'https://')):
+            return
+
+        key = self._key(url, provider, alias)
+        expires_at = time.time() + self.ttl
+        self._remember(key, short_url, expires_at)
+        if self._db is not None:
+            self._db.execute(
+                "INSERT OR REPLACE INTO results (url, provider, alias, short_url, expires_at) "
+                "VALUES (?, ?, ?, ?, ?)",
+                (*key, short_url, expires_at)
+            )
+
+            # Bersihkan disk secara berkala
+            self._writes += 1
+            if self._writes % 1000 == 0:
+                self.purge()
+
+    def purge(self):
+        """Hapus entry kadaluarsa dan entry terlama di atas batas disk"""
+        if self._db is None:
+            return
+        self._db.execute("DELETE FROM results WHERE expires_at <= ?", (time.time(),))
+        self._db.execute(
+            "DELETE FROM results WHERE rowid IN "
+            "(SELECT rowid FROM results ORDER BY expires_at DESC LIMIT -1 OFFSET ?)",
+            (self.max_disk_entries,)
+        )
+
+    def hit_rate(self):
+        total = self.hits + self.misses
+        return self.hits / total if total else 0.0
+
+    def __len__(self):
+        return len(self._memory)
+
+    def close(self):
+        if self._db is not None:
+            self._db.close()
+            self._db = None
@@ -0,0 +1,78 @@
+from functools import lru_cache
+from urllib.parse import quote, unquote_plus, urlsplit, urlunsplit
+
+# Parameter tracking yang dibuang; akhiran * berarti prefix
+DEFAULT_TRACKING_PARAMS = (
+    'utm_*', 'fbclid', 'gclid', 'dclid', 'gbraid', 'wbraid', 'msclkid', 'yclid',
+    'mc_cid', 'mc_eid', 'igshid', '_ga', '_gl', 'ref_src', 'si'
+)
+
+DEFAULT_PORTS = {'http': 80, 'https': 443}
+
+# Karakter yang tidak perlu di-encode di path (RFC 3986), % dibiarkan supaya
+# percent-encoding yang sudah ada tidak di-encode dua kali
+PATH_SAFE = "/%:@!$&'()*+,;=-._~"
+QUERY_SAFE = "/%:@!$'()*+,;=-._~?"
+
+_exact_params = frozenset()
+_prefix_params = ()
+
+
+def configure(tracking_params):
+    """Set daftar parameter tracking yang dibuang (iterable nama/prefix*)"""
+    global _exact_params, _prefix_params
+    params = [p.strip().lower() for p in tracking_params if p.strip()]
+    _exact_params = frozenset(p for p in params if not p.endswith('*'))
+    _prefix_params = tuple(p[:-1] for p in params if p.endswith('*'))
+    canonicalize.cache_clear()
+
+
+def is_tracking_param(name):
+    name = name.lower()
+    return name in _exact_params or name.startswith(_prefix_params)
+
+
+@lru_cache(maxsize=8192)
+def canonicalize(url):
+    """Bentuk kanonik URL, atau None jika URL tidak valid.
+
+    Tambah https:// jika tanpa skema, lowercase host, buang port default dan
+    parameter tracking, urutkan query string, dan rapikan percent-encoding.
+    """
+    url = url.strip()
+    if not url:
+        return None
+    if '://' not in url:
+        url = 'https://' + url
+
+    try:
+        parts = urlsplit(url)
+        port = parts.port
+    except ValueError:
+        return None
+
+    scheme = parts.scheme.lower()
+    host = (parts.hostname or '').rstrip('.')
+    if scheme not in DEFAULT_PORTS or not host:
+        return None
+    if '.' not in host and ':' not in host and host != 'localhost':
+        return None
+
+    netloc = f"[{host}]" if ':' in host else host
+    if port is not None and port != DEFAULT_PORTS[scheme]:
+        netloc = f"{netloc}:{port}"
+    if '@' in parts.netloc:
+        netloc = f"{parts.netloc.rsplit('@', 1)[0]}@{netloc}"
+
+    path = quote(parts.path, safe=PATH_SAFE) or '/'
+    # Parameter diproses sebagai teks apa adanya supaya nilai tidak berubah arti
+    params = [p for p in parts.query.split('&') if p]
+    params = [p for p in params if not is_tracking_param(unquote_plus(p.partition('=')[0]))]
+    # Urutkan per nama saja (stabil): urutan nilai dari key yang berulang bisa bermakna
+    params = sorted(params, key=lambda p: p.partition('=')[0])
+    query_string = '&'.join(quote(p, safe=QUERY_SAFE) for p in params)
+
+    return urlunsplit((scheme, netloc, path, query_string, parts.fragment))
+
+
+configure(DEFAULT_TRACKING_PARAMS)
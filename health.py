@@ -0,0 +1,108 @@
+import time
+from collections import deque
+
+
+class ProviderHealth:
+    """Statistik rolling satu provider plus circuit breaker"""
+
+    CLOSED = 'closed'
+    OPEN = 'open'
+    HALF_OPEN = 'half_open'
+
+    def __init__(self, window=50, failure_threshold=5, reset_timeout=60):
+        self.samples = deque(maxlen=window)  # (ok, latency_detik)
+        self.failure_threshold = failure_threshold
+        self.reset_timeout = reset_timeout
+        self.consecutive_failures = 0
+        self.state = self.CLOSED
+        self.opened_at = 0.0
+        self.trial_in_flight = False
+
+    def allow_request(self):
+        """Cek apakah request boleh dikirim ke provider ini"""
+        if self.state == self.CLOSED:
+            return True
+        if self.state == self.OPEN:
+            if time.monotonic() - self.opened_at < self.reset_timeout:
+                return False
+            self.state = self.HALF_OPEN
+            self.trial_in_flight = False
+        # Half-open: hanya satu request percobaan dalam satu waktu
+        if self.trial_in_flight:
+            return False
+        self.trial_in_flight = True
+        return True
+
+    def is_available(self):
+        """Seperti allow_request tapi tanpa mengubah state"""
+        if self.state == self.CLOSED:
+            return True
+        if self.state == self.OPEN:
+            return time.monotonic() - self.opened_at >= self.reset_timeout
+        return not self.trial_in_flight
+
+    def release(self):
+        """Request dibatalkan sebelum selesai: lepas slot percobaan tanpa mencatat hasil"""
+        self.trial_in_flight = False
+
+    def record(self, ok, latency):
+        self.samples.append((ok, latency))
+        self.trial_in_flight = False
+        if ok:
+            self.consecutive_failures = 0
+            self.state = self.CLOSED
+            return
+
+        self.consecutive_failures += 1
+        if self.state == self.HALF_OPEN or self.consecutive_failures >= self.failure_threshold:
+            self.state = self.OPEN
+            self.opened_at = time.monotonic()
+
+    def success_rate(self):
+        if not self.samples:
+            return 1.0
+        return sum(1 for ok, _ in self.samples if ok) / len(self.samples)
+
+    def percentile(self, q):
+        """Persentil latency (detik) dari request yang sukses, None jika belum ada data"""
+        latencies = sorted(latency for ok, latency in self.samples if ok)
+        if not latencies:
+            return None
+        index = min(len(latencies) - 1, int(q / 100 * len(latencies)))
+        return latencies[index]
+
+
+class HealthTracker:
+    """Kumpulan ProviderHealth untuk routing provider tercepat yang sehat"""
+
+    def __init__(self, window=50, failure_threshold=5, reset_timeout=60):
+        self.window = window
+        self.failure_threshold = failure_threshold
+        self.reset_timeout = reset_timeout
+        self._providers = {}
+
+    def __getitem__(self, provider):
+        health = self._providers.get(provider)
+        if health is None:
+            health = ProviderHealth(self.window, self.failure_threshold, self.reset_timeout)
+            self._providers[provider] = health
+        return health
+
+    def score(self, provider):
+        """Skor routing, makin kecil makin bagus"""
+        health = self[provider]
+        p50 = health.percentile(50)
+        if p50 is not None:
+            latency = p50
+        elif health.samples:
+            # Belum pernah sukses: taruh paling belakang
+            latency = float('inf')
+        else:
+            # Provider tanpa data dianggap cepat supaya tetap dicoba
+            latency = 0.0
+        return latency / max(health.success_rate(), 0.05)
+
+    def ranked(self, providers):
+        """Urutkan provider yang sehat dari yang tercepat"""
+        healthy = [p for p in providers if self[p].is_available()]
+        return sorted(healthy, key=self.score)
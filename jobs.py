@@ -0,0 +1,184 @@
+import asyncio
+import json
+import sqlite3
+import time
+from collections import Counter
+from typing import Any, Dict, NamedTuple
+
+
+class Job(NamedTuple):
+    id: int
+    kind: str
+    payload: Dict[str, Any]
+    # True = sudah dibuang karena terlalu sering gagal, tidak dijalankan lagi
+    dropped: bool = False
+
+
+class JobQueue:
+    """Antrian job persisten di SQLite.
+
+    Job yang sedang berjalan saat proses mati tetap berstatus 'running' dan
+    dikembalikan ke antrian oleh `resume()` saat start berikutnya.
+    """
+
+    def __init__(self, path='jobs.db', max_pending=1000, max_attempts=3):
+        self.max_pending = max_pending
+        # Job yang terus gagal (misal bikin crash) dibuang setelah sekian percobaan
+        self.max_attempts = max_attempts
+        self._db = sqlite3.connect(path, isolation_level=None, check_same_thread=False)
+        self._db.execute("PRAGMA journal_mode=WAL")
+        self._db.execute(
+            "CREATE TABLE IF NOT EXISTS jobs ("
+            "id INTEGER PRIMARY KEY AUTOINCREMENT, kind TEXT NOT NULL, payload TEXT NOT NULL, "
+            "status TEXT NOT NULL DEFAULT 'pending', attempts INTEGER NOT NULL DEFAULT 0, "
+            "created_at REAL NOT NULL)"
+        )
+        self._wakeup = asyncio.Event()
+        self.active = self._db.execute("SELECT COUNT(*) FROM jobs").fetchone()[0]
+        self.failed = 0
+
+    def enqueue(self, kind, payload):
+        """Tambah job, return id; None jika antrian penuh"""
+        if self.active >= self.max_pending:
+            return None
+        cursor = self._db.execute(
+            "INSERT INTO jobs (kind, payload, created_at) VALUES (?, ?, ?)",
+            (kind, json.dumps(payload), time.time())
+        )
+        self.active += 1
+        self._wakeup.set()
+        return cursor.lastrowid
+
+    def resume(self):
+        """Kembalikan job yang terputus ke antrian, return jumlahnya"""
+        cursor = self._db.execute("UPDATE jobs SET status = 'pending' WHERE status = 'running'")
+        if cursor.rowcount:
+            self._wakeup.set()
+        return cursor.rowcount
+
+    def _claim(self, exclude=()):
+        while True:
+            skip = tuple(exclude)
+            row = self._db.execute(
+                "SELECT id, kind, payload, attempts FROM jobs WHERE status = 'pending' "
+                f"AND kind NOT IN ({', '.join('?' * len(skip))}) ORDER BY id LIMIT 1",
+                skip
+            ).fetchone()
+            if row is None:
+                return None
+            job_id, kind, payload, attempts = row
+            if attempts >= self.max_attempts:
+                print(f"Job {job_id} ({kind}) dibuang setelah {attempts} percobaan")
+                self.finish(job_id, ok=False)
+                return Job(job_id, kind, json.loads(payload), dropped=True)
+            self._db.execute("UPDATE jobs SET status = 'running', attempts = attempts + 1 WHERE id = ?", (job_id,))
+            return Job(job_id, kind, json.loads(payload))
+
+    async def get(self, exclude=()):
+        """Tunggu dan ambil job berikutnya (FIFO), lewati jenis job di `exclude`.
+
+        Job yang dibuang setelah `max_attempts` juga dikembalikan (dropped=True)
+        supaya pemanggil bisa memberi tahu user.
+        """
+        while True:
+            job = self._claim(exclude)
+            if job is not None:
+                return job
+            self._wakeup.clear()
+            await self._wakeup.wait()
+
+    def wake(self):
+        """Bangunkan worker yang menunggu, misal setelah batas per jenis job longgar"""
+        self._wakeup.set()
+
+    def finish(self, job_id, ok=True):
+        self._db.execute("DELETE FROM jobs WHERE id = ?", (job_id,))
+        self.active -= 1
+        if not ok:
+            self.failed += 1
+
+    def __len__(self):
+        return self.active
+
+    def close(self):
+        self._db.close()
+
+
+class WorkerPool:
+    """Sejumlah worker async yang menjalankan job dari JobQueue.
+
+    `handlers` = {kind: async function(bot, payload)}. `limits` = {kind: maksimal
+    job berjalan bersamaan}, supaya job berat (misal bulk) tidak memakai semua
+    worker dan job ringan tetap jalan. `on_failure` = async function(bot, payload)
+    yang dipanggil jika job gagal atau dibuang.
+    """
+
+    def __init__(self, queue, handlers, workers=8, limits=None, on_failure=None):
+        self.queue = queue
+        self.handlers = handlers
+        self.on_failure = on_failure
+        self.workers = workers
+        self.limits = limits or {}
+        self.running = Counter()
+        # Jenis job yang sedang mencapai batasnya (dibaca queue.get setiap klaim)
+        self._saturated = set()
+        self._stopping = False
+        self._tasks = []
+
+    def start(self, bot):
+        self._stopping = False
+        self._tasks = [asyncio.create_task(self._work(bot)) for _ in range(self.workers)]
+
+    def _track(self, kind, delta):
+        self.running[kind] += delta
+        limit = self.limits.get(kind)
+        if limit is None:
+            return
+        if self.running[kind] >= limit:
+            self._saturated.add(kind)
+        elif kind in self._saturated:
+            self._saturated.discard(kind)
+            self.queue.wake()
+
+    async def _work(self, bot):
+        while True:
+            job = await self.queue.get(self._saturated)
+            if job.dropped:
+                await self._failed(bot, job)
+                continue
+            ok = True
+            self._track(job.kind, 1)
+            try:
+                await self.handlers[job.kind](bot, job.payload)
+            except asyncio.CancelledError:
+                # Worker dihentikan: job tetap 'running' dan dilanjutkan saat start
+                # berikutnya. Selain itu yang batal hanya job-nya, worker jalan terus.
+                if self._stopping:
+                    raise
+                print(f"Job {job.id} ({job.kind}) dibatalkan")
+                ok = False
+            except Exception as e:
+                print(f"Error job {job.id} ({job.kind}): {e}")
+                ok = False
+            finally:
+                self._track(job.kind, -1)
+            self.queue.finish(job.id, ok)
+            if not ok:
+                await self._failed(bot, job)
+
+    async def _failed(self, bot, job):
+        """Beri tahu lewat `on_failure`; kegagalannya sendiri hanya dicatat"""
+        if self.on_failure is None:
+            return
+        try:
+            await self.on_failure(bot, job.payload)
+        except Exception as e:
+            print(f"Error memberi tahu kegagalan job {job.id} ({job.kind}): {e}")
+
+    async def stop(self):
+        """Hentikan worker; job yang terputus dilanjutkan saat start berikutnya"""
+        self._stopping = True
+        for task in self._tasks:
+            task.cancel()
+        await asyncio.gather(*self._tasks, return_exceptions=True)
+        self._tasks = []
@@ -0,0 +1,174 @@
+import asyncio
+import sqlite3
+from urllib.parse import unquote, urlsplit
+
+from providers import Provider
+
+BASE62 = '0123456789abcdefghijklmnopqrstuvwxyzABCDEFGHIJKLMNOPQRSTUVWXYZ'
+
+
+def base62(number):
+    if number == 0:
+        return BASE62[0]
+    digits = []
+    while number:
+        number, rest = divmod(number, 62)
+        digits.append(BASE62[rest])
+    return ''.join(reversed(digits))
+
+
+class LinkStore:
+    """Mapping kode -> URL: append-only di SQLite, lookup dari index di memory.
+
+    Beberapa proses boleh memakai file yang sama: kode otomatis tiap shard
+    diambil dari deret counter berbeda, dan kode yang tidak ada di index dicari
+    di SQLite (dibuat proses lain).
+    """
+
+    def __init__(self, path='links.db', shard=0, shards=1):
+        self.shard = shard
+        self.shards = shards
+        self._db = sqlite3.connect(path, isolation_level=None, check_same_thread=False)
+        self._db.execute("PRAGMA journal_mode=WAL")
+        self._db.execute("PRAGMA synchronous=NORMAL")
+        self._db.execute(
+            "CREATE TABLE IF NOT EXISTS links ("
+            "id INTEGER PRIMARY KEY AUTOINCREMENT, code TEXT NOT NULL UNIQUE, "
+            "url TEXT NOT NULL, is_alias INTEGER NOT NULL DEFAULT 0)"
+        )
+        self.codes = {}  # kode -> URL
+        self.generated = {}  # URL -> kode otomatis, supaya URL sama dapat kode sama
+        self.counter = 0
+        for row_id, code, url, is_alias in self._db.execute("SELECT id, code, url, is_alias FROM links ORDER BY id"):
+            self.codes[code] = url
+            if not is_alias:
+                self.generated.setdefault(url, code)
+            self.counter = row_id
+
+    def _append(self, code, url, is_alias):
+        """Simpan mapping baru; False jika kode sudah dipakai (misal oleh proses lain)"""
+        try:
+            self._db.execute("INSERT INTO links (code, url, is_alias) VALUES (?, ?, ?)", (code, url, int(is_alias)))
+        except sqlite3.IntegrityError:
+            return False
+        self.codes[code] = url
+        return True
+
+    def create(self, url, alias=None):
+        """Return kode untuk URL; None jika alias sudah dipakai URL lain"""
+        if alias:
+            existing = self.resolve(alias)
+            if existing is None and self._append(alias, url, True):
+                return alias
+            return alias if (existing or self.resolve(alias)) == url else None
+
+        code = self.generated.get(url)
+        if code is not None:
+            return code
+        # Kode dari counter monoton (deret milik shard ini), lewati yang bentrok
+        while True:
+            self.counter += 1
+            if self.counter % self.shards != self.shard:
+                continue
+            code = base62(self.counter)
+            if code not in self.codes and self._append(code, url, False):
+                break
+        self.generated[url] = code
+        return code
+
+    def resolve(self, code):
+        url = self.codes.get(code)
+        if url is None:
+            row = self._db.execute("SELECT url FROM links WHERE code = ?", (code,)).fetchone()
+            if row:
+                url = self.codes[code] = row[0]
+        return url
+
+    def __len__(self):
+        return len(self.codes)
+
+    def close(self):
+        self._db.close()
+
+
+class LocalProvider(Provider):
+    """Provider shortener bawaan, tanpa request HTTP ke pihak ketiga"""
+
+    is_local = True
+
+    def __init__(self, store, base_url, description='Shortener bawaan bot, selalu tersedia'):
+        self.base_url = base_url.rstrip('/')
+        host = urlsplit(self.base_url).netloc
+        super().__init__('local', host, host, '/{alias}', parser=None,
+                         alias_path='/{alias}', description=description)
+        self.store = store
+
+    def alias_taken(self, alias):
+        return self.store.resolve(alias) is not None
+
+    async def shorten(self, long_url, custom_alias=None):
+        code = self.store.create(long_url, custom_alias)
+        if code is None:
+            # Format error sama dengan is.gd supaya flow /custom bisa dipakai ulang
+            return f"ERROR:2:Alias {custom_alias} sudah dipakai"
+        return f"{self.base_url}/{code}"
+
+
+class RedirectServer:
+    """Server HTTP kecil yang menjawab /<kode> dengan redirect dari index di memory.
+
+    Request line dan header harus selesai dibaca dalam `timeout` detik, supaya
+    client yang diam atau mengirim sangat lambat tidak menahan koneksi.
+    """
+
+    def __init__(self, store, timeout=10):
+        self.store = store
+        self.timeout = timeout
+        self._server = None
+
+    @staticmethod
+    async def _read_head(reader):
+        """Baca request line dan buang header, return request line"""
+        request_line = await reader.readline()
+        while (await reader.readline()).strip():
+            pass
+        return request_line
+
+    async def _respond(self, writer, status, headers='', body=b'', send_body=True):
+        writer.write(
+            f"HTTP/1.1 {status}\r\n{headers}Content-Length: {len(body)}\r\nConnection: close\r\n\r\n".encode()
+            + (body if send_body else b'')
+        )
+        await asyncio.wait_for(writer.drain(), self.timeout)
+
+    async def _handle_client(self, reader, writer):
+        try:
+            try:
+                request_line = await asyncio.wait_for(self._read_head(reader), self.timeout)
+            except (ValueError, asyncio.LimitOverrunError):
+                # Request line atau header melebihi batas buffer StreamReader
+                await self._respond(writer, "400 Bad Request", "Content-Type: text/plain\r\n", b'bad request\n')
+                return
+            parts = request_line.decode('latin-1').split()
+            method = parts[0] if parts else ''
+            code = unquote(urlsplit(parts[1]).path.strip('/')) if len(parts) > 1 else ''
+
+            url = self.store.resolve(code) if method in ('GET', 'HEAD') else None
+            if url:
+                await self._respond(writer, "301 Moved Permanently", f"Location: {url}\r\n")
+            else:
+                await self._respond(
+                    writer, "404 Not Found", "Content-Type: text/plain\r\n", b'not found\n', method != 'HEAD'
+                )
+        except (ConnectionError, UnicodeDecodeError, ValueError, asyncio.TimeoutError):
+            pass
+        finally:
+            writer.close()
+
+    async def start(self, host, port):
+        self._server = await asyncio.start_server(self._handle_client, host, port)
+        return self
+
+    def close(self):
+        if self._server is not None:
+            self._server.close()
@@ -0,0 +1,232 @@
+import asyncio
+import functools
+import time
+
+from telegram.request import HTTPXRequest
+
+from stats import LATENCY_BUCKETS
+
+
+def _escape(value):
+    return str(value).replace('\\', '\\\\').replace('"', '\\"').replace('\n', '\\n')
+
+
+def _format_labels(labelnames, values):
+    if not labelnames:
+        return ""
+    pairs = ",".join(f'{name}="{_escape(value)}"' for name, value in zip(labelnames, values))
+    return "{" + pairs + "}"
+
+
+def _format_value(value):
+    if value == float('inf'):
+        return "+Inf"
+    return repr(float(value)) if isinstance(value, float) else str(value)
+
+
+class Metric:
+    kind = 'untyped'
+
+    def __init__(self, name, help_text, labelnames=()):
+        self.name = name
+        self.help_text = help_text
+        self.labelnames = tuple(labelnames)
+        self._values = {}
+
+    def header(self):
+        return [f"# HELP {self.name} {self.help_text}", f"# TYPE {self.name} {self.kind}"]
+
+
+class _Scalar(Metric):
+    def __init__(self, name, help_text, labelnames=()):
+        super().__init__(name, help_text, labelnames)
+        self._callbacks = {}
+
+    def inc(self, *labels, amount=1):
+        self._values[labels] = self._values.get(labels, 0) + amount
+
+    def set_function(self, *labels, function):
+        """Nilai dibaca dari function saat scrape, tanpa biaya di hot path"""
+        self._callbacks[labels] = function
+
+    def render(self):
+        lines = self.header()
+        values = dict(self._values)
+        for labels, function in self._callbacks.items():
+            values[labels] = function()
+        for labels, value in values.items():
+            lines.append(f"{self.name}{_format_labels(self.labelnames, labels)} {_format_value(value)}")
+        return lines
+
+
+class Counter(_Scalar):
+    kind = 'counter'
+
+
+class Gauge(_Scalar):
+    kind = 'gauge'
+
+    def dec(self, *labels, amount=1):
+        self._values[labels] = self._values.get(labels, 0) - amount
+
+    def set(self, *labels, value):
+        self._values[labels] = value
+
+
+class Histogram(Metric):
+    kind = 'histogram'
+
+    def __init__(self, name, help_text, labelnames=(), buckets=LATENCY_BUCKETS):
+        super().__init__(name, help_text, labelnames)
+        self.buckets = tuple(buckets)
+
+    def observe(self, *labels, value):
+        entry = self._values.get(labels)
+        if entry is None:
+            # [count per bucket..., sum]
+            entry = self._values[labels] = [0] * len(self.buckets) + [0.0]
+        for i, bound in enumerate(self.buckets):
+            if value <= bound:
+                entry[i] += 1
+                break
+        entry[-1] += value
+
+    def render(self):
+        lines = self.header()
+        bucket_labels = self.labelnames + ('le',)
+        for labels, entry in self._values.items():
+            cumulative = 0
+            for bound, count in zip(self.buckets, entry):
+                cumulative += count
+                lines.append(
+                    f"{self.name}_bucket{_format_labels(bucket_labels, labels + (_format_value(bound),))} {cumulative}"
+                )
+            label_text = _format_labels(self.labelnames, labels)
+            lines.append(f"{self.name}_sum{label_text} {entry[-1]!r}")
+            lines.append(f"{self.name}_count{label_text} {cumulative}")
+        return lines
+
+
+class Registry:
+    def __init__(self):
+        self.metrics = []
+
+    def register(self, metric):
+        self.metrics.append(metric)
+        return metric
+
+    def render(self):
+        lines = []
+        for metric in self.metrics:
+            lines.extend(metric.render())
+        return "\n".join(lines) + "\n"
+
+
+registry = Registry()
+
+handler_latency = registry.register(Histogram(
+    'bot_handler_duration_seconds', 'Durasi handler Telegram per command/callback', ('handler',)))
+handler_errors = registry.register(Counter(
+    'bot_handler_errors_total', 'Jumlah exception di handler', ('handler',)))
+in_flight = registry.register(Gauge(
+    'bot_in_flight_requests', 'Jumlah handler yang sedang berjalan', ('handler',)))
+provider_latency = registry.register(Histogram(
+    'bot_provider_request_duration_seconds', 'Durasi request ke provider shortener', ('provider',)))
+provider_requests = registry.register(Counter(
+    'bot_provider_requests_total', 'Jumlah request ke provider per hasil', ('provider', 'outcome')))
+telegram_latency = registry.register(Histogram(
+    'bot_telegram_api_duration_seconds', 'Durasi panggilan Telegram Bot API', ('method',)))
+telegram_errors = registry.register(Counter(
+    'bot_telegram_api_errors_total', 'Jumlah panggilan Telegram Bot API yang gagal', ('method',)))
+telegram_outbound = registry.register(Counter(
+    'bot_telegram_outbound_total', 'Pesan keluar ke Telegram: terkirim, digabung, dilewati, diulang', ('outcome',)))
+state_size = registry.register(Gauge(
+    'bot_state_entries', 'Jumlah entry di state store', ('store',)))
+queue_depth = registry.register(Gauge(
+    'bot_provider_queue_depth', 'Jumlah request yang menunggu rate limit provider', ('provider',)))
+coalesced_requests = registry.register(Counter(
+    'bot_coalesced_requests_total', 'Jumlah panggilan shorten yang ikut request identik yang sedang berjalan'))
+job_queue_depth = registry.register(Gauge(
+    'bot_job_queue_depth', 'Jumlah job shortening yang antri atau sedang berjalan'))
+speculative_requests = registry.register(Counter(
+    'bot_speculative_requests_total', 'Shorten spekulatif: dimulai, tebakan tepat, tebakan salah', ('outcome',)))
+provider_retries = registry.register(Counter(
+    'bot_provider_retries_total', 'Jumlah retry request provider', ('provider',)))
+provider_timeouts = registry.register(Counter(
+    'bot_provider_timeouts_total', 'Jumlah request provider yang kena timeout', ('provider',)))
+provider_timeout_seconds = registry.register(Gauge(
+    'bot_provider_timeout_seconds', 'Timeout adaptif request provider saat ini', ('provider', 'phase')))
+retry_budget_denied = registry.register(Counter(
+    'bot_retry_budget_denied_total', 'Jumlah retry yang tidak dijalankan karena budget retry habis'))
+cache_lookups = registry.register(Counter(
+    'bot_cache_lookups_total', 'Jumlah lookup cache hasil per hasil', ('result',)))
+
+
+def observe_provider(provider, ok, latency):
+    """Listener URLShortener untuk latency dan hasil request provider"""
+    provider_latency.observe(provider, value=latency)
+    provider_requests.inc(provider, 'success' if ok else 'failure')
+
+
+def instrument(name, handler):
+    """Bungkus handler: catat durasi, error dan jumlah yang sedang berjalan.
+
+    `name` boleh berupa string atau function(update) -> string.
+    """
+    @functools.wraps(handler)
+    async def wrapper(update, context):
+        label = name(update) if callable(name) else name
+        in_flight.inc(label)
+        start = time.perf_counter()
+        try:
+            return await handler(update, context)
+        except Exception:
+            handler_errors.inc(label)
+            raise
+        finally:
+            handler_latency.observe(label, value=time.perf_counter() - start)
+            in_flight.dec(label)
+
+    return wrapper
+
+
+class InstrumentedRequest(HTTPXRequest):
+    """HTTPXRequest yang mencatat latency setiap panggilan Bot API"""
+
+    async def do_request(self, url, method, *args, **kwargs):
+        api_method = url.rsplit('/', 1)[-1]
+        start = time.perf_counter()
+        try:
+            return await super().do_request(url, method, *args, **kwargs)
+        except Exception:
+            telegram_errors.inc(api_method)
+            raise
+        finally:
+            telegram_latency.observe(api_method, value=time.perf_counter() - start)
+
+
+async def _handle_client(reader, writer):
+    try:
+        request_line = await reader.readline()
+        # Abaikan header request
+        while (await reader.readline()).strip():
+            pass
+        path = request_line.split()[1].decode() if len(request_line.split()) > 1 else '/'
+        if path.split('?')[0] == '/metrics':
+            status, body = "200 OK", registry.render().encode()
+        else:
+            status, body = "404 Not Found", b"not found\n"
+        writer.write(
+            f"HTTP/1.1 {status}\r\n"
+            "Content-Type: text/plain; version=0.0.4; charset=utf-8\r\n"
+            f"Content-Length: {len(body)}\r\n"
+            "Connection: close\r\n\r\n".encode() + body
+        )
+        await writer.drain()
+    finally:
+        writer.close()
+
+
+async def start_server(host, port):
+    """Jalankan endpoint /metrics format Prometheus"""
+    return await asyncio.start_server(_handle_client, host, port)
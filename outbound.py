@@ -0,0 +1,159 @@
+import asyncio
+import itertools
+import time
+from collections import OrderedDict
+from typing import NamedTuple
+
+from telegram.error import RetryAfter
+from telegram.ext import BaseRateLimiter
+
+from scheduler import TokenBucket
+
+# Endpoint yang mengirim/mengubah pesan dan terkena flood limit Telegram
+LIMITED_ENDPOINTS = frozenset({
+    'sendMessage', 'editMessageText', 'editMessageReplyMarkup', 'sendDocument',
+    'sendPhoto', 'copyMessage', 'forwardMessage',
+})
+
+
+class Interim(NamedTuple):
+    """rate_limit_args untuk pesan sementara (misal ⏳) yang boleh dilewati"""
+    created: float
+
+
+def interim():
+    return Interim(time.monotonic())
+
+
+class OutboundLimiter(BaseRateLimiter):
+    """Rate limiter panggilan Bot API.
+
+    - limit global dan per chat (token bucket, chat pribadi dan grup beda limit)
+    - RetryAfter (429) ditunggu lalu dicoba lagi
+    - edit beruntun ke pesan yang sama digabung: edit yang masih menunggu
+      giliran dilewati jika sudah ada edit yang lebih baru
+    - edit `Interim` ditunda `interim_delay` detik dan dilewati jika hasil
+      akhir untuk pesan itu sudah dikirim lebih dulu
+    - edit ke pesan yang sama dikirim berurutan, supaya interim yang sedang
+      dikirim tidak menimpa hasil akhir yang menyusul
+    """
+
+    def __init__(self, global_rate=30, chat_rate=1, group_rate=20 / 60, chat_burst=3,
+                 interim_delay=0.5, max_retries=3, max_chats=10000):
+        self.global_bucket = TokenBucket(global_rate, global_rate)
+        self.chat_rate = chat_rate
+        self.group_rate = group_rate
+        self.chat_burst = chat_burst
+        self.interim_delay = interim_delay
+        self.max_retries = max_retries
+        self.max_chats = max_chats
+        self._chats = OrderedDict()
+        # (chat_id, message_id) -> nomor urut edit terbaru yang sedang diproses
+        self._latest_edit = {}
+        # (chat_id, message_id) -> waktu edit biasa terakhir, untuk membatalkan interim
+        self._last_final = OrderedDict()
+        # (chat_id, message_id) -> [lock, jumlah pemakai], dihapus saat tidak dipakai
+        self._locks = {}
+        self._sequence = itertools.count()
+        self.sent = 0
+        self.merged = 0
+        self.skipped = 0
+        self.retried = 0
+
+    async def initialize(self):
+        pass
+
+    async def shutdown(self):
+        pass
+
+    def _chat_bucket(self, chat_id):
+        bucket = self._chats.get(chat_id)
+        if bucket is None:
+            # Chat id negatif = grup/channel, limitnya jauh lebih ketat
+            rate = self.group_rate if str(chat_id).startswith('-') else self.chat_rate
+            bucket = self._chats[chat_id] = TokenBucket(rate, self.chat_burst)
+            if len(self._chats) > self.max_chats:
+                self._chats.popitem(last=False)
+        else:
+            self._chats.move_to_end(chat_id)
+        return bucket
+
+    @staticmethod
+    async def _take(bucket):
+        while not bucket.try_take():
+            await asyncio.sleep(bucket.wait_time())
+
+    async def _take_tokens(self, endpoint, chat_id):
+        if endpoint in LIMITED_ENDPOINTS:
+            if chat_id is not None:
+                await self._take(self._chat_bucket(chat_id))
+            await self._take(self.global_bucket)
+
+    def _mark_final(self, key):
+        self._last_final[key] = time.monotonic()
+        self._last_final.move_to_end(key)
+        if len(self._last_final) > self.max_chats:
+            self._last_final.popitem(last=False)
+
+    def _superseded(self, key, sequence, rate_limit_args):
+        """Cek apakah edit ini sudah tidak perlu dikirim"""
+        if self._latest_edit.get(key) != sequence:
+            # Sudah ada edit lebih baru untuk pesan ini
+            self.merged += 1
+            return True
+        if isinstance(rate_limit_args, Interim) and self._last_final.get(key, float('-inf')) >= rate_limit_args.created:
+            # Hasil akhir menyusul saat interim menunggu giliran
+            self.skipped += 1
+            return True
+        return False
+
+    async def _send(self, callback, args, kwargs, endpoint, key, sequence, rate_limit_args):
+        for attempt in itertools.count():
+            if key is not None and self._superseded(key, sequence, rate_limit_args):
+                return True
+            try:
+                result = await callback(*args, **kwargs)
+                self.sent += 1
+                return result
+            except RetryAfter as e:
+                if attempt >= self.max_retries:
+                    raise
+                self.retried += 1
+                print(f"Telegram flood limit ({endpoint}), tunggu {e.retry_after} detik")
+                await asyncio.sleep(e.retry_after)
+
+    async def process_request(self, callback, args, kwargs, endpoint, data, rate_limit_args):
+        chat_id = data.get('chat_id')
+        key = None
+        if endpoint == 'editMessageText' and data.get('message_id') is not None:
+            key = (chat_id, data['message_id'])
+
+        if isinstance(rate_limit_args, Interim) and key is not None:
+            # Tunggu sebentar: jika hasil akhir sudah ada, pesan ⏳ tidak perlu dikirim
+            await asyncio.sleep(max(0.0, rate_limit_args.created + self.interim_delay - time.monotonic()))
+            if self._last_final.get(key, float('-inf')) >= rate_limit_args.created:
+                self.skipped += 1
+                return True
+        elif key is not None:
+            self._mark_final(key)
+
+        if key is None:
+            await self._take_tokens(endpoint, chat_id)
+            return await self._send(callback, args, kwargs, endpoint, None, None, rate_limit_args)
+
+        sequence = next(self._sequence)
+        self._latest_edit[key] = sequence
+        entry = self._locks.setdefault(key, [asyncio.Lock(), 0])
+        entry[1] += 1
+        try:
+            await self._take_tokens(endpoint, chat_id)
+            # Edit ke pesan yang sama dikirim satu per satu; status dicek ulang
+            # setelah dapat giliran karena edit lain bisa selesai lebih dulu
+            async with entry[0]:
+                return await self._send(callback, args, kwargs, endpoint, key, sequence, rate_limit_args)
+        finally:
+            entry[1] -= 1
+            if not entry[1]:
+                del self._locks[key]
+            if self._latest_edit.get(key) == sequence:
+                del self._latest_edit[key]
@@ -0,0 +1,80 @@
+import base64
+import hashlib
+import hmac
+import sqlite3
+import time
+
+# Batas panjang callback_data Telegram (byte)
+CALLBACK_DATA_LIMIT = 64
+# Panjang tanda tangan data inline dan panjang ref (karakter base64url)
+TAG_LENGTH = 6
+REF_LENGTH = 16
+REF_MARKER = '!'
+
+
+def _digest(secret, value):
+    mac = hmac.new(secret, value.encode(), hashlib.sha256).digest()
+    return base64.urlsafe_b64encode(mac).decode().rstrip('=')
+
+
+class PayloadStore:
+    """Data tombol inline (URL, daftar URL, alias) di dalam callback_data.
+
+    callback_data = <prefix><provider>:<token>. Token berisi nilai itu sendiri
+    plus tanda tangan pendek jika muat 64 byte, selain itu `!<ref>`: hash
+    bertanda tangan dari nilai yang disimpan di tabel SQLite global. Tidak ada
+    state per user, jadi banyak keyboard bisa aktif sekaligus dan tombol tetap
+    jalan setelah restart.
+    """
+
+    def __init__(self, secret, path=None, ttl=30 * 86400):
+        self.secret = secret.encode() if isinstance(secret, str) else secret
+        self.ttl = ttl
+        self._writes = 0
+        self._db = sqlite3.connect(path or ':memory:', isolation_level=None, check_same_thread=False)
+        self._db.execute("PRAGMA journal_mode=WAL")
+        self._db.execute(
+            "CREATE TABLE IF NOT EXISTS payloads (ref TEXT PRIMARY KEY, value TEXT NOT NULL, created_at REAL NOT NULL)"
+        )
+        self.purge()
+
+    def ref(self, value):
+        """Simpan nilai, return ref-nya (nilai sama = ref sama)"""
+        ref = _digest(self.secret, value)[:REF_LENGTH]
+        self._db.execute(
+            "INSERT OR REPLACE INTO payloads (ref, value, created_at) VALUES (?, ?, ?)", (ref, value, time.time())
+        )
+
+        # Bersihkan nilai kadaluarsa secara berkala
+        self._writes += 1
+        if self._writes % 1000 == 0:
+            self.purge()
+        return ref
+
+    def pack(self, prefix, provider, value):
+        """callback_data untuk tombol `provider` dengan nilai `value`"""
+        head = f"{prefix}{provider}:"
+        inline = f"{head}{_digest(self.secret, head + value)[:TAG_LENGTH]}{value}"
+        if len(inline.encode()) <= CALLBACK_DATA_LIMIT:
+            return inline
+        return f"{head}{REF_MARKER}{self.ref(value)}"
+
+    def unpack(self, callback_data, prefix=''):
+        """Return (provider, value); value None jika data tidak valid atau kadaluarsa"""
+        provider, _, token = callback_data[len(prefix):].partition(':')
+        if token.startswith(REF_MARKER):
+            row = self._db.execute("SELECT value FROM payloads WHERE ref = ?", (token[1:],)).fetchone()
+            return provider, row[0] if row else None
+
+        head = f"{prefix}{provider}:"
+        tag, value = token[:TAG_LENGTH], token[TAG_LENGTH:]
+        if not value or not hmac.compare_digest(tag, _digest(self.secret, head + value)[:TAG_LENGTH]):
+            return provider, None
+        return provider, value
+
+    def purge(self):
+        """Hapus nilai yang lebih tua dari TTL"""
+        self._db.execute("DELETE FROM payloads WHERE created_at < ?", (time.time() - self.ttl,))
+
+    def close(self):
+        self._db.close()
@@ -0,0 +1,179 @@
+import json
+import re
+from urllib.parse import quote
+
+# Batas ukuran body respon yang dibaca dari provider
+MAX_BODY_BYTES = 256 * 1024
+
+
+async def read_body(chunks, limit=MAX_BODY_BYTES):
+    """Baca body dari stream sampai habis atau sampai batas ukuran"""
+    body = bytearray()
+    async for chunk in chunks:
+        body += chunk
+        if len(body) >= limit:
+            del body[limit:]
+            break
+    return bytes(body)
+
+
+class TextParser:
+    """Body berisi short URL sebagai teks biasa"""
+
+    def __init__(self, ensure_scheme=False):
+        self.ensure_scheme = ensure_scheme
+
+    async def __call__(self, chunks):
+        # Respon teks biasa hanya berisi satu link, cukup baca sedikit
+        text = (await read_body(chunks, 4096)).decode('utf-8', 'replace').strip()
+        if not text:
+            return None
+        if self.ensure_scheme and not text.startswith('http'):
+            return f"https://{text}"
+        return text
+
+
+class PatternParser:
+    """Cari short URL di body (misal HTML) per baris, berhenti begitu ketemu.
+
+    `pattern` dicari lebih dulu; `fallback` hanya dipakai jika sampai akhir
+    body `pattern` tidak ditemukan. Group 1 (jika ada) dipakai sebagai hasil.
+    """
+
+    def __init__(self, pattern, fallback=None):
+        self.pattern = re.compile(pattern.encode())
+        self.fallback = re.compile(fallback.encode()) if fallback else None
+
+    @staticmethod
+    def _value(match):
+        return (match.group(1) if match.re.groups else match.group(0)).decode()
+
+    async def __call__(self, chunks):
+        pending = b''
+        fallback_match = None
+        read = 0
+        async for chunk in chunks:
+            read += len(chunk)
+            data = pending + chunk
+            # Pattern tidak melewati newline, jadi cukup scan baris yang sudah lengkap
+            cut = data.rfind(b'\n') + 1
+            lines, pending = data[:cut], data[cut:]
+            if lines:
+                match = self.pattern.search(lines)
+                if match:
+                    return self._value(match)
+                if fallback_match is None and self.fallback:
+                    fallback_match = self.fallback.search(lines)
+            if read >= MAX_BODY_BYTES:
+                break
+
+        if pending:
+            match = self.pattern.search(pending)
+            if match:
+                return self._value(match)
+            if fallback_match is None and self.fallback:
+                fallback_match = self.fallback.search(pending)
+        return self._value(fallback_match) if fallback_match else None
+
+
+class GdJSONParser:
+    """Format JSON is.gd/v.gd: shorturl atau ERROR:<kode>:<pesan>"""
+
+    async def __call__(self, chunks):
+        data = json.loads(await read_body(chunks, 16 * 1024))
+        if 'shorturl' in data:
+            return data['shorturl']
+        if 'errorcode' in data:
+            return f"ERROR:{data['errorcode']}:{data['errormessage']}"
+        return None
+
+
+class Provider:
+    """Deklarasi satu provider shortener"""
+
+    # Provider lokal dipanggil langsung tanpa request HTTP
+    is_local = False
+
+    def __init__(self, key, name, host, path, parser, method='GET', form_field=None,
+                 alias_path=None, alias_parser=None, description='', quote_safe='', lookup_path=None):
+        self.key = key
+        self.name = name
+        self.host = host
+        # Template path dengan placeholder {url} dan {alias}
+        self.path = path
+        self.parser = parser
+        self.method = method
+        # Untuk POST: nama field form yang berisi URL
+        self.form_field = form_field
+        self.alias_path = alias_path
+        self.alias_parser = alias_parser
+        self.description = description
+        # Karakter URL yang tidak di-encode saat dimasukkan ke query string provider
+        self.quote_safe = quote_safe
+        # Path short link untuk cek apakah alias sudah dipakai (redirect = dipakai)
+        self.lookup_path = lookup_path
+
+    @property
+    def supports_alias(self):
+        return self.alias_path is not None
+
+    def build_request(self, long_url, custom_alias=None):
+        """Return (method, path, form_data) untuk request ke provider"""
+        url = quote(long_url, safe=self.quote_safe)
+        if custom_alias and self.supports_alias:
+            return 'GET', self.alias_path.format(url=url, alias=quote(custom_alias, safe='')), None
+        if self.form_field:
+            # Body form di-encode oleh httpx
+            return self.method, self.path, {self.form_field: long_url}
+        return self.method, self.path.format(url=url), None
+
+    def parser_for(self, custom_alias=None):
+        return self.alias_parser if custom_alias and self.supports_alias else self.parser
+
+
+def gd_provider(key, host, description):
+    """is.gd dan v.gd memakai API yang sama"""
+    return Provider(
+        key, host, host,
+        path='/create.php?format=simple&url={url}',
+        parser=TextParser(),
+        alias_path='/create.php?format=json&url={url}&shorturl={alias}',
+        alias_parser=GdJSONParser(),
+        description=description,
+        lookup_path='/{alias}'
+    )
+
+
+# Urutan di sini = urutan tombol di keyboard
+PROVIDERS = {
+    provider.key: provider
+    for provider in (
+        Provider('click_ru', 'clck.ru', 'clck.ru', '/--?url={url}', TextParser(),
+                 description='Provider Rusia, cepat dan andal'),
+        Provider('da_gd', 'da.gd', 'da.gd', '/s?url={url}', TextParser(),
+                 description='Simple dan clean, tanpa tracking'),
+        Provider('osdb_link', 'osdb.link', 'osdb.link', '/',
+                 PatternParser(r'<label id=surl>.*?(http://osdb\.link/\w+)', r'http://osdb\.link/\w+'),
+                 method='POST', form_field='url',
+                 description='Open Source database link shortener'),
+        gd_provider('is_gd', 'is.gd', 'Minimalis, tanpa iklan & analytics'),
+        gd_provider('v_gd', 'v.gd', 'Versi custom dari is.gd'),
+        Provider('tinyurl', 'tinyurl.com', 'tinyurl.com', '/api-create.php?url={url}', TextParser(ensure_scheme=True),
+                 description='Legacy, terpercaya sejak 2002'),
+    )
+}
+
+# Provider yang support custom alias
+ALIAS_PROVIDERS = [key for key, provider in PROVIDERS.items() if provider.supports_alias]
+
+
+def register(provider):
+    """Tambah provider ke registry saat runtime (misal provider lokal)"""
+    PROVIDERS[provider.key] = provider
+    if provider.supports_alias and provider.key not in ALIAS_PROVIDERS:
+        ALIAS_PROVIDERS.append(provider.key)
+
+
+def provider_name(key):
+    provider = PROVIDERS.get(key)
+    return provider.name if provider else key
@@ -0,0 +1,136 @@
+import asyncio
+import time
+from collections import OrderedDict, deque
+
+
+class TokenBucket:
+    """Token bucket: `rate` token per detik, maksimal `burst` token tersimpan"""
+
+    def __init__(self, rate, burst):
+        self.rate = rate
+        self.burst = burst
+        self.tokens = float(burst)
+        self.updated = time.monotonic()
+
+    def _refill(self):
+        now = time.monotonic()
+        self.tokens = min(self.burst, self.tokens + (now - self.updated) * self.rate)
+        self.updated = now
+
+    def try_take(self):
+        self._refill()
+        if self.tokens >= 1:
+            self.tokens -= 1
+            return True
+        return False
+
+    def wait_time(self, needed=1):
+        """Detik sampai `needed` token tersedia"""
+        self._refill()
+        return max(0.0, (needed - self.tokens) / self.rate)
+
+
+class ProviderQueue:
+    """Antrian satu provider yang dibagi adil (round-robin) antar user"""
+
+    def __init__(self, bucket):
+        self.bucket = bucket
+        # user_id -> deque berisi future yang menunggu token
+        self.users = OrderedDict()
+        self.depth = 0
+        self._dispatcher = None
+
+    def position(self, user_id):
+        """Perkiraan posisi request baru user ini di antrian (1 = berikutnya)"""
+        own = len(self.users.get(user_id, ()))
+        ahead = own + sum(min(len(waiters), own + 1) for uid, waiters in self.users.items() if uid != user_id)
+        return ahead + 1
+
+    async def acquire(self, user_id):
+        if not self.depth and self.bucket.try_take():
+            return
+
+        future = asyncio.get_running_loop().create_future()
+        self.users.setdefault(user_id, deque()).append(future)
+        self.depth += 1
+        if self._dispatcher is None or self._dispatcher.done():
+            self._dispatcher = asyncio.ensure_future(self._dispatch())
+        await future
+
+    def _next_waiter(self):
+        """Ambil future berikutnya secara round-robin antar user"""
+        while self.users:
+            user_id, waiters = next(iter(self.users.items()))
+            future = waiters.popleft()
+            self.depth -= 1
+            if waiters:
+                self.users.move_to_end(user_id)
+            else:
+                del self.users[user_id]
+            if not future.done():
+                return future
+        return None
+
+    async def _dispatch(self):
+        while self.depth:
+            await asyncio.sleep(self.bucket.wait_time())
+            if not self.bucket.try_take():
+                continue
+            future = self._next_waiter()
+            if future is None:
+                # Semua yang menunggu sudah batal, kembalikan token
+                self.bucket.tokens += 1
+                break
+            future.set_result(None)
+
+
+class ProviderScheduler:
+    """Rate limit per provider (token bucket) dengan antrian fair per user.
+
+    Provider tanpa konfigurasi limit tidak pernah mengantri.
+    """
+
+    def __init__(self, limits=None):
+        # provider -> (request per menit, burst)
+        self._queues = {
+            provider: ProviderQueue(TokenBucket(per_minute / 60, burst))
+            for provider, (per_minute, burst) in (limits or {}).items()
+        }
+
+    async def acquire(self, provider, user_id=None):
+        queue = self._queues.get(provider)
+        if queue is not None:
+            await queue.acquire(user_id)
+
+    def queue_depth(self, provider):
+        queue = self._queues.get(provider)
+        return queue.depth if queue is not None else 0
+
+    def position(self, provider, user_id=None):
+        """Return (posisi, perkiraan tunggu detik) untuk request baru; (0, 0) jika tidak perlu antri"""
+        queue = self._queues.get(provider)
+        if queue is None:
+            return 0, 0.0
+        if not queue.depth and queue.bucket.wait_time() == 0:
+            return 0, 0.0
+        position = queue.position(user_id)
+        return position, queue.bucket.wait_time(position)
+
+    def expected_wait(self, provider):
+        queue = self._queues.get(provider)
+        if queue is None:
+            return 0.0
+        return queue.bucket.wait_time(queue.depth + 1)
+
+    def providers(self):
+        return list(self._queues)
+
+
+def parse_limits(text):
+    """Parse 'is_gd=60:5,v_gd=60' menjadi {provider: (per_menit, burst)}"""
+    limits = {}
+    for item in filter(None, (part.strip() for part in text.split(','))):
+        provider, _, spec = item.partition('=')
+        per_minute, _, burst = spec.partition(':')
+        limits[provider.strip()] = (float(per_minute), int(burst) if burst else 1)
+    return limits
@@ -0,0 +1,107 @@
+"""Jalankan bot di beberapa proses: satu proses front menerima update (polling)
+dan membaginya ke N proses worker berdasarkan user_id.
+
+Pemakaian: SHARDS=4 python sharding.py
+
+Setiap worker menjalankan Application lengkap dari bot.build_application().
+Cache hasil, state user, data tombol, link lokal memakai file SQLite yang sama; job dan
+statistik memakai file per shard (statistik digabung di /stats).
+"""
+import asyncio
+import multiprocessing
+import os
+import signal
+
+from dotenv import load_dotenv
+from telegram import Bot, Update
+from telegram.error import TelegramError
+
+load_dotenv('bot.env')
+
+TOKEN = os.getenv('TELEGRAM_BOT_TOKEN')
+SHARDS = int(os.getenv('SHARDS', str(os.cpu_count() or 1)))
+POLL_TIMEOUT = int(os.getenv('POLL_TIMEOUT', '30'))
+
+
+def shard_for(update, shards):
+    """User yang sama selalu ke worker yang sama; update tanpa user ke worker 0"""
+    user = update.effective_user
+    return user.id % shards if user else 0
+
+
+def run_worker(index, shards, updates):
+    """Entry point proses worker"""
+    # Ctrl+C ditangani proses front, worker berhenti lewat sentinel None
+    signal.signal(signal.SIGINT, signal.SIG_IGN)
+    # Konfigurasi bot dibaca saat import, jadi env shard diisi sebelum import
+    os.environ['SHARDS'] = str(shards)
+    os.environ['SHARD_INDEX'] = str(index)
+    import bot
+    asyncio.run(_serve(bot, updates))
+
+
+async def _serve(bot_module, updates):
+    app = bot_module.build_application()
+    loop = asyncio.get_running_loop()
+    async with app:
+        # post_init/post_shutdown hanya dipanggil run_polling, jadi dipanggil manual
+        await bot_module.on_startup(app)
+        await app.start()
+        try:
+            while True:
+                data = await loop.run_in_executor(None, updates.get)
+                if data is None:
+                    break
+                await app.update_queue.put(Update.de_json(data, app.bot))
+        finally:
+            await app.stop()
+            await bot_module.on_shutdown(app)
+
+
+async def _poll(queues):
+    """Ambil update dari Telegram dan teruskan ke worker sesuai user_id"""
+    async with Bot(TOKEN) as bot:
+        await bot.delete_webhook()
+        offset = None
+        while True:
+            try:
+                updates = await bot.get_updates(
+                    offset=offset, timeout=POLL_TIMEOUT, read_timeout=POLL_TIMEOUT + 10,
+                    allowed_updates=Update.ALL_TYPES
+                )
+            except TelegramError as e:
+                print(f"Error polling: {e}")
+                await asyncio.sleep(1)
+                continue
+            for update in updates:
+                queues[shard_for(update, len(queues))].put(update.to_dict())
+                offset = update.update_id + 1
+
+
+def main():
+    if not TOKEN:
+        print("❌ Token tidak ditemukan! Pastikan file bot.env ada")
+        return
+
+    # spawn: worker membuka koneksi SQLite/HTTP sendiri, tidak mewarisi dari front
+    context = multiprocessing.get_context('spawn')
+    queues = [context.Queue() for _ in range(SHARDS)]
+    workers = [context.Process(target=run_worker, args=(i, SHARDS, queue), name=f"shard-{i}")
+               for i, queue in enumerate(queues)]
+    for worker in workers:
+        worker.start()
+
+    print(f"🤖 Bot berjalan dengan {SHARDS} worker...")
+    try:
+        asyncio.run(_poll(queues))
+    except KeyboardInterrupt:
+        pass
+    finally:
+        for queue in queues:
+            queue.put(None)
+        for worker in workers:
+            worker.join()
+
+
+if __name__ == '__main__':
+    main()
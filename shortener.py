@@ -0,0 +1,435 @@
+import asyncio
+import itertools
+import time
+from collections import Counter
+from email.utils import parsedate_to_datetime
+from urllib.parse import quote
+
+import httpx
+
+from canonical import canonicalize
+from health import HealthTracker
+from providers import PROVIDERS, ALIAS_PROVIDERS
+from scheduler import ProviderScheduler
+from timeouts import AdaptiveTimeouts, RetryBudget
+
+# Key khusus untuk routing otomatis ke provider tercepat yang sehat
+AUTO_PROVIDER = 'auto'
+
+
+class _Flight:
+    """Satu request provider yang sedang berjalan beserta jumlah penunggunya"""
+    __slots__ = ('task', 'waiters')
+
+    def __init__(self, task):
+        self.task = task
+        self.waiters = 0
+
+
+class _Retryable(Exception):
+    """Error sementara dari provider yang aman diulang; `retry_after` dari header 429"""
+
+    def __init__(self, message, retry_after=None):
+        super().__init__(message)
+        self.retry_after = retry_after
+
+
+def _retry_after(response):
+    """Detik dari header Retry-After (angka atau tanggal HTTP), None jika tidak ada"""
+    value = response.headers.get('retry-after')
+    if not value:
+        return None
+    try:
+        return max(0.0, float(value))
+    except ValueError:
+        pass
+    try:
+        return max(0.0, parsedate_to_datetime(value).timestamp() - time.time())
+    except (TypeError, ValueError):
+        return None
+
+
+def is_valid_result(short_url):
+    """Hasil dianggap valid jika berupa link http(s) atau error dari provider"""
+    return bool(short_url) and short_url.startswith(('http://', 'https://', 'ERROR:'))
+
+
+class URLShortener:
+    def __init__(self, timeout=10, max_connections=10, keepalive_expiry=30, provider_concurrency=8,
+                 cache=None, health=None, hedge_percentile=90, hedge_default_delay=1.0, base_urls=None,
+                 scheduler=None, timeouts=None, retry_budget=None, max_retries=2):
+        self.timeout = timeout
+        # Override base URL per host, misal untuk fake provider di benchmark
+        self.base_urls = base_urls or {}
+        self.hedge_percentile = hedge_percentile
+        self.hedge_default_delay = hedge_default_delay
+        self.cache = cache
+        self.health = health if health is not None else HealthTracker()
+        self.scheduler = scheduler if scheduler is not None else ProviderScheduler()
+        # Timeout per request dari latency provider (`timeout` = batas atas default)
+        self.timeouts = timeouts if timeouts is not None else AdaptiveTimeouts(self.health, ceiling=timeout)
+        self.retry_budget = retry_budget if retry_budget is not None else RetryBudget()
+        self.max_retries = max_retries
+        # provider -> jumlah retry dan jumlah request yang kena timeout
+        self.retries = Counter()
+        self.timed_out = Counter()
+        # Callback (provider, ok, latency) setiap request provider selesai
+        self.listeners = []
+        self.provider_concurrency = provider_concurrency
+        self.limits = httpx.Limits(
+            max_connections=max_connections,
+            max_keepalive_connections=max_connections,
+            keepalive_expiry=keepalive_expiry
+        )
+        self._clients = {}
+        self._semaphores = {}
+        self._in_flight = {}
+        # Jumlah panggilan yang ikut menunggu request identik yang sudah berjalan
+        self.coalesced = 0
+
+    def _semaphore(self, provider):
+        """Batasi jumlah request paralel ke satu provider"""
+        semaphore = self._semaphores.get(provider)
+        if semaphore is None:
+            semaphore = asyncio.Semaphore(self.provider_concurrency)
+            self._semaphores[provider] = semaphore
+        return semaphore
+
+    def _client(self, provider):
+        """Ambil (atau buat) AsyncClient keep-alive untuk host provider"""
+        host = PROVIDERS[provider].host
+        client = self._clients.get(host)
+        if client is None:
+            client = httpx.AsyncClient(
+                base_url=self.base_urls.get(host, f"https://{host}"),
+                timeout=self.timeout,
+                limits=self.limits,
+                follow_redirects=True
+            )
+            self._clients[host] = client
+        return client
+
+    async def close(self):
+        """Tutup semua connection pool"""
+        for client in self._clients.values():
+            await client.aclose()
+        self._clients.clear()
+
+    async def shorten_many(self, urls, provider, custom_alias=None, user_id=None):
+        """Shorten banyak URL secara paralel, yield (index, short_url) sesuai urutan selesai"""
+        semaphore = self._semaphore(provider)
+
+        async def worker(index, url):
+            async with semaphore:
+                if provider == AUTO_PROVIDER:
+                    return index, (await self.shorten_auto(url, custom_alias, user_id))[1]
+                return index, await self.shorten_url(url, provider, custom_alias, user_id)
+
+        tasks = [asyncio.ensure_future(worker(i, url)) for i, url in enumerate(urls)]
+        try:
+            for next_done in asyncio.as_completed(tasks):
+                yield await next_done
+        finally:
+            for task in tasks:
+                task.cancel()
+
+    def _candidates(self, providers):
+        """Provider sehat urut antrian lalu skor kesehatan; provider lokal hanya menang jika seri"""
+        return sorted(self.health.ranked(providers),
+                      key=lambda provider: (self.scheduler.expected_wait(provider), self.health.score(provider),
+                                            not PROVIDERS[provider].is_local))
+
+    def idle_providers(self, providers):
+        """Provider luar yang sehat dan tidak sedang antri rate limit, tercepat dulu"""
+        return [
+            provider for provider in self._candidates(providers)
+            if not PROVIDERS[provider].is_local and not self.scheduler.expected_wait(provider)
+        ]
+
+    def cached(self, long_url, providers):
+        """Return {provider: short_url} yang sudah ada di cache, tanpa request ke provider"""
+        if self.cache is None:
+            return {}
+        long_url = canonicalize(long_url) or long_url
+        results = {provider: self.cache.peek(long_url, provider) for provider in providers}
+        return {provider: short_url for provider, short_url in results.items() if short_url}
+
+    async def shorten_auto(self, long_url, custom_alias=None, user_id=None):
+        """Shorten dengan provider tercepat yang sehat, failover jika gagal.
+
+        Return (provider, short_url); (None, None) jika semua provider gagal.
+        """
+        candidates = ALIAS_PROVIDERS if custom_alias else tuple(PROVIDERS)
+        for provider in self._candidates(candidates):
+            short_url = await self.shorten_url(long_url, provider, custom_alias, user_id)
+            if is_valid_result(short_url):
+                return provider, short_url
+        return None, None
+
+    def hedge_delay(self, provider):
+        """Waktu tunggu sebelum request cadangan: persentil latency provider"""
+        latency = self.health[provider].percentile(self.hedge_percentile)
+        return latency if latency is not None else self.hedge_default_delay
+
+    async def shorten_hedged(self, long_url, max_parallel=3, delay=None, user_id=None):
+        """Race beberapa provider, ambil link http(s) pertama dan batalkan sisanya.
+
+        Request cadangan baru dikirim jika request sebelumnya belum menjawab
+        dalam `delay` detik (default: persentil latency provider tersebut),
+        atau langsung jika request sebelumnya gagal.
+        Return (provider, short_url); (None, None) jika semua provider gagal.
+        """
+        candidates = iter(self._candidates(tuple(PROVIDERS)))
+        pending = {}
+        last_provider = None
+
+        def launch():
+            nonlocal last_provider
+            provider = next(candidates, None)
+            if provider is None:
+                return False
+            pending[asyncio.ensure_future(self.shorten_url(long_url, provider, user_id=user_id))] = provider
+            last_provider = provider
+            return True
+
+        exhausted = not launch()
+        try:
+            while pending:
+                timeout = None
+                if not exhausted and len(pending) < max_parallel:
+                    timeout = delay if delay is not None else self.hedge_delay(last_provider)
+
+                done, _ = await asyncio.wait(pending, timeout=timeout, return_when=asyncio.FIRST_COMPLETED)
+                if not done:
+                    # Provider belum menjawab, kirim request cadangan
+                    exhausted = not launch()
+                    continue
+
+                for task in done:
+                    provider = pending.pop(task)
+                    short_url = task.result()
+                    if short_url and short_url.startswith(('http://', 'https://')):
+                        return provider, short_url
+
+                # Ada yang gagal: langsung failover ke provider berikutnya
+                if not exhausted:
+                    exhausted = not launch()
+        finally:
+            for task in pending:
+                task.cancel()
+
+        return None, None
+
+    async def shorten_multi(self, long_url, providers, deadline, user_id=None):
+        """Shorten dengan beberapa provider sekaligus, tunggu maksimal `deadline` detik.
+
+        Return (hasil, lengkap): hasil = {provider: short_url} yang berhasil
+        sebelum deadline. Request yang terlambat dibatalkan supaya tidak
+        menghabiskan kuota rate limit provider.
+        """
+        if not providers:
+            return {}, True
+        tasks = {
+            asyncio.ensure_future(self.shorten_url(long_url, provider, user_id=user_id)): provider
+            for provider in providers
+        }
+        done, pending = await asyncio.wait(tasks, timeout=deadline)
+
+        results = {}
+        for task, provider in tasks.items():
+            short_url = task.result() if task in done else None
+            if short_url and short_url.startswith(('http://', 'https://')):
+                results[provider] = short_url
+        for task in pending:
+            task.cancel()
+        return results, not pending
+
+    async def shorten_url(self, long_url, provider, custom_alias=None, user_id=None):
+        """Shorten URL dengan provider tertentu dan custom alias"""
+        if provider not in PROVIDERS:
+            return None
+
+        # URL kanonik supaya link yang hanya beda tracking param berbagi cache dan request
+        long_url = canonicalize(long_url) or long_url
+
+        if self.cache is not None:
+            cached = self.cache.get(long_url, provider, custom_alias)
+            if cached:
+                return cached
+
+        # Request identik yang sedang berjalan dipakai bersama (single-flight)
+        key = (long_url, provider, custom_alias)
+        flight = self._in_flight.get(key)
+        if flight is None:
+            flight = _Flight(asyncio.ensure_future(self._fetch(long_url, provider, custom_alias, user_id)))
+            self._in_flight[key] = flight
+            flight.task.add_done_callback(lambda _: self._forget_flight(key, flight))
+        else:
+            self.coalesced += 1
+
+        flight.waiters += 1
+        try:
+            return await asyncio.shield(flight.task)
+        finally:
+            flight.waiters -= 1
+            # Request dibatalkan hanya jika tidak ada lagi yang menunggu hasilnya.
+            # Flight langsung dilepas supaya request baru tidak ikut menunggu
+            # task yang sedang dibatalkan (dan ikut kena CancelledError).
+            if not flight.waiters and not flight.task.done():
+                flight.task.cancel()
+                self._forget_flight(key, flight)
+
+    def _forget_flight(self, key, flight):
+        if self._in_flight.get(key) is flight:
+            del self._in_flight[key]
+
+    async def _fetch(self, long_url, provider, custom_alias=None, user_id=None):
+        """Rate limit, circuit breaker, request ke provider (plus retry), lalu simpan hasil.
+
+        Error sementara diulang dengan backoff selama budget retry global masih
+        ada dan total waktu (dihitung dari request pertama) masih di bawah
+        `timeout`. Setiap percobaan memakai token rate limit sendiri dan
+        dicatat di health tracker sebagai satu sampel.
+        """
+        # Circuit breaker terbuka: langsung gagal tanpa menunggu timeout
+        health = self.health[provider]
+        if not health.is_available():
+            return None
+
+        if not PROVIDERS[provider].is_local:
+            self.retry_budget.deposit()
+        deadline = None
+        for attempt in itertools.count():
+            # Tunggu giliran sesuai rate limit provider (antrian fair per user)
+            await self.scheduler.acquire(provider, user_id)
+            if not health.allow_request():
+                return None
+
+            start = time.monotonic()
+            if deadline is None:
+                deadline = start + self.timeout
+            elif start >= deadline:
+                # Antrian rate limit untuk retry memakan sisa waktu
+                health.release()
+                print(f"Error dengan {provider}: {retry}, tidak diulang (melewati batas waktu)")
+                return None
+            retry = None
+            try:
+                short_url = await self._request(long_url, provider, custom_alias, deadline)
+            except _Retryable as e:
+                short_url, retry = None, e
+            except asyncio.CancelledError:
+                # Dibatalkan (misal kalah race), bukan berarti provider gagal
+                health.release()
+                raise
+            # Hasil ERROR: (misal alias dipakai) tetap berarti provider sehat
+            ok = is_valid_result(short_url)
+            latency = time.monotonic() - start
+            health.record(ok, latency)
+            for listener in self.listeners:
+                listener(provider, ok, latency)
+
+            if retry is None:
+                break
+            delay = self._retry_delay(provider, attempt, retry, deadline)
+            if delay is None:
+                break
+            self.retries[provider] += 1
+            print(f"🔁 Retry {provider} ke-{attempt + 1} dalam {delay * 1000:.0f}ms: {retry}")
+            await asyncio.sleep(delay)
+
+        if self.cache is not None:
+            self.cache.set(long_url, provider, short_url, custom_alias)
+        return short_url
+
+    def _retry_delay(self, provider, attempt, error, deadline):
+        """Jeda sebelum retry berikutnya, None jika tidak perlu diulang"""
+        if attempt >= self.max_retries:
+            reason = "percobaan habis"
+        else:
+            delay = error.retry_after if error.retry_after is not None else self.retry_budget.delay(attempt)
+            if time.monotonic() + delay >= deadline:
+                reason = "melewati batas waktu"
+            elif not self.retry_budget.try_retry():
+                reason = "budget retry habis"
+            else:
+                return delay
+        print(f"Error dengan {provider}: {error}, tidak diulang ({reason})")
+        return None
+
+    async def alias_taken(self, provider, alias, user_id=None):
+        """Cek alias di provider: True = sudah dipakai, False = bebas, None = tidak bisa dicek"""
+        spec = PROVIDERS[provider]
+        try:
+            if spec.is_local:
+                return spec.alias_taken(alias)
+            # Cek alias ikut rate limit dan circuit breaker seperti request shorten
+            if spec.lookup_path is None or not self.health[provider].is_available():
+                return None
+            await self.scheduler.acquire(provider, user_id)
+            # Short link yang ada menjawab dengan redirect; jangan diikuti
+            response = await self._client(provider).get(
+                spec.lookup_path.format(alias=quote(alias, safe='')), follow_redirects=False
+            )
+        except Exception as e:
+            print(f"Error cek alias dengan {provider}: {e}")
+            return None
+        if 300 <= response.status_code < 400:
+            return True
+        if response.status_code == 404:
+            return False
+        return None
+
+    async def _request(self, long_url, provider, custom_alias=None, deadline=None):
+        """Satu request ke provider, respon di-parse secara streaming.
+
+        Error sementara dilempar sebagai _Retryable: koneksi ditolak (request
+        belum terkirim), dan tanpa custom alias juga koneksi terputus dan
+        5xx/429, supaya alias yang sudah dibuat tidak dilaporkan sebagai sudah
+        dipakai. 429 hanya diulang jika ada Retry-After. Timeout tidak diulang:
+        provider lambat kemungkinan tetap lambat.
+        """
+        spec = PROVIDERS[provider]
+        if spec.is_local:
+            try:
+                return await spec.shorten(long_url, custom_alias)
+            except Exception as e:
+                print(f"Error dengan {provider}: {e}")
+                return None
+
+        try:
+            method, path, form_data = spec.build_request(long_url, custom_alias)
+            parser = spec.parser_for(custom_alias)
+            timeout = self.timeouts.for_provider(provider)
+            if deadline is not None:
+                # Timeout percobaan ini tidak boleh melewati batas total
+                remaining = max(0.0, deadline - time.monotonic())
+                timeout = httpx.Timeout(min(timeout.read, remaining), connect=min(timeout.connect, remaining))
+            async with self._client(provider).stream(method, path, data=form_data, timeout=timeout) as response:
+                if response.status_code == 200:
+                    # Parser berhenti membaca begitu short link ditemukan
+                    return await parser(response.aiter_bytes())
+                error = f"HTTP {response.status_code}"
+                if custom_alias is None and response.status_code == 429:
+                    # Kena rate limit: ulang hanya jika provider memberi tahu kapan
+                    retry_after = _retry_after(response)
+                    if retry_after is not None:
+                        raise _Retryable(error, retry_after)
+                if custom_alias is None and response.status_code >= 500:
+                    raise _Retryable(error)
+        except httpx.TimeoutException as e:
+            self.timed_out[provider] += 1
+            error = f"{type(e).__name__} {e}".strip()
+            error += f" (connect {timeout.connect:.1f}s, read {timeout.read:.1f}s)"
+        except httpx.ConnectError as e:
+            raise _Retryable(f"{type(e).__name__} {e}".strip())
+        except (httpx.ReadError, httpx.WriteError, httpx.RemoteProtocolError) as e:
+            error = f"{type(e).__name__} {e}".strip()
+            if custom_alias is None:
+                raise _Retryable(error)
+        except _Retryable:
+            raise
+        except Exception as e:
+            error = str(e)
+        print(f"Error dengan {provider}: {error}")
+        return None
@@ -0,0 +1,80 @@
+import asyncio
+from collections import Counter, OrderedDict
+
+from state import StateStore
+
+
+class Speculator:
+    """Shorten di background selagi user masih memilih provider.
+
+    Provider ditebak dari pilihan terakhir user, atau provider yang paling
+    sering dipilih semua user. Jumlah task spekulatif yang berjalan dibatasi
+    `max_in_flight`; tebakan yang salah dibatalkan.
+    """
+
+    def __init__(self, max_in_flight=32, max_users=10000, choice_ttl=30 * 86400, path=None):
+        self.max_in_flight = max_in_flight
+        self.max_users = max_users
+        self.choices = StateStore('last_provider', max_users, choice_ttl, path)
+        self.popularity = Counter()
+        # user_id -> (url, provider, task)
+        self._pending = OrderedDict()
+        self.running = 0
+        self.started = 0
+        self.hits = 0
+        self.misses = 0
+
+    def record_choice(self, user_id, provider):
+        self.choices[user_id] = provider
+        self.popularity[provider] += 1
+
+    def predict(self, user_id):
+        """Provider yang kemungkinan dipilih user, None jika belum ada data"""
+        provider = self.choices.get(user_id)
+        if provider is None and self.popularity:
+            provider = self.popularity.most_common(1)[0][0]
+        return provider
+
+    def start(self, user_id, url, provider, coroutine_factory):
+        """Mulai task spekulatif; return False jika budget habis"""
+        self._discard(user_id)
+        if self.running >= self.max_in_flight:
+            return False
+        task = asyncio.ensure_future(coroutine_factory())
+        self.running += 1
+        self.started += 1
+        task.add_done_callback(self._finished)
+        self._pending[user_id] = (url, provider, task)
+        if len(self._pending) > self.max_users:
+            self._discard(next(iter(self._pending)))
+        return True
+
+    def _finished(self, task):
+        self.running -= 1
+
+    def _discard(self, user_id):
+        entry = self._pending.pop(user_id, None)
+        if entry is not None:
+            entry[2].cancel()
+        return entry
+
+    def take(self, user_id, url, provider):
+        """Task spekulatif yang cocok dengan pilihan user, atau None (tebakan salah dibatalkan)"""
+        entry = self._pending.pop(user_id, None)
+        if entry is None:
+            return None
+        spec_url, spec_provider, task = entry
+        if spec_url == url and spec_provider == provider and not task.cancelled():
+            self.hits += 1
+            return task
+        task.cancel()
+        self.misses += 1
+        return None
+
+    def hit_rate(self):
+        return self.hits / self.started if self.started else 0.0
+
+    def close(self):
+        for user_id in list(self._pending):
+            self._discard(user_id)
+        self.choices.close()
@@ -0,0 +1,109 @@
+import json
+import sqlite3
+import time
+from collections import OrderedDict
+
+
+class StateStore:
+    """Penyimpanan state per user dengan ukuran terbatas dan TTL per entry.
+
+    Entry disimpan di memory (LRU). Jika `path` diisi, entry juga ditulis ke
+    SQLite sehingga flow yang belum selesai tetap ada setelah restart.
+    """
+
+    def __init__(self, name, max_entries=10000, ttl=3600, path=None):
+        self.name = name
+        self.max_entries = max_entries
+        self.ttl = ttl
+        # key -> (expires_at, value), urutan = urutan LRU
+        self._memory = OrderedDict()
+        self._db = None
+        self._writes = 0
+
+        if path:
+            self._db = sqlite3.connect(path, isolation_level=None, check_same_thread=False)
+            self._db.execute("PRAGMA journal_mode=WAL")
+            self._db.execute(
+                f"CREATE TABLE IF NOT EXISTS state_{name} ("
+                "key INTEGER PRIMARY KEY, value TEXT NOT NULL, expires_at REAL NOT NULL)"
+            )
+            self.purge()
+
+    def _remember(self, key, value, expires_at):
+        self._memory[key] = (expires_at, value)
+        self._memory.move_to_end(key)
+        while len(self._memory) > self.max_entries:
+            evicted, _ = self._memory.popitem(last=False)
+            if self._db is not None:
+                self._db.execute(f"DELETE FROM state_{self.name} WHERE key = ?", (evicted,))
+
+    def get(self, key, default=None):
+        entry = self._memory.get(key)
+        if entry is None and self._db is not None:
+            row = self._db.execute(
+                f"SELECT expires_at, value FROM state_{self.name} WHERE key = ?", (key,)
+            ).fetchone()
+            if row:
+                entry = (row[0], json.loads(row[1]))
+                self._remember(key, entry[1], entry[0])
+
+        if entry is None:
+            return default
+        if entry[0] <= time.time():
+            self.pop(key)
+            return default
+
+        self._memory.move_to_end(key)
+        return entry[1]
+
+    def set(self, key, value):
+        expires_at = time.time() + self.ttl
+        self._remember(key, value, expires_at)
+        if self._db is not None:
+            self._db.execute(
+                f"INSERT OR REPLACE INTO state_{self.name} (key, value, expires_at) VALUES (?, ?, ?)",
+                (key, json.dumps(value), expires_at)
+            )
+
+        # Bersihkan entry kadaluarsa secara berkala
+        self._writes += 1
+        if self._writes % 1000 == 0:
+            self.purge()
+
+    def pop(self, key, default=None):
+        entry = self._memory.pop(key, None)
+        if self._db is not None:
+            self._db.execute(f"DELETE FROM state_{self.name} WHERE key = ?", (key,))
+        return entry[1] if entry is not None else default
+
+    def purge(self):
+        """Hapus semua entry yang sudah kadaluarsa"""
+        now = time.time()
+        expired = [key for key, (expires_at, _) in self._memory.items() if expires_at <= now]
+        for key in expired:
+            del self._memory[key]
+        if self._db is not None:
+            self._db.execute(f"DELETE FROM state_{self.name} WHERE expires_at <= ?", (now,))
+
+    def __getitem__(self, key):
+        value = self.get(key)
+        if value is None:
+            raise KeyError(key)
+        return value
+
+    def __setitem__(self, key, value):
+        self.set(key, value)
+
+    def __delitem__(self, key):
+        self.pop(key)
+
+    def __contains__(self, key):
+        return self.get(key) is not None
+
+    def __len__(self):
+        return len(self._memory)
+
+    def close(self):
+        if self._db is not None:
+            self._db.close()
+            self._db = None
@@ -0,0 +1,169 @@
+import hashlib
+import json
+import math
+import os
+import time
+
+# Batas atas bucket histogram latency (detik), bucket terakhir = tak hingga
+LATENCY_BUCKETS = (0.025, 0.05, 0.1, 0.2, 0.3, 0.5, 0.75, 1.0, 1.5, 2.0, 3.0, 5.0, 7.5, 10.0, float('inf'))
+
+
+class HyperLogLog:
+    """Perkiraan jumlah item unik dengan memory tetap (2^p byte)"""
+
+    def __init__(self, p=12, registers=None):
+        self.p = p
+        self.m = 1 << p
+        self.registers = bytearray(registers) if registers else bytearray(self.m)
+
+    def add(self, item):
+        h = int.from_bytes(hashlib.blake2b(str(item).encode(), digest_size=8).digest(), 'big')
+        index = h >> (64 - self.p)
+        rest = h & ((1 << (64 - self.p)) - 1)
+        rank = (64 - self.p) - rest.bit_length() + 1
+        if rank > self.registers[index]:
+            self.registers[index] = rank
+
+    def merge(self, other):
+        for i, value in enumerate(other.registers):
+            if value > self.registers[i]:
+                self.registers[i] = value
+
+    def count(self):
+        alpha = 0.7213 / (1 + 1.079 / self.m)
+        estimate = alpha * self.m * self.m / sum(2.0 ** -r for r in self.registers)
+        zeros = self.registers.count(0)
+        # Koreksi untuk jumlah kecil (linear counting)
+        if estimate <= 2.5 * self.m and zeros:
+            estimate = self.m * math.log(self.m / zeros)
+        return int(round(estimate))
+
+
+class LatencyHistogram:
+    """Histogram latency dengan bucket tetap"""
+
+    def __init__(self, counts=None, total=0.0):
+        self.counts = list(counts) if counts else [0] * len(LATENCY_BUCKETS)
+        self.total = total
+
+    def observe(self, seconds):
+        for i, bound in enumerate(LATENCY_BUCKETS):
+            if seconds <= bound:
+                self.counts[i] += 1
+                break
+        self.total += seconds
+
+    def merge(self, other):
+        self.counts = [a + b for a, b in zip(self.counts, other.counts)]
+        self.total += other.total
+
+    def percentile(self, q):
+        """Perkiraan persentil (detik) dengan interpolasi di dalam bucket"""
+        count = sum(self.counts)
+        if not count:
+            return None
+        rank = q / 100 * count
+        seen = 0
+        lower = 0.0
+        for bound, bucket_count in zip(LATENCY_BUCKETS, self.counts):
+            if bucket_count and seen + bucket_count >= rank:
+                if math.isinf(bound):
+                    return lower
+                return lower + (bound - lower) * (rank - seen) / bucket_count
+            seen += bucket_count
+            lower = bound
+        return lower
+
+
+class ProviderStats:
+    __slots__ = ('requests', 'successes', 'failures', 'latency')
+
+    def __init__(self, requests=0, successes=0, failures=0, latency=None):
+        self.requests = requests
+        self.successes = successes
+        self.failures = failures
+        self.latency = latency or LatencyHistogram()
+
+    def success_rate(self):
+        return self.successes / self.requests if self.requests else 0.0
+
+
+class BotStats:
+    """Statistik bot dengan memory terbatas, disimpan berkala ke file JSON"""
+
+    def __init__(self, path=None):
+        self.path = path
+        self.start_time = time.time()
+        self.urls_shortened = 0
+        self.users = HyperLogLog()
+        self.providers = {}
+        if path and os.path.exists(path):
+            self.load()
+
+    def record_user(self, user_id):
+        self.users.add(user_id)
+
+    def record_provider(self, provider, ok, latency):
+        stats = self.providers.get(provider)
+        if stats is None:
+            stats = self.providers[provider] = ProviderStats()
+        stats.requests += 1
+        if ok:
+            stats.successes += 1
+            stats.latency.observe(latency)
+        else:
+            stats.failures += 1
+
+    def users_served(self):
+        return self.users.count()
+
+    def merge(self, other):
+        """Gabungkan statistik proses lain (misal shard lain) ke sini"""
+        self.start_time = min(self.start_time, other.start_time)
+        self.urls_shortened += other.urls_shortened
+        self.users.merge(other.users)
+        for name, other_stats in other.providers.items():
+            stats = self.providers.get(name)
+            if stats is None:
+                stats = self.providers[name] = ProviderStats()
+            stats.requests += other_stats.requests
+            stats.successes += other_stats.successes
+            stats.failures += other_stats.failures
+            stats.latency.merge(other_stats.latency)
+
+    def to_dict(self):
+        return {
+            'urls_shortened': self.urls_shortened,
+            'users': self.users.registers.hex(),
+            'providers': {
+                name: {
+                    'requests': s.requests,
+                    'successes': s.successes,
+                    'failures': s.failures,
+                    'latency_counts': s.latency.counts,
+                    'latency_total': s.latency.total
+                }
+                for name, s in self.providers.items()
+            }
+        }
+
+    def load(self):
+        with open(self.path, encoding='utf-8') as f:
+            data = json.load(f)
+        self.urls_shortened = data.get('urls_shortened', 0)
+        if data.get('users'):
+            self.users = HyperLogLog(registers=bytes.fromhex(data['users']))
+        for name, s in data.get('providers', {}).items():
+            self.providers[name] = ProviderStats(
+                s['requests'], s['successes'], s['failures'],
+                LatencyHistogram(s['latency_counts'], s['latency_total'])
+            )
+
+    def save(self):
+        """Tulis ke file sementara lalu rename supaya file tidak pernah setengah jadi"""
+        if not self.path:
+            return
+        tmp_path = f"{self.path}.tmp"
+        with open(tmp_path, 'w', encoding='utf-8') as f:
+            json.dump(self.to_dict(), f)
+        os.replace(tmp_path, self.path)
@@ -0,0 +1,35 @@
+import asyncio
+
+from aliases import AliasProber, alias_variants
+from scheduler import ProviderScheduler
+
+
+class FakeShortener:
+    def __init__(self, scheduler, taken=()):
+        self.scheduler = scheduler
+        self.taken = set(taken)
+        self.probes = []
+
+    async def alias_taken(self, provider, alias, user_id=None):
+        self.probes.append((provider, alias))
+        return (provider, alias) in self.taken
+
+
+def test_suggest_stops_once_enough_variants_are_free():
+    shortener = FakeShortener(ProviderScheduler())
+    prober = AliasProber(shortener)
+    suggestions = asyncio.run(prober.suggest('promo', ['is_gd', 'v_gd'], limit=3))
+    variants = alias_variants('promo')
+    assert suggestions == [('is_gd', variants[0]), ('v_gd', variants[0]), ('is_gd', variants[1])]
+    # Satu putaran (2 variasi x 2 provider) sudah cukup
+    assert len(shortener.probes) == 4
+
+
+def test_suggest_skips_queued_providers():
+    scheduler = ProviderScheduler({'is_gd': (60, 1)})
+    scheduler._queues['is_gd'].bucket.tokens = 0
+    shortener = FakeShortener(scheduler)
+    prober = AliasProber(shortener)
+    suggestions = asyncio.run(prober.suggest('promo', ['is_gd', 'v_gd'], limit=2))
+    assert {provider for provider, _ in suggestions} == {'v_gd'}
+    assert all(provider == 'v_gd' for provider, _ in shortener.probes)
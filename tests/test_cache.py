@@ -0,0 +1,22 @@
+from cache import ResultCache
+
+
+def test_disk_store_is_purged_while_running(tmp_path):
+    cache = ResultCache(str(tmp_path / 'cache.db'), max_entries=10, max_disk_entries=500)
+    cache.set('https://example.com/old', 'is_gd', 'https://is.gd/old')
+    cache._db.execute("UPDATE results SET expires_at = 0")
+    for i in range(999):
+        cache.set(f"https://example.com/{i}", 'is_gd', f"https://is.gd/{i}")
+    rows = cache._db.execute("SELECT url FROM results").fetchall()
+    # Entry kadaluarsa terhapus dan disk dibatasi ke entry terbaru
+    assert len(rows) == 500
+    assert ('https://example.com/old',) not in rows
+    assert ('https://example.com/998',) in rows
+    cache.close()
+
+
+def test_errors_are_not_cached():
+    cache = ResultCache(None)
+    cache.set('https://example.com/a', 'is_gd', 'ERROR:2:taken')
+    assert cache.get('https://example.com/a', 'is_gd') is None
+    assert cache.misses == 1
@@ -0,0 +1,34 @@
+import pytest
+
+from canonical import canonicalize
+
+
+@pytest.mark.parametrize('url, expected', [
+    # Skema dan host
+    ('google.com', 'https://google.com/'),
+    ('HTTPS://Example.COM/Path', 'https://example.com/Path'),
+    ('example.com.', 'https://example.com/'),
+    ('https://example.com:443/', 'https://example.com/'),
+    ('http://example.com:8080/x', 'http://example.com:8080/x'),
+    ('localhost:3000', 'https://localhost:3000/'),
+    ('http://[::1]:8080/x', 'http://[::1]:8080/x'),
+    ('https://[2001:DB8::1]/', 'https://[2001:db8::1]/'),
+    ('https://user:pw@Example.com/', 'https://user:pw@example.com/'),
+    # Query: tracking dibuang, urut per nama, nilai key berulang tetap urut
+    ('https://x.com/?b=2&a=1', 'https://x.com/?a=1&b=2'),
+    ('https://x.com/?a=1&a=0', 'https://x.com/?a=1&a=0'),
+    ('https://x.com/?b=1&a=2&b=0', 'https://x.com/?a=2&b=1&b=0'),
+    ('https://x.com/?utm_source=x&UTM_Medium=y&fbclid=z&k', 'https://x.com/?k'),
+    ('https://x.com/?utm_source=x', 'https://x.com/'),
+    # Percent-encoding dan fragment
+    ('https://x.com/a b', 'https://x.com/a%20b'),
+    ('https://x.com/%7Efoo?q=a%20b', 'https://x.com/%7Efoo?q=a%20b'),
+    ('https://x.com/#frag', 'https://x.com/#frag'),
+    # Tidak valid
+    ('', None),
+    ('nodot', None),
+    ('ftp://x.com', None),
+    ('https://x.com:99999/', None),
+])
+def test_canonicalize(url, expected):
+    assert canonicalize(url) == expected
@@ -0,0 +1,87 @@
+import asyncio
+
+from jobs import JobQueue, WorkerPool
+
+
+def test_cancelled_job_does_not_stop_worker():
+    async def run():
+        queue = JobQueue(':memory:')
+        done = []
+
+        async def cancelled(bot, payload):
+            raise asyncio.CancelledError()
+
+        async def normal(bot, payload):
+            done.append(payload['n'])
+
+        pool = WorkerPool(queue, {'cancelled': cancelled, 'normal': normal}, workers=1)
+        pool.start(bot=None)
+        queue.enqueue('cancelled', {})
+        queue.enqueue('normal', {'n': 1})
+        await asyncio.sleep(0.05)
+        await pool.stop()
+        return done, len(queue), queue.failed
+
+    done, pending, failed = asyncio.run(run())
+    assert done == [1]
+    assert pending == 0
+    assert failed == 1
+
+
+def test_limited_kind_leaves_workers_for_other_jobs():
+    async def run():
+        queue = JobQueue(':memory:')
+        release = asyncio.Event()
+        done = []
+
+        async def bulk(bot, payload):
+            await release.wait()
+            done.append('bulk')
+
+        async def custom(bot, payload):
+            done.append('custom')
+
+        pool = WorkerPool(queue, {'bulk': bulk, 'custom': custom}, workers=2, limits={'bulk': 1})
+        pool.start(bot=None)
+        for _ in range(3):
+            queue.enqueue('bulk', {})
+        queue.enqueue('custom', {})
+        await asyncio.sleep(0.05)
+        # Hanya satu bulk berjalan, worker kedua sempat mengerjakan job custom
+        early = list(done)
+        release.set()
+        await asyncio.sleep(0.05)
+        await pool.stop()
+        return early, done, len(queue)
+
+    early, done, pending = asyncio.run(run())
+    assert early == ['custom']
+    assert done.count('bulk') == 3
+    assert pending == 0
+
+
+def test_failed_and_dropped_jobs_are_reported():
+    async def run():
+        queue = JobQueue(':memory:', max_attempts=1)
+        reported = []
+
+        async def broken(bot, payload):
+            raise RuntimeError('get_file gagal')
+
+        async def on_failure(bot, payload):
+            reported.append(payload['message_id'])
+
+        # Job yang sudah dicoba max_attempts kali (misal bikin crash) dibuang
+        queue.enqueue('broken', {'message_id': 1})
+        queue._db.execute("UPDATE jobs SET attempts = 1")
+        queue.enqueue('broken', {'message_id': 2})
+        pool = WorkerPool(queue, {'broken': broken}, workers=1, on_failure=on_failure)
+        pool.start(bot=None)
+        await asyncio.sleep(0.05)
+        await pool.stop()
+        return reported, len(queue), queue.failed
+
+    reported, pending, failed = asyncio.run(run())
+    assert reported == [1, 2]
+    assert pending == 0
+    assert failed == 2
@@ -0,0 +1,52 @@
+import asyncio
+
+from local_shortener import LinkStore, RedirectServer
+
+
+async def exchange(server, data, close=False):
+    """Kirim `data` ke redirect server, return respon sampai koneksi ditutup"""
+    host, port = server._server.sockets[0].getsockname()[:2]
+    reader, writer = await asyncio.open_connection(host, port)
+    writer.write(data)
+    await writer.drain()
+    response = await asyncio.wait_for(reader.read(), 5)
+    writer.close()
+    return response
+
+
+def run_server(scenario, timeout=10):
+    async def run():
+        store = LinkStore(':memory:')
+        code = store.create('https://example.com/long')
+        server = await RedirectServer(store, timeout).start('127.0.0.1', 0)
+        try:
+            return await scenario(server, code)
+        finally:
+            server.close()
+            store.close()
+
+    return asyncio.run(run())
+
+
+def test_redirects_known_code():
+    async def scenario(server, code):
+        return await exchange(server, f"GET /{code} HTTP/1.1\r\nHost: s\r\n\r\n".encode())
+
+    response = run_server(scenario)
+    assert response.startswith(b'HTTP/1.1 301')
+    assert b'Location: https://example.com/long\r\n' in response
+
+
+def test_oversized_request_line_gets_400():
+    async def scenario(server, code):
+        return await exchange(server, b'GET /' + b'a' * 70000 + b' HTTP/1.1\r\n\r\n')
+
+    assert run_server(scenario).startswith(b'HTTP/1.1 400')
+
+
+def test_idle_client_is_disconnected():
+    async def scenario(server, code):
+        # Header tidak pernah selesai dikirim
+        return await exchange(server, b'GET / HTTP/1.1\r\n')
+
+    assert run_server(scenario, timeout=0.1) == b''
@@ -0,0 +1,57 @@
+import asyncio
+
+from outbound import OutboundLimiter, interim
+
+
+def test_final_edit_is_not_overwritten_by_interim_in_flight():
+    async def run():
+        limiter = OutboundLimiter(global_rate=100, chat_rate=100, interim_delay=0)
+        delivered = []
+
+        async def edit(text, delay):
+            await asyncio.sleep(delay)
+            delivered.append(text)
+            return text
+
+        data = {'chat_id': 1, 'message_id': 5}
+        # Interim lambat sudah terkirim ke Telegram, hasil akhir yang cepat menyusul
+        pending = asyncio.ensure_future(
+            limiter.process_request(edit, ('⏳', 0.05), {}, 'editMessageText', data, interim())
+        )
+        await asyncio.sleep(0.01)
+        await limiter.process_request(edit, ('✅', 0), {}, 'editMessageText', data, None)
+        await pending
+        return delivered, limiter._locks
+
+    delivered, locks = asyncio.run(run())
+    assert delivered == ['⏳', '✅']
+    assert not locks
+
+
+def test_interim_waiting_for_its_turn_is_dropped_after_final():
+    async def run():
+        limiter = OutboundLimiter(global_rate=100, chat_rate=100, interim_delay=0)
+        delivered = []
+
+        async def edit(text, delay):
+            await asyncio.sleep(delay)
+            delivered.append(text)
+            return text
+
+        data = {'chat_id': 1, 'message_id': 5}
+        first = asyncio.ensure_future(
+            limiter.process_request(edit, ('✅ 1', 0.05), {}, 'editMessageText', data, None)
+        )
+        await asyncio.sleep(0.01)
+        # Interim dibuat sebelum hasil akhir kedua, tapi baru dapat giliran sesudahnya
+        waiting = asyncio.ensure_future(
+            limiter.process_request(edit, ('⏳', 0), {}, 'editMessageText', data, interim())
+        )
+        await asyncio.sleep(0)
+        limiter._mark_final((1, 5))
+        await asyncio.gather(first, waiting)
+        return delivered, limiter.skipped
+
+    delivered, skipped = asyncio.run(run())
+    assert delivered == ['✅ 1']
+    assert skipped == 1
@@ -0,0 +1,21 @@
+from payloads import PayloadStore
+
+
+def test_long_values_round_trip_through_ref():
+    store = PayloadStore('secret')
+    value = 'https://example.com/' + 'a' * 100
+    data = store.pack('custom_', 'is_gd', value)
+    assert len(data.encode()) <= 64
+    assert store.unpack(data, 'custom_') == ('is_gd', value)
+    store.close()
+
+
+def test_expired_refs_are_purged_while_running():
+    store = PayloadStore('secret', ttl=60)
+    old = store.ref('old value')
+    store._db.execute("UPDATE payloads SET created_at = 0 WHERE ref = ?", (old,))
+    for i in range(999):
+        store.ref(f"value {i}")
+    assert store.unpack(f"x:!{old}") == ('x', None)
+    assert store._db.execute("SELECT COUNT(*) FROM payloads").fetchone()[0] == 999
+    store.close()
@@ -0,0 +1,198 @@
+import asyncio
+
+import httpx
+
+from shortener import URLShortener
+from timeouts import RetryBudget
+
+
+class RecordingScheduler:
+    def __init__(self):
+        self.acquired = []
+
+    async def acquire(self, provider, user_id=None):
+        self.acquired.append((provider, user_id))
+
+    def expected_wait(self, provider):
+        return 0.0
+
+
+def make_shortener(result='https://is.gd/abc', delay=0.01):
+    shortener = URLShortener()
+    calls = []
+
+    async def fake_request(long_url, provider, custom_alias=None, deadline=None):
+        calls.append(long_url)
+        await asyncio.sleep(delay)
+        return result
+
+    shortener._request = fake_request
+    return shortener, calls
+
+
+def test_identical_requests_share_one_flight():
+    async def run():
+        shortener, calls = make_shortener()
+        results = await asyncio.gather(*(shortener.shorten_url('https://example.com/a', 'is_gd') for _ in range(5)))
+        return results, calls, shortener.coalesced
+
+    results, calls, coalesced = asyncio.run(run())
+    assert results == ['https://is.gd/abc'] * 5
+    assert len(calls) == 1
+    assert coalesced == 4
+
+
+def test_request_after_cancelled_flight_starts_new_flight():
+    async def run():
+        shortener, calls = make_shortener()
+        first = asyncio.ensure_future(shortener.shorten_url('https://example.com/a', 'is_gd'))
+        await asyncio.sleep(0)
+        first.cancel()
+        # Penunggu terakhir pergi: task flight dibatalkan tapi belum selesai
+        await asyncio.sleep(0)
+        assert first.cancelled()
+        return await shortener.shorten_url('https://example.com/a', 'is_gd'), calls
+
+    result, calls = asyncio.run(run())
+    assert result == 'https://is.gd/abc'
+    assert len(calls) == 2
+
+
+def test_local_provider_only_preferred_on_ties(monkeypatch):
+    from local_shortener import LinkStore, LocalProvider
+    from providers import PROVIDERS
+
+    store = LinkStore(':memory:')
+    monkeypatch.setitem(PROVIDERS, 'local', LocalProvider(store, 'https://s.example.com'))
+    shortener = URLShortener()
+    # Tanpa data latency semua seri: provider lokal didahulukan
+    assert shortener._candidates(('click_ru', 'local'))[0] == 'local'
+    # Provider lain terbukti lebih cepat: urutan ikut skor kesehatan
+    for _ in range(5):
+        shortener.health['click_ru'].record(True, 0.05)
+        shortener.health['local'].record(True, 0.5)
+    assert shortener._candidates(('click_ru', 'local')) == ['click_ru', 'local']
+    store.close()
+
+
+def test_shorten_multi_cancels_late_requests():
+    async def run():
+        shortener, calls = make_shortener(delay=1)
+        results, complete = await shortener.shorten_multi('https://example.com/a', ['is_gd'], deadline=0.05)
+        flights = list(shortener._in_flight.values())
+        await asyncio.sleep(0)
+        return results, complete, flights, shortener._in_flight
+
+    results, complete, flights, in_flight = asyncio.run(run())
+    assert results == {}
+    assert not complete
+    # Request ke provider ikut dibatalkan, tidak dibiarkan jalan di background
+    assert flights and all(flight.task.cancelled() for flight in flights)
+    assert not in_flight
+
+
+def test_alias_probe_uses_scheduler_and_circuit_breaker():
+
+    async def run():
+        scheduler = RecordingScheduler()
+        shortener = URLShortener(scheduler=scheduler)
+        shortener._clients['is.gd'] = httpx.AsyncClient(
+            base_url='https://is.gd', transport=httpx.MockTransport(lambda request: httpx.Response(404))
+        )
+        free = await shortener.alias_taken('is_gd', 'my_alias', user_id=7)
+        # Circuit breaker terbuka: tidak ada request maupun token yang dipakai
+        for _ in range(shortener.health['is_gd'].failure_threshold):
+            shortener.health['is_gd'].record(False, 1.0)
+        unknown = await shortener.alias_taken('is_gd', 'my_alias', user_id=7)
+        await shortener.close()
+        return free, unknown, scheduler.acquired
+
+    free, unknown, acquired = asyncio.run(run())
+    assert free is False
+    assert unknown is None
+    assert acquired == [('is_gd', 7)]
+
+
+def run_with_responses(responses, timeout=10):
+    """Shorten lewat is.gd palsu yang menjawab `responses` berurutan"""
+    async def run():
+        scheduler = RecordingScheduler()
+        shortener = URLShortener(timeout=timeout, scheduler=scheduler, retry_budget=RetryBudget(backoff=0.001))
+        remaining = list(responses)
+
+        def handler(request):
+            response = remaining.pop(0)
+            if isinstance(response, Exception):
+                raise response
+            return response
+
+        shortener._clients['is.gd'] = httpx.AsyncClient(base_url='https://is.gd', transport=httpx.MockTransport(handler))
+        result = await shortener.shorten_url('https://example.com/a', 'is_gd', user_id=7)
+        await shortener.close()
+        calls = len(responses) - len(remaining)
+        return result, calls, shortener, scheduler.acquired
+
+    return asyncio.run(run())
+
+
+def test_connect_error_is_retried_with_new_token_and_sample():
+
+    result, calls, shortener, acquired = run_with_responses([
+        httpx.ConnectError('refused'), httpx.Response(200, text='https://is.gd/abc'),
+    ])
+    assert result == 'https://is.gd/abc'
+    assert calls == 2
+    assert acquired == [('is_gd', 7)] * 2
+    # Latency dicatat per percobaan, bukan total termasuk jeda retry
+    assert [ok for ok, _ in shortener.health['is_gd'].samples] == [False, True]
+
+
+def test_timeouts_are_not_retried():
+
+    result, calls, shortener, _ = run_with_responses([
+        httpx.ConnectTimeout('slow'), httpx.Response(200, text='https://is.gd/abc'),
+    ])
+    assert result is None
+    assert calls == 1
+    assert shortener.timed_out['is_gd'] == 1
+
+
+def test_rate_limited_retry_needs_retry_after():
+
+    result, calls, _, _ = run_with_responses([httpx.Response(429), httpx.Response(200, text='https://is.gd/abc')])
+    assert (result, calls) == (None, 1)
+
+    result, calls, _, _ = run_with_responses([
+        httpx.Response(429, headers={'Retry-After': '0'}), httpx.Response(200, text='https://is.gd/abc'),
+    ])
+    assert (result, calls) == ('https://is.gd/abc', 2)
+
+    # Retry-After melewati batas waktu total: langsung menyerah
+    result, calls, _, _ = run_with_responses([
+        httpx.Response(429, headers={'Retry-After': '30'}), httpx.Response(200, text='https://is.gd/abc'),
+    ], timeout=5)
+    assert (result, calls) == (None, 1)
+
+
+def test_cached_results_do_not_count_as_misses():
+    from cache import ResultCache
+
+    cache = ResultCache(None)
+    shortener = URLShortener(cache=cache)
+    cache.set('https://example.com/a', 'is_gd', 'https://is.gd/abc')
+    assert shortener.cached('https://example.com/a?utm_source=x', ['is_gd', 'v_gd']) == {'is_gd': 'https://is.gd/abc'}
+    assert (cache.hits, cache.misses) == (0, 0)
+
+
+def test_idle_providers_skip_local_and_queued_providers(monkeypatch):
+    from local_shortener import LinkStore, LocalProvider
+    from providers import PROVIDERS
+    from scheduler import ProviderScheduler
+
+    store = LinkStore(':memory:')
+    monkeypatch.setitem(PROVIDERS, 'local', LocalProvider(store, 'https://s.example.com'))
+    scheduler = ProviderScheduler({'is_gd': (60, 1)})
+    scheduler._queues['is_gd'].bucket.tokens = 0
+    shortener = URLShortener(scheduler=scheduler)
+    assert shortener.idle_providers(['local', 'is_gd', 'v_gd']) == ['v_gd']
+    store.close()
@@ -0,0 +1,79 @@
+import random
+
+import httpx
+
+from scheduler import TokenBucket
+
+
+class AdaptiveTimeouts:
+    """Timeout request per provider dari distribusi latency di HealthTracker.
+
+    read = persentil latency x pengali, connect = median x pengali, masing-masing
+    dibatasi floor dan ceiling. Provider tanpa cukup data, atau yang circuit
+    breakernya sedang dicoba lagi, memakai ceiling supaya provider yang
+    melambat tetap bisa pulih.
+    """
+
+    def __init__(self, health, floor=2.0, ceiling=10.0, connect_floor=1.0, connect_ceiling=5.0,
+                 percentile=99, multiplier=2.0, min_samples=10):
+        self.health = health
+        self.floor = floor
+        self.ceiling = ceiling
+        self.connect_floor = connect_floor
+        self.connect_ceiling = connect_ceiling
+        self.percentile = percentile
+        self.multiplier = multiplier
+        self.min_samples = min_samples
+        # provider -> (connect, read) terakhir yang dicatat di log
+        self.current = {}
+
+    @staticmethod
+    def _clamp(value, low, high):
+        return max(low, min(high, value))
+
+    def for_provider(self, provider):
+        health = self.health[provider]
+        tail = health.percentile(self.percentile)
+        median = health.percentile(50)
+        if health.state != health.CLOSED or tail is None or len(health.samples) < self.min_samples:
+            connect, read = self.connect_ceiling, self.ceiling
+        else:
+            connect = self._clamp(median * self.multiplier, self.connect_floor, self.connect_ceiling)
+            read = self._clamp(tail * self.multiplier, self.floor, self.ceiling)
+
+        # Catat di log hanya jika berubah cukup jauh (>= 25%)
+        previous = self.current.get(provider)
+        if previous is None or abs(read - previous[1]) >= previous[1] / 4 or abs(connect - previous[0]) >= previous[0] / 4:
+            self.current[provider] = (connect, read)
+            basis = f"p{self.percentile} {tail * 1000:.0f}ms" if tail is not None else "belum ada data"
+            print(f"⌛ Timeout {provider}: connect {connect:.1f}s, read {read:.1f}s ({basis})")
+        return httpx.Timeout(read, connect=connect)
+
+
+class RetryBudget:
+    """Budget retry global supaya retry tidak melipatgandakan beban saat provider down.
+
+    Setiap request menambah `ratio` token dan bucket terisi `min_rate` token per
+    detik; satu retry memakai satu token. Jeda retry = full jitter backoff.
+    """
+
+    def __init__(self, ratio=0.1, min_rate=1.0, burst=10, backoff=0.2, max_backoff=2.0):
+        self.ratio = ratio
+        self.bucket = TokenBucket(min_rate, burst)
+        self.backoff = backoff
+        self.max_backoff = max_backoff
+        self.denied = 0
+
+    def deposit(self):
+        """Dipanggil setiap request pertama (bukan retry)"""
+        self.bucket.tokens = min(self.bucket.burst, self.bucket.tokens + self.ratio)
+
+    def try_retry(self):
+        if self.bucket.try_take():
+            return True
+        self.denied += 1
+        return False
+
+    def delay(self, attempt):
+        """Jeda acak sebelum retry ke-`attempt` (0 = retry pertama)"""
+        return random.uniform(0, min(self.max_backoff, self.backoff * 2 ** attempt))